@@ -0,0 +1,175 @@
+import os
+
+import cv2
+import numpy as np
+
+# Configuration par défaut (surchargeable via .env)
+PREPROCESS_MODE = os.getenv('OCR_PREPROCESS_MODE', 'adaptive').lower()
+# Hauteur visée (pixels) des lignes de texte après redimensionnement
+TARGET_TEXT_HEIGHT = int(os.getenv('OCR_TARGET_TEXT_HEIGHT', '32'))
+# Largeur maximale de l'image envoyée au détecteur
+MAX_WIDTH = int(os.getenv('OCR_MAX_WIDTH', '1280'))
+
+# Analyse rapide sur une miniature de cette largeur
+ANALYSIS_WIDTH = 320
+# Gradient minimal d'un pixel de contour (en plus du seuil d'Otsu)
+MIN_GRADIENT = 40
+# Proportion minimale de pixels de contour pour qu'une ligne soit du texte probable
+ROW_DENSITY_THRESHOLD = 0.08
+# Bandes fusionnées si elles sont séparées de moins de cette fraction de la hauteur
+BAND_GAP = 0.02
+# Bandes ignorées si elles sont moins hautes que cette fraction de la hauteur
+MIN_BAND_HEIGHT = 0.01
+# Marge ajoutée au-dessus et au-dessous de chaque bande (fraction de la hauteur)
+BAND_PADDING = 0.015
+# Au-delà de cette couverture, l'image entière est traitée (fond chargé, texte partout)
+MAX_BAND_COVERAGE = 0.7
+# Rangées vides entre deux bandes empilées pour que le détecteur ne les relie pas
+BAND_SEPARATOR = 16
+
+
+def enhance_contrast(gray):
+    """Améliorer le contraste pour une meilleure détection de texte"""
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    return clahe.apply(gray)
+
+
+def preprocess_fixed(image, scale_percent=30):
+    """Redimensionne toute l'image à `scale_percent`, niveaux de gris et CLAHE"""
+    width = int(image.shape[1] * scale_percent / 100)
+    height = int(image.shape[0] * scale_percent / 100)
+    resized = cv2.resize(image, (width, height))
+    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    return enhance_contrast(gray)
+
+
+def find_text_bands(gray):
+    """Repère les bandes horizontales susceptibles de contenir du texte.
+
+    Sur une miniature, les pixels de fort gradient morphologique sont reliés
+    horizontalement (les lettres d'un mot forment un trait continu), puis les
+    rangées dont la densité de contours dépasse ROW_DENSITY_THRESHOLD forment
+    les lignes de texte probables. Retourne les bandes [(haut, bas)] et la
+    hauteur médiane des lignes, en fraction de la hauteur de l'image, ainsi
+    que la densité de contours globale (estimation de présence de texte).
+    """
+    height, width = gray.shape[:2]
+    small_height = max(1, int(height * ANALYSIS_WIDTH / width))
+    small = cv2.resize(gray, (ANALYSIS_WIDTH, small_height), interpolation=cv2.INTER_AREA)
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, kernel)
+    otsu, _ = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    edges = (gradient > max(otsu, MIN_GRADIENT)).astype(np.uint8)
+    edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+
+    rows = edges.mean(axis=1) > ROW_DENSITY_THRESHOLD
+    density = float(edges.mean())
+
+    # Suites de rangées consécutives : une par ligne de texte probable
+    lines = []
+    start = None
+    for index, is_text in enumerate(np.append(rows, False)):
+        if is_text and start is None:
+            start = index
+        elif not is_text and start is not None:
+            lines.append((start, index))
+            start = None
+    lines = [(top, bottom) for top, bottom in lines if bottom - top >= MIN_BAND_HEIGHT * small_height]
+    if not lines:
+        return [], 0.0, density
+
+    line_height = float(np.median([bottom - top for top, bottom in lines])) / small_height
+
+    # Fusionner les lignes proches en bandes (légende de plusieurs lignes)
+    bands = [list(lines[0])]
+    for top, bottom in lines[1:]:
+        if top - bands[-1][1] <= BAND_GAP * small_height:
+            bands[-1][1] = bottom
+        else:
+            bands.append([top, bottom])
+    return [(top / small_height, bottom / small_height) for top, bottom in bands], line_height, density
+
+
+def preprocess_adaptive(image, min_scale_percent=30):
+    """Prétraitement guidé par les zones de texte.
+
+    L'échelle est choisie pour que les lignes de texte estimées mesurent
+    environ TARGET_TEXT_HEIGHT pixels (jamais moins que `min_scale_percent`,
+    jamais plus que la taille d'origine ni MAX_WIDTH de large). Seules les
+    bandes de texte probables (barres de légende en haut et en bas des memes)
+    sont redimensionnées, passées au CLAHE et empilées, séparées par quelques
+    rangées vides. Sans bande détectée, ou si elles couvrent presque toute
+    l'image, l'image entière est traitée.
+
+    Retourne l'image prétraitée et un dictionnaire décrivant les bandes
+    retenues (position dans l'image d'origine et dans l'image prétraitée).
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    height, width = gray.shape[:2]
+    bands, line_height, density = find_text_bands(gray)
+
+    scale = min_scale_percent / 100
+    if line_height > 0:
+        scale = max(scale, TARGET_TEXT_HEIGHT / (line_height * height))
+    scale = min(scale, 1.0, MAX_WIDTH / width)
+
+    # Marges autour des bandes, puis fusion des bandes qui se chevauchent
+    padding = BAND_PADDING * height
+    regions = []
+    for top, bottom in bands:
+        top = max(0, int(top * height - padding))
+        bottom = min(height, int(np.ceil(bottom * height + padding)))
+        if regions and top <= regions[-1][1]:
+            regions[-1][1] = max(regions[-1][1], bottom)
+        else:
+            regions.append([top, bottom])
+    coverage = sum(bottom - top for top, bottom in regions) / height
+    if not regions or coverage > MAX_BAND_COVERAGE:
+        regions = [[0, height]]
+
+    scaled_width = max(1, int(width * scale))
+    crops = []
+    offsets = []
+    offset = 0
+    for top, bottom in regions:
+        crop = cv2.resize(gray[top:bottom], (scaled_width, max(1, int((bottom - top) * scale))))
+        crops.append(enhance_contrast(crop))
+        offsets.append(offset)
+        offset += crop.shape[0] + BAND_SEPARATOR
+
+    if len(crops) == 1:
+        processed = crops[0]
+    else:
+        separator = np.zeros((BAND_SEPARATOR, scaled_width), dtype=np.uint8)
+        processed = np.vstack([part for crop in crops for part in (crop, separator)][:-1])
+
+    info = {
+        "mode": "adaptive",
+        "scale": scale,
+        "text_likelihood": density,
+        "bands": [[top, bottom] for top, bottom in regions],
+        "offsets": offsets,
+        "coverage": min(1.0, coverage) if bands else 1.0,
+        "pixels": int(processed.size)
+    }
+    return processed, info
+
+
+def preprocess_frame(image, scale_percent=30, mode=PREPROCESS_MODE):
+    """Prétraite une frame selon le mode choisi ("adaptive" ou "fixed").
+
+    Retourne l'image en niveaux de gris prête pour l'OCR et la description
+    du prétraitement appliqué.
+    """
+    if mode == "adaptive":
+        return preprocess_adaptive(image, scale_percent)
+    processed = preprocess_fixed(image, scale_percent)
+    info = {
+        "mode": "fixed",
+        "scale": scale_percent / 100,
+        "bands": [[0, image.shape[0]]],
+        "offsets": [0],
+        "pixels": int(processed.size)
+    }
+    return processed, info
@@ -0,0 +1,530 @@
+"""Variante ASGI du service EasyOCR : mêmes routes et mêmes réponses JSON que service.py.
+
+    cd easyocr && python asgi_service.py --port 5000
+    cd easyocr && uvicorn asgi_service:app --port 5000 --workers 2
+
+Les corrections ChatGPT sont attendues sur la boucle asyncio avec un client
+HTTP asynchrone (pool de connexions keep-alive, voir async_correction) : un
+appel de plusieurs secondes n'occupe aucun thread. L'OCR et le décodage des
+images, liés au CPU, tournent dans un pool de threads dédié : une requête OCR
+ne fait jamais la queue derrière des requêtes qui attendent l'API OpenAI.
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+# service charge .env : à importer avant de lire la configuration
+import service
+from service import decode_image_buffer, decode_base64_image, parse_option, PoolBusyError
+from async_correction import AsyncCorrector, create_async_client, gather_limited
+from correction_gate import new_gate_stats, GATE_ENABLED
+from ocr_jobs import stream_events_async, resume_cursor
+from instrumentation import metrics, record_error, PROMETHEUS_CONTENT_TYPE
+from profiling import request_profiler
+from reader_pool import CPU_POOL_SIZE, GPU_POOL_SIZE, QUEUE_MAX
+
+# Configuration par défaut (surchargeable via .env)
+# Threads dédiés à l'OCR : un par reader et par requête en file d'attente du pool,
+# pour que le pool réponde 503 plutôt que de laisser les requêtes s'empiler ici
+OCR_THREADS = int(os.getenv('OCR_ASGI_THREADS', str(CPU_POOL_SIZE + GPU_POOL_SIZE + QUEUE_MAX)))
+
+ocr_executor = ThreadPoolExecutor(max_workers=OCR_THREADS, thread_name_prefix="ocr")
+# Client OpenAI asynchrone, créé au démarrage de l'application (None sans clé API)
+corrector = None
+
+
+class InvalidRequest(Exception):
+    """Requête incomplète ou image illisible (réponse 400)"""
+
+
+def error_response(message, status_code):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def busy_response(error):
+    """Réponse 503 avec Retry-After lorsque la file d'attente OCR est pleine"""
+    return JSONResponse({"error": str(error), "retry_after": error.retry_after}, status_code=503,
+                        headers={"Retry-After": str(error.retry_after)})
+
+
+async def run_ocr(func, *args):
+    """Exécute une étape liée au CPU (décodage, OCR) dans le pool de threads dédié"""
+    return await asyncio.get_running_loop().run_in_executor(ocr_executor, func, *args)
+
+
+async def run_blocking(func, *args):
+    """Exécute un calcul local court (regroupement, fusion) hors de la boucle, sans occuper l'OCR"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def client_available():
+    return corrector is not None
+
+
+def get_mimetype(request):
+    return request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+async def read_json(request):
+    """Corps JSON de la requête, ou {} s'il est absent ou invalide"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def read_request(request):
+    """Type de contenu, formulaire multipart et options de la requête (voir get_request_options)"""
+    mimetype = get_mimetype(request)
+    if mimetype == 'multipart/form-data':
+        form = await request.form()
+        return mimetype, form, form
+    if mimetype == 'application/octet-stream':
+        return mimetype, None, request.query_params
+    return mimetype, None, await read_json(request)
+
+
+async def read_image_payloads(request, field, mimetype, form, options):
+    """Images brutes de la requête, décodées ensuite dans le pool OCR.
+
+    Mêmes formats que load_request_images : corps application/octet-stream,
+    fichiers multipart dans `field` ou images Base64 du format JSON historique.
+    """
+    if mimetype == 'application/octet-stream':
+        body = await request.body()
+        return [("octet-stream", body, len(body), 0)] if body else []
+    if mimetype == 'multipart/form-data':
+        payloads = []
+        for upload in form.getlist(field):
+            if hasattr(upload, "read"):
+                data = await upload.read()
+                payloads.append(("multipart", data, len(data), len(data)))
+        return payloads
+    images_b64 = options.get(field) or []
+    if isinstance(images_b64, str):
+        images_b64 = [images_b64]
+    return [("base64", image_b64, None, None) for image_b64 in images_b64]
+
+
+def decode_payload(payload):
+    """Décode une image lue par read_image_payloads"""
+    transport, data, bytes_received, bytes_copied = payload
+    if transport == "base64":
+        return decode_base64_image(data)
+    return decode_image_buffer(data, transport, bytes_received, bytes_copied, time.time())
+
+
+async def correct_frame_texts(texts, confidences=None, gate=GATE_ENABLED, gate_stats=None):
+    """Version asynchrone de service.correct_frame_texts"""
+    decision = service.gate_frame_texts(texts, confidences, gate, gate_stats)
+    if decision is not None and not decision["use_llm"]:
+        return decision["text"], service.gate_summary(decision)
+    return await corrector.correct(texts), service.gate_summary(decision)
+
+
+async def correct_batch(frame_results, options):
+    """Version asynchrone de service.correct_batch : les frames sont corrigées simultanément"""
+    correct_text = parse_option(options, 'correct_text', False)
+    gate = parse_option(options, 'gate', GATE_ENABLED)
+    correction_start = time.time()
+    gate_stats = new_gate_stats()
+
+    async def correct(frame_result):
+        if not service.wants_correction(frame_result, options, client_available):
+            return None, None
+        return await correct_frame_texts(frame_result["texts"], service.frame_confidences(frame_result), gate, gate_stats)
+
+    corrections = await asyncio.gather(*(correct(frame_result) for frame_result in frame_results))
+    return list(corrections), {
+        "correction_time": time.time() - correction_start if correct_text else 0,
+        "correction_gate": gate_stats if correct_text and gate else None
+    }
+
+
+async def health_check(request):
+    """Endpoint de vérification de l'état du service"""
+    return JSONResponse({
+        **service.health_status(),
+        "server": "asgi",
+        "ocr_threads": OCR_THREADS,
+        "async_correction": corrector.stats() if corrector is not None else None
+    })
+
+
+async def readiness_check(request):
+    """État de chargement de chaque modèle : 200 une fois prêts, 503 pendant le préchauffage"""
+    status, ready = service.readiness_status()
+    return JSONResponse(status, status_code=200 if ready else 503)
+
+
+def ocr_single_payload(payload, options):
+    """Décodage et OCR d'une image de /process, dans le pool OCR"""
+    image, decode_stats = decode_payload(payload)
+    if image is None:
+        raise InvalidRequest("Image invalide")
+    frame_result, performance = service.ocr_single(image, options)
+    return frame_result, decode_stats, performance
+
+
+async def process_image(request):
+    """Endpoint pour traiter une image avec le modèle préchargé.
+
+    Requête profilée avec `X-Profile: 1` ou `?profile=true` (voir
+    service.process_image) : cProfile couvre le décodage et l'OCR dans le pool
+    de threads, la boucle asyncio n'est pas profilée.
+    """
+    start_time = time.time()
+    profiler = request_profiler(request.headers, request.query_params)
+    ocr_single = ocr_single_payload if profiler is None else profiler.wrap(ocr_single_payload)
+
+    try:
+        mimetype, form, options = await read_request(request)
+        payloads = await read_image_payloads(request, 'image', mimetype, form, options)
+        if not payloads:
+            return error_response("Aucune image fournie", 400)
+
+        if profiler is not None:
+            profiler.start()
+        try:
+            frame_result, decode_stats, performance = await run_ocr(ocr_single, payloads[0], options)
+
+            # Appliquer la correction de texte si demandé, sans occuper de thread OCR
+            correction = (None, None, 0)
+            if service.wants_correction(frame_result, options, client_available):
+                correction_start = time.time()
+                corrected_text, gate_decision = await correct_frame_texts(
+                    frame_result["texts"], service.frame_confidences(frame_result), parse_option(options, 'gate', GATE_ENABLED)
+                )
+                correction = (corrected_text, gate_decision, time.time() - correction_start)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+
+        response = service.single_response(frame_result, decode_stats, performance, correction, options, start_time)
+        if profiler is not None:
+            response["profile"] = await run_blocking(profiler.report)
+        return JSONResponse(response)
+
+    except InvalidRequest as e:
+        return error_response(str(e), 400)
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        # En cas d'erreur, libérer la mémoire GPU
+        service.release_gpu_memory()
+        return error_response(str(e), 500)
+
+
+def ocr_batch_payloads(payloads, options):
+    """Décodage, sélection et OCR des images de /process-batch, dans le pool OCR"""
+    decode_start = time.time()
+    frames = [decode_payload(payload) for payload in payloads]
+    decode_time = time.time() - decode_start
+    for index, (image, _) in enumerate(frames):
+        if image is None:
+            raise InvalidRequest(f"Image invalide à l'index {index}")
+    images = [image for image, _ in frames]
+
+    # Avec max_frames, seules les frames choisies sont lues (résultats indexés)
+    selected, selection = service.select_batch_frames(images, options)
+    frame_results, performance = service.ocr_batch_frames([images[index] for index in selected], options)
+    return frames, decode_time, selected, selection, frame_results, performance
+
+
+async def process_batch(request):
+    """Endpoint pour traiter toutes les frames d'une vidéo en une seule passe OCR"""
+    start_time = time.time()
+
+    try:
+        mimetype, form, options = await read_request(request)
+        payloads = await read_image_payloads(request, 'images', mimetype, form, options)
+        if not payloads:
+            return error_response("Aucune image fournie", 400)
+
+        frames, decode_time, selected, selection, frame_results, performance = await run_ocr(
+            ocr_batch_payloads, payloads, options
+        )
+        corrections, correction_performance = await correct_batch(frame_results, options)
+        results = service.batch_results(frame_results, corrections, options)
+        if selection is not None:
+            for index, result in zip(selected, results):
+                result["index"] = index
+
+        return JSONResponse(service.batch_response(results, options, {
+            "frames": len(frames),
+            "decode_time": decode_time,
+            "decode": [stats for _, stats in frames],
+            "selection": selection,
+            **performance,
+            **correction_performance,
+            "total_time": time.time() - start_time
+        }))
+
+    except InvalidRequest as e:
+        return error_response(str(e), 400)
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        # En cas d'erreur, libérer la mémoire GPU
+        service.release_gpu_memory()
+        return error_response(str(e), 500)
+
+
+def ocr_video(options, data, suffix):
+    """Échantillonnage, sélection et OCR des frames de /process-video, dans le pool OCR"""
+    frames, video_stats, decode_time = service.sample_video(options, data, suffix)
+    frames, selection = service.select_video_frames(frames, options)
+    frame_results, performance = service.ocr_batch_frames([image for _, image in frames], options)
+    return frames, video_stats, decode_time, selection, frame_results, performance
+
+
+async def process_video(request):
+    """Endpoint pour traiter une vidéo sans extraction préalable des frames en PNG (voir service.py)"""
+    start_time = time.time()
+
+    try:
+        mimetype, form, options = await read_request(request)
+        data, suffix = None, '.mp4'
+        if mimetype == 'application/octet-stream':
+            data = await request.body()
+        elif form is not None and hasattr(form.get('video'), "read"):
+            upload = form['video']
+            suffix = os.path.splitext(upload.filename or '')[1] or '.mp4'
+            data = await upload.read()
+
+        frames, video_stats, decode_time, selection, frame_results, performance = await run_ocr(
+            ocr_video, options, data, suffix
+        )
+        corrections, correction_performance = await correct_batch(frame_results, options)
+        results = service.batch_results(frame_results, corrections, options)
+        for (name, _), result in zip(frames, results):
+            result["frame"] = name
+
+        return JSONResponse(service.batch_response(results, options, {
+            "frames": len(frames),
+            "decode_time": decode_time,
+            "video": video_stats,
+            "selection": selection,
+            **performance,
+            **correction_performance,
+            "total_time": time.time() - start_time
+        }, source='/process-video'))
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        # En cas d'erreur, libérer la mémoire GPU
+        service.release_gpu_memory()
+        return error_response(str(e), 500)
+
+
+async def merge_texts_endpoint(request):
+    """Endpoint pour fusionner localement plusieurs lectures OCR d'un même texte"""
+    try:
+        data = await read_json(request)
+        if not data.get('texts'):
+            return error_response("Aucun texte fourni", 400)
+        return JSONResponse(await run_blocking(service.merge_response, data))
+
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+async def correct_texts(request):
+    """Endpoint pour corriger des textes avec ChatGPT (voir service.correct_texts).
+
+    Les groupes sont corrigés par le client asynchrone ; le mode `packed`, qui
+    n'envoie que quelques appels groupés, réutilise la version synchrone dans
+    un thread hors du pool OCR.
+    """
+    try:
+        data = await read_json(request)
+        if not data or 'texts' not in data:
+            return error_response("Aucun texte fourni", 400)
+        if not data['texts']:
+            return error_response("Liste de textes vide", 400)
+
+        plan = await run_blocking(service.correction_plan, data, client_available())
+        cache_stats = plan["cache_stats"]
+        pending_groups = [plan["groups"][index] for index in plan["pending"]]
+
+        if not plan["grouped"]:
+            performance = None
+            pending_outcomes = await gather_limited(pending_groups, lambda group: corrector.correct(group, cache_stats), 1)
+        elif plan["mode"] == 'packed':
+            # Tous les groupes dans un minimum d'appels, repli groupe par groupe si besoin
+            pending_outcomes, performance = await run_blocking(service.correct_groups_with_chatgpt_packed, pending_groups, cache_stats)
+            performance["groups"] = len(plan["groups"])
+        else:
+            # Corriger les groupes simultanément, résultats dans l'ordre d'origine
+            usage = service.new_usage_stats()
+            correction_start = time.time()
+            pending_outcomes = await gather_limited(
+                pending_groups,
+                lambda group: corrector.correct(group, cache_stats, usage),
+                plan["max_concurrency"]
+            )
+            performance = {
+                "mode": "per_group",
+                "groups": len(plan["groups"]),
+                "max_concurrency": plan["max_concurrency"],
+                **usage,
+                "correction_time": time.time() - correction_start
+            }
+
+        return JSONResponse(await run_blocking(service.correction_response, plan, pending_outcomes, performance))
+
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+def job_frames_from_payloads(payloads):
+    """Décodage des images d'un job, dans le pool OCR"""
+    frames = [decode_payload(payload) for payload in payloads]
+    return service.job_frames_from_images(frames)
+
+
+async def create_job(request):
+    """Endpoint pour lancer l'OCR d'une vidéo en arrière-plan (voir service.create_job)"""
+    try:
+        mimetype, form, options = await read_request(request)
+        options = dict(options.items())
+        if options.get('frames_dir'):
+            frames, selection = await run_ocr(service.job_frames_from_dir, options)
+        else:
+            payloads = await read_image_payloads(request, 'images', mimetype, form, options)
+            frames, selection = await run_ocr(job_frames_from_payloads, payloads), None
+        return JSONResponse(service.submit_job(options, frames, selection), status_code=202)
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+async def job_status(request):
+    """État d'un job et résultats des frames déjà lues (`results=false` pour l'état seul)"""
+    job = service.ocr_jobs.get(request.path_params['job_id'])
+    if job is None:
+        return error_response("Job inconnu", 404)
+    return JSONResponse(service.job_response(job, parse_option(request.query_params, 'results', True)))
+
+
+async def cancel_job(request):
+    """Annule un job : retiré de la file s'il attend, arrêté avant son prochain lot sinon"""
+    job = service.ocr_jobs.cancel(request.path_params['job_id'])
+    if job is None:
+        return error_response("Job inconnu", 404)
+    return JSONResponse(service.job_response(job, with_results=False))
+
+
+async def job_events(request):
+    """Flux Server-Sent Events d'un job, sans occuper de thread pendant l'attente des frames"""
+    job = service.ocr_jobs.get(request.path_params['job_id'])
+    if job is None:
+        return error_response("Job inconnu", 404)
+    cursor = resume_cursor(request.headers.get('last-event-id', request.query_params.get('last_event_id')))
+    return StreamingResponse(stream_events_async(job, cursor), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def metrics_endpoint(request):
+    """Métriques agrégées du processus au format texte de Prometheus"""
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class ErrorCounterMiddleware:
+    """Compte les réponses en erreur (4xx, 5xx) par route dans /metrics, sans toucher au flux SSE"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_counting(message):
+            if message["type"] == "http.response.start" and message["status"] >= 400:
+                # Le routeur ajoute la route trouvée au scope
+                route = scope.get("route")
+                record_error(route.path if route is not None else "unknown", str(message["status"]))
+            await send(message)
+
+        await self.app(scope, receive, send_counting)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Crée le client asynchrone et lance le chargement des modèles selon le mode de préchauffage"""
+    global corrector
+    client = create_async_client(service.api_key)
+    if client is not None:
+        corrector = AsyncCorrector(client, service.correction_cache, service.correction_request,
+                                   on_call=service.record_correction_call)
+    if service.warmup_mode == "eager":
+        await run_ocr(service.initialize_readers)
+    elif service.warmup_mode == "background":
+        service.start_warmup(list(service.loaders.values()))
+    yield
+    if corrector is not None:
+        await corrector.close()
+    ocr_executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health_check, methods=['GET']),
+        Route('/metrics', metrics_endpoint, methods=['GET']),
+        Route('/ready', readiness_check, methods=['GET']),
+        Route('/process', process_image, methods=['POST']),
+        Route('/process-batch', process_batch, methods=['POST']),
+        Route('/process-video', process_video, methods=['POST']),
+        Route('/merge-texts', merge_texts_endpoint, methods=['POST']),
+        Route('/correct-texts', correct_texts, methods=['POST']),
+        Route('/jobs', create_job, methods=['POST']),
+        Route('/jobs/{job_id}', job_status, methods=['GET']),
+        Route('/jobs/{job_id}', cancel_job, methods=['DELETE']),
+        Route('/jobs/{job_id}/events', job_events, methods=['GET'])
+    ],
+    # Permettre les requêtes cross-origin
+    middleware=[Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+                Middleware(ErrorCounterMiddleware)],
+    lifespan=lifespan
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Service EasyOCR asynchrone (ASGI) avec modèle préchargé")
+    parser.add_argument("--port", type=int, default=5000, help="Port d'écoute")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute")
+    parser.add_argument("--warmup", choices=["background", "lazy", "eager"], default=service.warmup_mode,
+                        help="Chargement des modèles : en arrière-plan, au premier usage ou avant de démarrer")
+    parser.add_argument("--workers", type=int, default=service.WORKERS, help="Processus servant l'application")
+    args = parser.parse_args()
+    # Transmis aussi aux processus workers, qui réimportent le service
+    service.warmup_mode = args.warmup
+    os.environ['OCR_WARMUP_MODE'] = args.warmup
+
+    print(f"Démarrage du service EasyOCR (ASGI) sur {args.host}:{args.port}")
+    if args.workers > 1:
+        uvicorn.run("asgi_service:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
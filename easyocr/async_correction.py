@@ -0,0 +1,158 @@
+import asyncio
+import os
+import time
+
+from correction_cache import record_lookup
+from parallel_correction import async_call_with_retry, CALL_TIMEOUT
+
+# Configuration par défaut (surchargeable via .env)
+# Appels ChatGPT simultanés au plus par processus (connexions HTTP ouvertes)
+ASYNC_MAX_CONNECTIONS = int(os.getenv('CORRECTION_ASYNC_MAX_CONNECTIONS', '200'))
+# Connexions gardées ouvertes entre deux appels (keep-alive) et leur durée de vie
+ASYNC_KEEPALIVE_CONNECTIONS = int(os.getenv('CORRECTION_ASYNC_KEEPALIVE_CONNECTIONS', '50'))
+ASYNC_KEEPALIVE_EXPIRY = float(os.getenv('CORRECTION_ASYNC_KEEPALIVE_EXPIRY', '30'))
+
+
+def create_async_client(api_key, timeout=CALL_TIMEOUT, max_connections=ASYNC_MAX_CONNECTIONS,
+                        keepalive_connections=ASYNC_KEEPALIVE_CONNECTIONS, keepalive_expiry=ASYNC_KEEPALIVE_EXPIRY):
+    """Client OpenAI asynchrone avec un pool de connexions HTTP persistantes (keep-alive).
+
+    Les nouveaux essais sont gérés par async_call_with_retry, comme pour le
+    client synchrone. Retourne None si la clé API n'est pas définie.
+    """
+    if not api_key:
+        return None
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=keepalive_connections,
+                          keepalive_expiry=keepalive_expiry)
+    return AsyncOpenAI(api_key=api_key, timeout=timeout, max_retries=0,
+                       http_client=DefaultAsyncHttpxClient(limits=limits, timeout=timeout))
+
+
+class SharedCallCancelled(Exception):
+    """L'appel partagé a été annulé avec la requête qui l'avait lancé"""
+
+
+class AsyncCorrector:
+    """Corrections ChatGPT depuis une boucle asyncio.
+
+    Un appel en attente de l'API n'occupe aucun thread : quelques workers
+    peuvent garder des centaines de corrections en vol, au plus
+    `max_in_flight` à la fois. Le cache des corrections est partagé avec le
+    service synchrone ; les requêtes identiques concurrentes partagent un seul
+    appel. `build_request` donne les paramètres de l'appel pour un groupe de
+    textes et `on_call` reçoit la durée et l'usage de chaque appel réalisé.
+    """
+
+    def __init__(self, client, cache, build_request, on_call=None, max_in_flight=ASYNC_MAX_CONNECTIONS):
+        self.client = client
+        self.cache = cache
+        self.build_request = build_request
+        self.on_call = on_call
+        self.max_in_flight = max_in_flight
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.inflight = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.errors = 0
+
+    async def complete(self, **params):
+        """Appelle l'API chat completions avec reprises, sans dépasser `max_in_flight` appels"""
+        async with self.semaphore:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                return await async_call_with_retry(lambda: self.client.chat.completions.create(**params))
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self.calls += 1
+
+    async def correct(self, texts, cache_stats=None, usage=None):
+        """Corrige un groupe de textes similaires (voir correct_text_with_chatgpt).
+
+        Les accès au cache SQLite passent par le pool de threads par défaut
+        pour ne pas bloquer la boucle.
+        """
+        texts = texts if isinstance(texts, list) else [texts]
+        params = self.build_request(texts)
+        key = self.cache.make_key(texts, params["model"])
+        loop = asyncio.get_running_loop()
+        while True:
+            # Appel identique en cours : partagé sans compter de miss dans le cache
+            shared = self.inflight.get(key)
+            if shared is None:
+                cached = await loop.run_in_executor(None, self.cache.get, key)
+                if cached is not None:
+                    record_lookup(cache_stats, "cache", cached[1])
+                    return cached[0]
+                shared = self.inflight.get(key)
+                if shared is None:
+                    break
+            try:
+                value, call_time = await asyncio.shield(shared)
+            except SharedCallCancelled:
+                continue  # La requête qui avait lancé l'appel a été annulée : le relancer
+            # Le temps économisé correspond à la durée de l'appel évité
+            self.cache.record_coalesced(call_time)
+            record_lookup(cache_stats, "coalesced", call_time)
+            return value
+
+        shared = loop.create_future()
+        self.inflight[key] = shared
+        try:
+            start_time = time.time()
+            response = await self.complete(**params)
+            call_time = time.time() - start_time
+            if self.on_call is not None:
+                self.on_call(call_time, usage, response.usage)
+            value = response.choices[0].message.content
+            shared.set_result((value, call_time))
+            record_lookup(cache_stats, "upstream", 0.0)
+            await loop.run_in_executor(None, self.cache.put, key, value, call_time)
+            return value
+        except BaseException as e:
+            # Y compris l'annulation (CancelledError) : les requêtes en attente ne doivent pas rester bloquées
+            if not shared.done():
+                shared.set_exception(SharedCallCancelled() if isinstance(e, asyncio.CancelledError) else e)
+                shared.exception()  # Évite l'avertissement si aucune requête ne partageait l'appel
+            raise
+        finally:
+            del self.inflight[key]
+
+    async def close(self):
+        """Ferme les connexions du pool HTTP"""
+        await self.client.close()
+
+    def stats(self):
+        """Appels en cours, pic de concurrence et erreurs"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "shared_calls": len(self.inflight)
+        }
+
+
+async def gather_limited(items, func, max_concurrency):
+    """Applique la coroutine `func` à chaque élément, au plus `max_concurrency` à la fois.
+
+    Retourne une liste de couples (résultat, erreur) dans l'ordre des éléments,
+    comme run_concurrently.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def safe_call(item):
+        async with semaphore:
+            try:
+                return await func(item), None
+            except Exception as e:
+                return None, e
+
+    return list(await asyncio.gather(*(safe_call(item) for item in items)))
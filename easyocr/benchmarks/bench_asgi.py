@@ -0,0 +1,168 @@
+"""Latence de l'OCR sous une charge de corrections : gunicorn (gthread) contre la variante ASGI.
+
+Lance le serveur OpenAI factice avec une latence de plusieurs secondes, puis
+chaque serveur (gunicorn avec gunicorn.conf.py, puis asgi_service.py sous
+uvicorn). Pour chacun, des clients envoient en boucle des frames à /process
+(sans cache ni dédoublonnage), d'abord seuls puis pendant que d'autres clients
+envoient des textes tous différents à /correct-texts (filtre de correction
+désactivé : chaque requête appelle l'API). Rapporte les percentiles de latence
+de l'OCR, le débit et les corrections terminées ou en erreur.
+
+    python easyocr/benchmarks/bench_asgi.py --duration 15 --correction-clients 100 --latency 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+import requests
+
+from mock_openai_server import start_server
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_frame():
+    """Frame synthétique 720p avec une légende, encodée en PNG"""
+    image = np.full((720, 1280, 3), 40, dtype=np.uint8)
+    cv2.putText(image, "QUAND TU VOIS TON POTE", (80, 150), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (255, 255, 255), 6)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def start_service(server, port, env):
+    """Démarre le service et attend que les modèles soient chargés"""
+    if server == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+                   "service:create_app()"]
+    else:
+        command = [sys.executable, "asgi_service.py", "--port", str(port), "--warmup", "eager"]
+    process = subprocess.Popen(command, cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"{server} n'a pas démarré")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+
+def run_load(url, frame, duration, ocr_clients, correction_clients, timeout):
+    """Envoie des frames à /process (et des textes à /correct-texts) pendant `duration` secondes"""
+    stop = threading.Event()
+    ocr_latencies = []
+    ocr_errors = []
+    corrections = {"completed": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def ocr_client():
+        session = requests.Session()
+        while not stop.is_set():
+            start_time = time.time()
+            try:
+                response = session.post(f"{url}/process", data=frame, timeout=timeout,
+                                        headers={"Content-Type": "application/octet-stream"},
+                                        params={"dedup": "false", "use_cache": "false"})
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            with lock:
+                (ocr_latencies if ok else ocr_errors).append(time.time() - start_time)
+
+    def correction_client(client):
+        session = requests.Session()
+        request_index = 0
+        while not stop.is_set():
+            # Textes différents à chaque requête : aucune correction servie par le cache
+            texts = [f"QVAND TU VOIS TON POTE {client}-{request_index}", f"QUAND TU VOIS T0N POTE {client}-{request_index}"]
+            request_index += 1
+            try:
+                response = session.post(f"{url}/correct-texts", json={"texts": texts}, timeout=timeout)
+                ok = response.status_code == 200 and "fallback" not in response.json()
+            except requests.RequestException:
+                ok = False
+            with lock:
+                corrections["completed" if ok else "errors"] += 1
+
+    threads = [threading.Thread(target=ocr_client) for _ in range(ocr_clients)]
+    threads += [threading.Thread(target=correction_client, args=(client,)) for client in range(correction_clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "ocr_requests": len(ocr_latencies),
+        "ocr_errors": len(ocr_errors),
+        "ocr_throughput": round(len(ocr_latencies) / duration, 2),
+        "ocr_latency": {
+            name: round(value, 3) if value is not None else None
+            for name, value in (("p50", percentile(ocr_latencies, 0.5)), ("p95", percentile(ocr_latencies, 0.95)),
+                                ("p99", percentile(ocr_latencies, 0.99)),
+                                ("max", max(ocr_latencies) if ocr_latencies else None))
+        },
+        "corrections_completed": corrections["completed"],
+        "correction_errors": corrections["errors"],
+        "correction_throughput": round(corrections["completed"] / duration, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'OCR sous charge de corrections (gunicorn contre ASGI)")
+    parser.add_argument("--servers", nargs="+", default=["gunicorn", "asgi"], choices=["gunicorn", "asgi"],
+                        help="Serveurs comparés")
+    parser.add_argument("--duration", type=float, default=15, help="Durée de chaque phase (secondes)")
+    parser.add_argument("--ocr-clients", type=int, default=2, help="Clients envoyant des frames en boucle")
+    parser.add_argument("--correction-clients", type=int, default=100, help="Clients envoyant des corrections en boucle")
+    parser.add_argument("--latency", type=float, default=2.0, help="Latence simulée des appels ChatGPT (secondes)")
+    parser.add_argument("--timeout", type=float, default=60, help="Délai maximal d'une requête cliente (secondes)")
+    parser.add_argument("--port", type=int, default=8023, help="Port du serveur OpenAI factice (service sur port + 1)")
+    args = parser.parse_args()
+
+    mock = start_server(port=args.port, latency=args.latency, error_rate=0.0)
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "test",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.port}/v1",
+        "OCR_CACHE_ENABLED": "false",
+        "CORRECTION_CACHE_PERSIST": "false",
+        "CORRECTION_GATE_ENABLED": "false",
+        "EASYOCR_GPU_ENABLED": "false",
+        "KMP_DUPLICATE_LIB_OK": "TRUE"
+    }
+    frame = make_frame()
+    url = f"http://127.0.0.1:{args.port + 1}"
+
+    report = {"latency": args.latency, "duration": args.duration, "ocr_clients": args.ocr_clients,
+              "correction_clients": args.correction_clients, "servers": {}}
+    for server in args.servers:
+        process = start_service(server, args.port + 1, env)
+        try:
+            report["servers"][server] = {
+                "ocr_only": run_load(url, frame, args.duration, args.ocr_clients, 0, args.timeout),
+                "with_corrections": run_load(url, frame, args.duration, args.ocr_clients,
+                                             args.correction_clients, args.timeout)
+            }
+        finally:
+            process.terminate()
+            process.wait()
+    mock.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Compare la fusion locale des versions OCR d'un groupe au premier texte brut.
+
+Génère des groupes étiquetés : chaque légende est « lue » plusieurs fois avec
+les confusions typiques de l'OCR (O/0, I/l/1, U/V, E/F, S/5, lettres perdues
+ou dédoublées, espaces parasites), la confiance de chaque lecture baissant
+avec son nombre d'erreurs. Ou utilise --labels, un fichier JSON
+[{"truth": "...", "texts": [...], "confidences": [...]}].
+
+Rapporte le taux d'erreur caractère (CER) du premier texte du groupe (ce que
+retenait index.py sans correction), de la lecture la plus confiante et de la
+fusion (avec et sans pondération par les confiances), ainsi que la latence
+de la fusion par groupe. Aucun modèle ni appel réseau n'est nécessaire.
+
+    python easyocr/benchmarks/bench_consensus.py --groups 300 --variants 2 3 5
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consensus_merge import merge_texts
+
+CAPTIONS = [
+    "QUAND TU VOIS TON POTE ARRIVER EN RETARD", "MOI A 3H DU MATIN DEVANT LE FRIGO",
+    "PERSONNE NE COMPREND POURQUOI", "MY FACE WHEN THE WEEKEND STARTS TOMORROW",
+    "POV: TU EXPLIQUES LA BLAGUE", "MON CHAT A MINUIT", "LUNDI MATIN ENCORE UNE FOIS",
+    "WHEN YOUR MOM SAYS NO", "JE SUIS PAS EN RETARD\nJE SUIS EN AVANCE POUR DEMAIN",
+    "ME EXPLAINING THE MEME\nMY FRIENDS WHO DIDN'T ASK"
+]
+
+CONFUSIONS = {"O": "0", "0": "O", "I": "l", "l": "I", "1": "I", "U": "V", "V": "U", "E": "F",
+              "S": "5", "5": "S", "B": "8", "A": "4", "N": "M", "M": "N", "D": "O"}
+
+
+def add_noise(text, rng, error_rate):
+    """Lecture bruitée d'un texte ; retourne le texte et son nombre d'erreurs"""
+    chars = []
+    errors = 0
+    for char in text:
+        roll = rng.random()
+        if char != "\n" and roll < error_rate:
+            errors += 1
+            kind = rng.random()
+            if kind < 0.6 and char in CONFUSIONS:
+                chars.append(CONFUSIONS[char])
+            elif kind < 0.8:
+                continue  # Lettre perdue
+            elif kind < 0.9:
+                chars.append(char + char)
+            else:
+                chars.append(char + " ")
+        else:
+            chars.append(char)
+    return "".join(chars), errors
+
+
+def make_groups(count, variants, error_rate, seed):
+    """Groupes synthétiques étiquetés de `variants` lectures d'une même légende"""
+    rng = random.Random(seed)
+    groups = []
+    for index in range(count):
+        truth = CAPTIONS[index % len(CAPTIONS)]
+        texts, confidences = [], []
+        for _ in range(variants):
+            # Certaines lectures sont très propres, d'autres très bruitées
+            text, errors = add_noise(truth, rng, error_rate * rng.choice([0.2, 1.0, 2.0]))
+            texts.append(text)
+            confidences.append(round(max(0.05, min(0.99, 1.0 - 3.0 * errors / len(truth) + rng.gauss(0, 0.05))), 3))
+        groups.append({"truth": truth, "texts": texts, "confidences": confidences})
+    return groups
+
+
+def edit_distance(a, b):
+    """Distance de Levenshtein entre deux chaînes"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def normalize(text):
+    """Majuscules et espaces simples pour comparer au texte attendu"""
+    return " ".join(text.upper().split())
+
+
+def cer(predictions, truths):
+    """Taux d'erreur caractère cumulé sur tous les groupes"""
+    errors = sum(edit_distance(normalize(p), normalize(t)) for p, t in zip(predictions, truths))
+    return round(errors / sum(len(normalize(t)) for t in truths), 4)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def evaluate(groups):
+    """CER de chaque stratégie et latence de la fusion"""
+    truths = [group["truth"] for group in groups]
+    merged, weighted, latencies = [], [], []
+    for group in groups:
+        merged.append(merge_texts(group["texts"])[0])
+        start_time = time.perf_counter()
+        weighted.append(merge_texts(group["texts"], group.get("confidences"))[0])
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    most_confident = [
+        group["texts"][max(range(len(group["texts"])), key=lambda i: (group.get("confidences") or [0] * len(group["texts"]))[i])]
+        for group in groups
+    ]
+    return {
+        "groups": len(groups),
+        "cer_first_text": cer([group["texts"][0] for group in groups], truths),
+        "cer_most_confident": cer(most_confident, truths),
+        "cer_merged": cer(merged, truths),
+        "cer_merged_weighted": cer(weighted, truths),
+        "merge_latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": round(percentile(latencies, 0.5), 3),
+            "p95": round(percentile(latencies, 0.95), 3)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la fusion locale des versions OCR")
+    parser.add_argument("--labels", help="Groupes étiquetés (JSON) au lieu des groupes synthétiques")
+    parser.add_argument("--groups", type=int, default=300, help="Nombre de groupes synthétiques")
+    parser.add_argument("--variants", type=int, nargs="+", default=[2, 3, 5], help="Lectures par groupe")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Proportion moyenne de caractères mal lus")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des groupes synthétiques")
+    args = parser.parse_args()
+
+    if args.labels:
+        with open(args.labels, encoding="utf-8") as f:
+            report = {"labels": args.labels, **evaluate(json.load(f))}
+    else:
+        report = {
+            "error_rate": args.error_rate,
+            "runs": [{"variants": variants, **evaluate(make_groups(args.groups, variants, args.error_rate, args.seed))}
+                     for variants in args.variants]
+        }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
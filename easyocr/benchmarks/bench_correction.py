@@ -0,0 +1,96 @@
+"""Mesure la correction parallèle des groupes contre le serveur OpenAI factice.
+
+Lance le serveur factice avec une latence et un taux d'erreurs 429/500, puis
+corrige les mêmes groupes en séquentiel, avec plusieurs appels simultanés et
+en mode groupé (un seul prompt pour tous les groupes). Vérifie que les
+résultats reviennent dans l'ordre d'origine et compare les tokens consommés.
+
+    python easyocr/benchmarks/bench_correction.py --groups 8 --latency 0.5 --error-rate 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from mock_openai_server import start_server
+from packed_correction import correct_groups_packed
+from parallel_correction import call_with_retry, run_concurrently
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la correction parallèle des groupes")
+    parser.add_argument("--groups", type=int, default=8, help="Nombre de groupes à corriger")
+    parser.add_argument("--latency", type=float, default=0.5, help="Latence simulée par appel (secondes)")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Proportion d'erreurs 429/500 simulées")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Niveaux de parallélisme testés")
+    parser.add_argument("--port", type=int, default=8021, help="Port du serveur factice")
+    args = parser.parse_args()
+
+    server = start_server(port=args.port, latency=args.latency, error_rate=args.error_rate)
+    client = OpenAI(api_key="test", base_url=f"http://127.0.0.1:{args.port}/v1", timeout=10, max_retries=0)
+
+    groups = [[f"Texte du groupe {i}", f"Texte du gruope {i}"] for i in range(args.groups)]
+
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+
+    def correct(group):
+        response = call_with_retry(lambda: client.chat.completions.create(
+            model="mock",
+            messages=[
+                {"role": "system", "content": "Corrige les erreurs OCR et retourne uniquement la meilleure version du texte."},
+                {"role": "user", "content": "\n---\n".join(group)}
+            ],
+            max_tokens=100
+        ), base_delay=0.05)
+        usage["prompt_tokens"] += response.usage.prompt_tokens
+        usage["completion_tokens"] += response.usage.completion_tokens
+        return response.choices[0].message.content
+
+    def request_chunk(messages, max_tokens):
+        response = call_with_retry(lambda: client.chat.completions.create(
+            model="mock", messages=messages, max_tokens=max_tokens
+        ), base_delay=0.05)
+        return response.choices[0].message.content, response.usage
+
+    report = []
+    for concurrency in args.concurrency:
+        usage.update(prompt_tokens=0, completion_tokens=0)
+        start_time = time.time()
+        outcomes = run_concurrently(groups, correct, max_concurrency=concurrency)
+        wall_time = time.time() - start_time
+        in_order = all(result == group[0] for group, (result, error) in zip(groups, outcomes) if error is None)
+        report.append({
+            "mode": "per_group",
+            "concurrency": concurrency,
+            "wall_time": round(wall_time, 3),
+            "failed_groups": sum(1 for _, error in outcomes if error is not None),
+            "in_order": in_order,
+            **usage
+        })
+
+    usage.update(prompt_tokens=0, completion_tokens=0)
+    start_time = time.time()
+    outcomes, packed_stats = correct_groups_packed(groups, request_chunk, correct)
+    report.append({
+        "mode": "packed",
+        "wall_time": round(time.time() - start_time, 3),
+        "chunks": packed_stats["chunks"],
+        "fallback_groups": packed_stats["fallback_groups"],
+        "failed_groups": packed_stats["failed_groups"],
+        "in_order": all(result == group[0] for group, (result, error) in zip(groups, outcomes) if error is None),
+        # Les tokens des corrections de repli s'ajoutent à ceux de l'appel groupé
+        "prompt_tokens": packed_stats["prompt_tokens"] + usage["prompt_tokens"],
+        "completion_tokens": packed_stats["completion_tokens"] + usage["completion_tokens"]
+    })
+
+    server.shutdown()
+    print(json.dumps({"groups": args.groups, "latency": args.latency, "error_rate": args.error_rate, "runs": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Compare le regroupement des textes similaires à la comparaison difflib de toutes les paires.
+
+Génère des corpus synthétiques de légendes fr/en répétées sur plusieurs frames
+avec du bruit OCR (confusions de caractères, suppressions, insertions), pour
+plusieurs taux de bruit, puis mesure le temps de regroupement, la parité des
+groupes et le rappel des paires regroupées face à la comparaison de toutes les
+paires (calculée jusqu'à --max-pairwise textes, au-delà elle devient trop lente
+et son temps est extrapolé en n²). Le rappel de l'index MinHash/LSH seul (utilisé
+au-delà de EXACT_GROUPING_MAX textes distincts) est mesuré sur les mêmes corpus
+et sur --reels petits corpus de la taille d'une vidéo.
+
+    python easyocr/benchmarks/bench_grouping.py --sizes 100 1000 10000 100000 --noise 0.08 0.15 0.2 0.3
+"""
+import argparse
+import difflib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_grouping import group_similar_texts, EXACT_GROUPING_MAX
+
+WORDS = (
+    "quand tu vois ton pote arriver en retard au cours encore une fois le prof "
+    "moi à trois heures du matin devant le frigo personne ne comprend pourquoi "
+    "cette vidéo est incroyable regarde jusqu'à la fin mon chat qui décide que "
+    "la nuit est faite pour courir partout bonjour maison voiture travail école "
+    "élève manger dormir jouer écouter musique film série lundi vendredi soirée "
+    "café pizza cuisine salon chambre téléphone ordinateur abonne partage commentaire "
+    "rire pleurer maman papa frère soeur devoirs examen demain jamais toujours "
+    "when you finally understand the joke nobody asked for this my face when "
+    "the weekend starts tomorrow monday again every time your friend says trust me "
+    "pov me trying to explain why dog running around house at night morning "
+    "coffee before work after school gym motivation diet start teacher homework"
+).split()
+
+# Confusions typiques d'EasyOCR sur les légendes de memes
+CONFUSIONS = {"o": "0", "l": "1", "i": "l", "e": "é", "a": "à", "s": "5", "m": "rn", "u": "v", "t": "f", "c": "e"}
+
+
+def make_caption(rng):
+    """Légende aléatoire de 4 à 12 mots"""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+
+
+def add_ocr_noise(text, rng, rate):
+    """Applique des erreurs OCR caractère par caractère"""
+    chars = []
+    for char in text:
+        roll = rng.random()
+        if roll < rate * 0.5 and char.lower() in CONFUSIONS:
+            chars.append(CONFUSIONS[char.lower()])
+        elif roll < rate * 0.7:
+            continue
+        elif roll < rate * 0.85:
+            chars.append(char + rng.choice("., '"))
+        elif roll < rate:
+            chars.append(char.upper())
+        else:
+            chars.append(char)
+    return "".join(chars)
+
+
+def make_corpus(size, rng, frames_per_caption=6, noise_rate=0.12):
+    """Corpus de `size` textes : chaque légende apparaît sur plusieurs frames consécutives"""
+    texts = []
+    while len(texts) < size:
+        caption = make_caption(rng)
+        for _ in range(rng.randint(1, frames_per_caption * 2)):
+            texts.append(add_ocr_noise(caption, rng, noise_rate))
+    return texts[:size]
+
+
+def group_pairwise(texts, threshold):
+    """Regroupement d'origine : comparaison difflib de toutes les paires"""
+    groups = []
+    processed = [False] * len(texts)
+    for i in range(len(texts)):
+        if processed[i]:
+            continue
+        current_group = [texts[i]]
+        processed[i] = True
+        for j in range(i + 1, len(texts)):
+            if not processed[j] and difflib.SequenceMatcher(None, texts[i], texts[j]).ratio() >= threshold:
+                current_group.append(texts[j])
+                processed[j] = True
+        groups.append(current_group)
+    return groups
+
+
+def same_group_pairs(groups):
+    """Paires de textes distincts placés dans le même groupe"""
+    pairs = set()
+    for group in groups:
+        members = sorted(set(group))
+        pairs.update((a, b) for index, a in enumerate(members) for b in members[index + 1:])
+    return pairs
+
+
+def compare_groups(groups, expected):
+    """Parité et rappel d'un regroupement face à la comparaison de toutes les paires"""
+    expected_pairs = same_group_pairs(expected)
+    found_pairs = same_group_pairs(groups) & expected_pairs
+    return {
+        "identical_groups": groups == expected,
+        "pair_recall": round(len(found_pairs) / len(expected_pairs), 4) if expected_pairs else 1.0
+    }
+
+
+def compare_reels(reels, reel_size, threshold, noise, seed):
+    """Nombre de petits corpus (une vidéo chacun) dont les groupes diffèrent de la comparaison de toutes les paires,
+    avec la sélection automatique (exacte à cette taille) et avec l'index LSH forcé"""
+    rng = random.Random(seed)
+    differing = {"default": 0, "lsh": 0}
+    for _ in range(reels):
+        texts = make_corpus(reel_size, rng, noise_rate=noise)
+        expected = group_pairwise(texts, threshold)
+        differing["default"] += group_similar_texts(texts, threshold) != expected
+        differing["lsh"] += group_similar_texts(texts, threshold, exact_max=0) != expected
+    return {"reels": reels, "reel_size": reel_size,
+            "differing_reels": differing["default"], "differing_reels_lsh": differing["lsh"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du regroupement des textes similaires")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="Tailles de corpus testées")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Seuil de similarité")
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.08, 0.15, 0.20, 0.30],
+                        help="Taux de bruit OCR par caractère (un passage par valeur)")
+    parser.add_argument("--max-pairwise", type=int, default=3000, help="Taille maximale pour la comparaison de toutes les paires")
+    parser.add_argument("--reels", type=int, default=200, help="Nombre de petits corpus comparés par taux de bruit (0 = aucun)")
+    parser.add_argument("--reel-size", type=int, default=40, help="Nombre de textes par petit corpus")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur")
+    args = parser.parse_args()
+
+    results = []
+    for noise in args.noise:
+        report = []
+        measured = None
+        for size in args.sizes:
+            texts = make_corpus(size, random.Random(args.seed), noise_rate=noise)
+
+            start_time = time.time()
+            groups = group_similar_texts(texts, args.threshold)
+            run = {"noise": noise, "texts": size, "groups": len(groups), "grouping_time": round(time.time() - start_time, 3),
+                   "exact": len(set(texts)) <= EXACT_GROUPING_MAX}
+
+            if size <= args.max_pairwise:
+                start_time = time.time()
+                expected = group_pairwise(texts, args.threshold)
+                run["pairwise_time"] = round(time.time() - start_time, 3)
+                run["speedup"] = round(run["pairwise_time"] / max(run["grouping_time"], 1e-6), 1)
+                run["pairwise_groups"] = len(expected)
+                run.update(compare_groups(groups, expected))
+                # Même corpus avec l'index LSH forcé : rappel de la sélection approchée
+                lsh = compare_groups(group_similar_texts(texts, args.threshold, exact_max=0), expected)
+                run["lsh_identical_groups"] = lsh["identical_groups"]
+                run["lsh_pair_recall"] = lsh["pair_recall"]
+                measured = (size, run["pairwise_time"])
+            elif measured is not None:
+                run["pairwise_time_estimate"] = round(measured[1] * (size / measured[0]) ** 2, 1)
+                run["speedup_estimate"] = round(run["pairwise_time_estimate"] / max(run["grouping_time"], 1e-6), 1)
+            report.append(run)
+            print(json.dumps(run), file=sys.stderr)
+
+        result = {"noise": noise, "runs": report}
+        if args.reels:
+            result["reels"] = compare_reels(args.reels, args.reel_size, args.threshold, noise, args.seed)
+            print(json.dumps(result["reels"]), file=sys.stderr)
+        results.append(result)
+
+    print(json.dumps({"threshold": args.threshold, "exact_max": EXACT_GROUPING_MAX, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Suite de benchmarks du pipeline OCR sur des frames de memes synthétiques.
+
+Génère (ou relit, --dataset-dir) un jeu de frames étiquetées en fr/en à 720p
+et 1080p (voir synthetic_memes.py), puis exécute le pipeline du service pour
+chaque configuration : décodage PNG, prétraitement, cache OCR, détection et
+reconnaissance en lots (ocr_frames_batched), regroupement des textes. Chaque
+configuration tourne dans un processus séparé (CPU uniquement, sans réseau ni
+téléchargement de modèle) pour mesurer son pic de mémoire (RSS) isolément.
+
+Par défaut, chaque paramètre varie seul autour de la configuration du service
+sur CPU (scale_percent 30, canvas_size 1024, une frame par lot, reader
+quantifié, cache désactivé) ; --grid essaie toutes les combinaisons. Les
+frames sont lues --repeat fois : avec le cache, les passes suivantes sont
+servies par le cache. Rapporte en JSON, par configuration, le débit, les
+percentiles de latence de chaque étape, le pic de RSS et le taux d'erreur
+caractère (CER). --compare signale les écarts avec un rapport précédent,
+par exemple celui d'un autre commit :
+
+    python easyocr/benchmarks/bench_pipeline.py --frames 10 --output bench_main.json
+    python easyocr/benchmarks/bench_pipeline.py --frames 10 --compare bench_main.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from bench_preprocessing import edit_distance, normalize
+from synthetic_memes import generate, RESOLUTIONS
+
+BASELINE = {"scale_percent": 30, "canvas_size": 1024, "batch_size": 1, "quantize": True, "cache": False}
+STAGES = ("decode", "preprocess", "cache", "detect", "recognize", "group", "total")
+# Métriques comparées par --compare : nom, chemin dans le résultat, une hausse est-elle une régression
+COMPARED = [
+    ("throughput", ("throughput",), False),
+    ("total_p50", ("latency", "total", "p50"), True),
+    ("total_p95", ("latency", "total", "p95"), True),
+    ("peak_rss_mb", ("peak_rss_mb",), True),
+    ("cer", ("cer",), True)
+]
+
+
+def config_name(config):
+    return (f"scale{config['scale_percent']}_canvas{config['canvas_size']}_batch{config['batch_size']}"
+            f"_{'quantized' if config['quantize'] else 'float'}_{'cache' if config['cache'] else 'nocache'}")
+
+
+def build_configs(args):
+    """Configurations mesurées : un paramètre à la fois autour de BASELINE, ou toutes les combinaisons"""
+    axes = {
+        "scale_percent": args.scales,
+        "canvas_size": args.canvas_sizes,
+        "batch_size": args.batch_sizes,
+        "quantize": [True, False] if args.quantize == "both" else [args.quantize == "on"],
+        "cache": [False, True] if args.cache == "both" else [args.cache == "on"]
+    }
+    if args.grid:
+        return [dict(zip(axes, values)) for values in itertools.product(*axes.values())]
+    configs = []
+    for name, values in axes.items():
+        for value in values:
+            config = {**BASELINE, name: value}
+            if config not in configs:
+                configs.append(config)
+    return configs
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus (None sous Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentiles(values):
+    if not values:
+        return None
+    return {
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+        "mean": round(float(np.mean(values)), 4)
+    }
+
+
+def run_config(config, dataset_dir, repeat, threads, work_dir):
+    """Mesure une configuration dans le processus courant (appelé dans un processus dédié)"""
+    # Aucun cache ni fichier .env du service ne doit influencer la mesure
+    os.environ.update({"OCR_CACHE_ENABLED": "false", "CORRECTION_CACHE_PERSIST": "false",
+                       "EASYOCR_GPU_ENABLED": "false", "CUDA_VISIBLE_DEVICES": ""})
+    import easyocr
+    import torch
+    import service
+    from ocr_cache import OCRResultCache
+    from ocr_results import build_frame_result
+    from text_grouping import group_similar_texts
+
+    if threads:
+        torch.set_num_threads(threads)
+    with open(os.path.join(dataset_dir, "labels.json"), encoding="utf-8") as f:
+        labels = json.load(f)
+    # Frames gardées encodées : le décodage PNG fait partie de la mesure
+    frames = []
+    for name, text in sorted(labels.items()):
+        with open(os.path.join(dataset_dir, name), "rb") as f:
+            frames.append((f.read(), normalize(text)))
+
+    load_start = time.time()
+    reader = easyocr.Reader(service.READER_LANGS, gpu=False, quantize=config["quantize"], download_enabled=False)
+    load_time = time.time() - load_start
+    rss_after_load = peak_rss_mb()
+    # Premier passage (allocations, initialisation paresseuse de torch) hors mesure
+    warmup, _ = service.preprocess_image(cv2.imdecode(np.frombuffer(frames[0][0], np.uint8), cv2.IMREAD_COLOR),
+                                         config["scale_percent"])
+    service.ocr_frames_batched(reader, [warmup], batch_size=1, canvas_size=config["canvas_size"])
+
+    # Cache vide au départ : la première passe le remplit
+    cache = OCRResultCache(path=os.path.join(work_dir, "ocr_cache.db")) if config["cache"] else None
+
+    timings = {stage: [] for stage in STAGES}
+    passes = []
+    errors = 0
+    reference_chars = 0
+    batch_size = config["batch_size"]
+    for pass_index in range(repeat):
+        pass_start = time.time()
+        pass_hits = 0
+        texts = []
+        for start in range(0, len(frames), batch_size):
+            batch = frames[start:start + batch_size]
+            batch_start = time.time()
+
+            stage_start = time.time()
+            images = [cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) for data, _ in batch]
+            timings["decode"].append(time.time() - stage_start)
+
+            stage_start = time.time()
+            results = [None] * len(images)
+            keys = [None] * len(images)
+            if cache is not None:
+                for index, image in enumerate(images):
+                    keys[index] = service.get_cache_key(image, config["scale_percent"], config["canvas_size"])
+                    results[index] = cache.get(keys[index])
+            pending = [index for index, result in enumerate(results) if result is None]
+            pass_hits += len(images) - len(pending)
+            timings["cache"].append(time.time() - stage_start)
+
+            stage_start = time.time()
+            preprocessed = [service.preprocess_image(images[index], config["scale_percent"]) for index in pending]
+            timings["preprocess"].append(time.time() - stage_start)
+
+            detection_time = recognition_time = 0.0
+            if pending:
+                lines_per_image, detection_time, recognition_time = service.ocr_frames_batched(
+                    reader, [image for image, _ in preprocessed], batch_size=batch_size,
+                    canvas_size=config["canvas_size"]
+                )
+                for index, lines, (_, info) in zip(pending, lines_per_image, preprocessed):
+                    results[index] = build_frame_result(lines, info)
+                    if cache is not None:
+                        cache.put(keys[index], results[index])
+            timings["detect"].append(detection_time)
+            timings["recognize"].append(recognition_time)
+            timings["total"].append(time.time() - batch_start)
+
+            for result, (_, expected) in zip(results, batch):
+                texts.extend(result["texts"])
+                if pass_index == 0:
+                    errors += edit_distance(normalize(" ".join(result["texts"])), expected)
+                    reference_chars += len(expected)
+
+        stage_start = time.time()
+        groups = group_similar_texts(texts)
+        timings["group"].append(time.time() - stage_start)
+        pass_time = time.time() - pass_start
+        passes.append({"time": round(pass_time, 3), "throughput": round(len(frames) / pass_time, 3),
+                       "cache_hits": pass_hits, "groups": len(groups)})
+
+    ocr_time = sum(timings["total"])
+    return {
+        "name": config_name(config),
+        "config": config,
+        "frames": len(frames),
+        "repeat": repeat,
+        "threads": torch.get_num_threads(),
+        "reader_load_time": round(load_time, 3),
+        "throughput": round(len(frames) * repeat / ocr_time, 3),
+        "latency": {stage: percentiles(values) for stage, values in timings.items()},
+        "latency_per_frame": round(ocr_time / (len(frames) * repeat), 4),
+        "passes": passes,
+        "cache_hits": sum(entry["cache_hits"] for entry in passes),
+        "cer": round(errors / max(1, reference_chars), 4),
+        "rss_after_load_mb": rss_after_load,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def run_isolated(config, dataset_dir, repeat, threads):
+    """Lance la mesure d'une configuration dans un nouveau processus Python"""
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "result.json")
+        command = [sys.executable, os.path.abspath(__file__), "--run-config", json.dumps(config),
+                   "--dataset-dir", dataset_dir, "--repeat", str(repeat), "--result-file", result_path]
+        if threads:
+            command += ["--threads", str(threads)]
+        completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            return {"name": config_name(config), "config": config, "error": completed.stderr.strip()[-2000:]}
+        with open(result_path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def environment():
+    """Commit, versions et machine, pour comparer des rapports entre eux"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def lookup(result, path):
+    for key in path:
+        if not isinstance(result, dict) or result.get(key) is None:
+            return None
+        result = result[key]
+    return result
+
+
+def compare(report, previous, tolerance):
+    """Écarts relatifs avec un rapport précédent, configuration par configuration"""
+    previous_runs = {run["name"]: run for run in previous.get("runs", [])}
+    comparison = {"baseline_commit": previous.get("environment", {}).get("commit"), "tolerance": tolerance,
+                  # Mesures comparables seulement sur le même jeu de frames
+                  "same_dataset": previous.get("dataset") == report["dataset"],
+                  "regressions": [], "runs": {}}
+    for run in report["runs"]:
+        old = previous_runs.get(run["name"])
+        if old is None or "error" in run or "error" in old:
+            continue
+        deltas = {}
+        for metric, path, higher_is_worse in COMPARED:
+            before, after = lookup(old, path), lookup(run, path)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            deltas[metric] = {"before": before, "after": after, "change": round(change, 4)}
+            # Le CER se compare en points plutôt qu'en proportion de sa valeur
+            worse = after - before > 0.01 if metric == "cer" else (change if higher_is_worse else -change) > tolerance
+            if worse:
+                comparison["regressions"].append(f"{run['name']}: {metric} {before} -> {after}")
+        comparison["runs"][run["name"]] = deltas
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks du pipeline OCR (CPU, hors ligne)")
+    parser.add_argument("--dataset-dir", help="Frames étiquetées (labels.json) ; générées si absentes")
+    parser.add_argument("--frames", type=int, default=10, help="Frames synthétiques par résolution")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--seed", type=int, default=0, help="Graine des frames synthétiques")
+    parser.add_argument("--font", help="Police TrueType des légendes (par défaut : police grasse du système)")
+    parser.add_argument("--scales", nargs="+", type=int, default=[20, 30, 50], help="Valeurs de scale_percent")
+    parser.add_argument("--canvas-sizes", nargs="+", type=int, default=[640, 1024, 1536], help="Valeurs de canvas_size")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8],
+                        help="Frames par passe OCR (et taille des lots du reconnaisseur)")
+    parser.add_argument("--quantize", choices=["on", "off", "both"], default="both", help="Readers CPU quantifiés ou non")
+    parser.add_argument("--cache", choices=["on", "off", "both"], default="both", help="Cache OCR activé ou non")
+    parser.add_argument("--grid", action="store_true", help="Toutes les combinaisons au lieu d'un paramètre à la fois")
+    parser.add_argument("--repeat", type=int, default=2, help="Lectures du jeu de frames par configuration")
+    parser.add_argument("--threads", type=int, help="Threads PyTorch (par défaut : ceux de PyTorch)")
+    parser.add_argument("--output", help="Fichier JSON du rapport (par défaut : sortie standard)")
+    parser.add_argument("--compare", help="Rapport précédent à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Écart relatif signalé comme régression")
+    parser.add_argument("--run-config", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_config:
+        result = run_config(json.loads(args.run_config), args.dataset_dir, args.repeat, args.threads,
+                            os.path.dirname(os.path.abspath(args.result_file)))
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_dir = args.dataset_dir or tmp
+        if os.path.exists(os.path.join(dataset_dir, "labels.json")):
+            with open(os.path.join(dataset_dir, "labels.json"), encoding="utf-8") as f:
+                dataset = {"frames": len(json.load(f)), "path": os.path.abspath(dataset_dir)}
+        else:
+            dataset = generate(dataset_dir, args.frames, args.resolutions, args.seed, args.font)
+
+        report = {"environment": environment(), "dataset": dataset, "baseline": BASELINE, "runs": []}
+        for config in build_configs(args):
+            print(f"Mesure de {config_name(config)}...", file=sys.stderr)
+            report["runs"].append(run_isolated(config, dataset_dir, args.repeat, args.threads))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Compare le prétraitement adaptatif (bandes de texte) à la réduction fixe à 30%.
+
+Utilise un jeu de frames étiquetées (--frames-dir contenant labels.json, un
+objet {"nom_de_fichier.png": "texte attendu"}) ou génère des frames de reels
+synthétiques 1080x1920 : légendes de tailles variées en haut et en bas, image
+texturée au milieu. Pour chaque mode, mesure le temps de prétraitement, le
+temps OCR (readtext avec les paramètres du service), le nombre de pixels
+envoyés au détecteur et le taux d'erreur caractère (CER) face aux étiquettes.
+
+    python easyocr/benchmarks/bench_preprocessing.py --frames 20
+    python easyocr/benchmarks/bench_preprocessing.py --frames-dir ./frames_etiquetees
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import easyocr
+import numpy as np
+
+from adaptive_preprocessing import preprocess_frame
+
+# Paramètres OCR identiques à service.py
+OCR_PARAMS = {
+    'min_size': 10,
+    'contrast_ths': 0.3,
+    'adjust_contrast': 0.5,
+    'text_threshold': 0.6,
+    'link_threshold': 0.3,
+    'width_ths': 0.5,
+    'low_text': 0.3,
+}
+
+CAPTIONS = [
+    "QUAND TU VOIS TON POTE", "ARRIVER EN RETARD", "MOI A 3H DU MATIN", "DEVANT LE FRIGO",
+    "PERSONNE NE COMPREND", "POURQUOI", "MY FACE WHEN", "THE WEEKEND STARTS TOMORROW",
+    "POV: TU EXPLIQUES LA BLAGUE", "MON CHAT A MINUIT", "LUNDI MATIN", "ENCORE UNE FOIS"
+]
+
+
+def make_frame(rng):
+    """Frame de reel synthétique et son texte attendu (lignes de haut en bas)"""
+    image = np.full((1920, 1080, 3), 255, dtype=np.uint8)
+    photo = rng.integers(0, 255, (1100, 1080, 3), dtype=np.uint8)
+    image[400:1500] = cv2.GaussianBlur(photo, (41, 41), 0)
+
+    lines = []
+    y = 120
+    for _ in range(rng.integers(1, 3)):
+        caption = CAPTIONS[rng.integers(len(CAPTIONS))]
+        scale = float(rng.uniform(0.9, 1.8))
+        cv2.putText(image, caption, (40, y), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), max(2, int(scale * 2.5)))
+        lines.append(caption)
+        y += int(60 * scale) + 20
+    if rng.random() < 0.6:
+        caption = CAPTIONS[rng.integers(len(CAPTIONS))]
+        scale = float(rng.uniform(0.7, 1.2))
+        cv2.putText(image, caption, (60, 1720), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), max(2, int(scale * 2.5)))
+        lines.append(caption)
+    return image, " ".join(lines)
+
+
+def load_frames(frames_dir, count, seed):
+    """Frames étiquetées du dossier donné, ou frames synthétiques"""
+    if frames_dir:
+        with open(os.path.join(frames_dir, "labels.json"), encoding="utf-8") as f:
+            labels = json.load(f)
+        return [(cv2.imread(os.path.join(frames_dir, name)), text) for name, text in sorted(labels.items())]
+    rng = np.random.default_rng(seed)
+    return [make_frame(rng) for _ in range(count)]
+
+
+def edit_distance(a, b):
+    """Distance de Levenshtein entre deux chaînes"""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def normalize(text):
+    """Majuscules et espaces simples pour comparer au texte attendu"""
+    return " ".join(text.upper().split())
+
+
+def run(reader, frames, mode, scale_percent):
+    """Prétraite et lit toutes les frames dans un mode donné"""
+    preprocess_time = 0.0
+    ocr_time = 0.0
+    pixels = 0
+    errors = 0
+    reference_chars = 0
+    for image, expected in frames:
+        start_time = time.time()
+        processed, info = preprocess_frame(image, scale_percent, mode)
+        preprocess_time += time.time() - start_time
+        pixels += info["pixels"]
+
+        start_time = time.time()
+        texts = reader.readtext(processed, detail=0, paragraph=True, batch_size=1, canvas_size=1024, **OCR_PARAMS)
+        ocr_time += time.time() - start_time
+
+        expected = normalize(expected)
+        errors += edit_distance(normalize(" ".join(texts)), expected)
+        reference_chars += len(expected)
+    return {
+        "mode": mode,
+        "preprocessing_time": round(preprocess_time, 3),
+        "ocr_time": round(ocr_time, 3),
+        "average_ocr_time": round(ocr_time / len(frames), 3),
+        "pixels": pixels,
+        "cer": round(errors / max(1, reference_chars), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du prétraitement adaptatif")
+    parser.add_argument("--frames-dir", help="Dossier de frames étiquetées (labels.json)")
+    parser.add_argument("--frames", type=int, default=20, help="Nombre de frames synthétiques")
+    parser.add_argument("--scale", type=int, default=30, help="Redimensionnement fixe (et minimal en mode adaptatif)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des frames synthétiques")
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_dir, args.frames, args.seed)
+    reader = easyocr.Reader(['fr', 'en'], gpu=False, quantize=True, download_enabled=False)
+
+    report = [run(reader, frames, mode, args.scale) for mode in ("fixed", "adaptive")]
+    print(json.dumps({"frames": len(frames), "scale_percent": args.scale, "runs": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
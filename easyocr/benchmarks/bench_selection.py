@@ -0,0 +1,107 @@
+"""Compare la sélection des frames par contenu à la sélection uniforme d'index.py.
+
+Génère un reel synthétique d'une frame par seconde dont les légendes durent de
+1 à 8 secondes (certaines très brèves), sur un fond tantôt fixe, tantôt animé,
+ou utilise --frames-dir contenant labels.json ({"frame.png": "légende"}).
+Pour chaque limite --max-images, rapporte le nombre de frames envoyées à l'OCR,
+le rappel des légendes distinctes (légendes présentes sur au moins une frame
+choisie / légendes de la vidéo) et le temps de sélection. Aucun modèle OCR
+n'est nécessaire : le rappel est mesuré sur les étiquettes.
+
+    python easyocr/benchmarks/bench_selection.py --frames 90 --max-images 10 20 40
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from frame_selection import select_frame_paths
+
+CAPTIONS = [
+    "QUAND TU VOIS TON POTE", "ARRIVER EN RETARD", "MOI A 3H DU MATIN", "DEVANT LE FRIGO",
+    "PERSONNE NE COMPREND", "POURQUOI", "MY FACE WHEN", "THE WEEKEND STARTS TOMORROW",
+    "POV: TU EXPLIQUES LA BLAGUE", "MON CHAT A MINUIT", "LUNDI MATIN", "ENCORE UNE FOIS"
+]
+
+
+def make_frames(frames_dir, count, seed):
+    """Frames synthétiques étiquetées ; retourne {nom de fichier: légende}"""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (2400, 720, 3), dtype=np.uint8), (41, 41), 0)
+    labels = {}
+    frame = 0
+    caption_index = 0
+    while frame < count:
+        caption = CAPTIONS[caption_index % len(CAPTIONS)] + (f" {caption_index // len(CAPTIONS)}" if caption_index >= len(CAPTIONS) else "")
+        duration = int(rng.choice([1, 2, 3, 5, 8]))
+        animated = rng.random() < 0.5
+        for _ in range(min(duration, count - frame)):
+            offset = (frame * 37) % 1100 if animated else 0
+            image = np.full((1280, 720, 3), 255, dtype=np.uint8)
+            image[250:1250] = background[offset:offset + 1000]
+            cv2.putText(image, caption, (20, 140), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 3)
+            name = f"frame_{frame:04d}.png"
+            cv2.imwrite(os.path.join(frames_dir, name), image)
+            labels[name] = caption
+            frame += 1
+        caption_index += 1
+    return labels
+
+
+def evaluate(paths, labels, max_images, mode):
+    """Frames choisies, rappel des légendes distinctes et temps de sélection"""
+    selected, stats = select_frame_paths(paths, max_images, mode=mode)
+    captions = set(labels.values())
+    covered = {labels[os.path.basename(path)] for path in selected}
+    return {
+        "mode": mode,
+        "frames_selected": len(selected),
+        "caption_recall": round(len(covered & captions) / len(captions), 3),
+        "selection_time": round(stats["selection_time"], 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sélection des frames")
+    parser.add_argument("--frames-dir", help="Dossier de frames étiquetées (labels.json)")
+    parser.add_argument("--frames", type=int, default=90, help="Nombre de frames synthétiques (1 par seconde)")
+    parser.add_argument("--max-images", type=int, nargs="+", default=[10, 20, 40], help="Limites à comparer")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des frames synthétiques")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        frames_dir = args.frames_dir
+        if frames_dir:
+            with open(os.path.join(frames_dir, "labels.json"), encoding="utf-8") as f:
+                labels = json.load(f)
+        else:
+            frames_dir = root
+            labels = make_frames(frames_dir, args.frames, args.seed)
+        paths = [os.path.join(frames_dir, name) for name in sorted(labels)]
+
+        runs = []
+        for max_images in args.max_images:
+            uniform = evaluate(paths, labels, max_images, "uniform")
+            content = evaluate(paths, labels, max_images, "content")
+            runs.append({
+                "max_images": max_images,
+                "uniform": uniform,
+                "content": content,
+                "ocr_calls_saved": uniform["frames_selected"] - content["frames_selected"]
+            })
+
+    print(json.dumps({
+        "frames": len(paths),
+        "captions": len(set(labels.values())),
+        "runs": runs
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Mesure le temps de démarrage du service EasyOCR selon le mode de préchauffage.
+
+Lance service.py dans un sous-processus pour chaque mode (eager : modèles
+chargés avant d'ouvrir le port, background : chargement dans un thread,
+lazy : chargement à la première requête), puis mesure le délai jusqu'à la
+première réponse de /health et jusqu'au premier OCR réussi sur /process
+(cache et dédoublonnage désactivés). Les temps de chargement rapportés par
+/ready sont inclus dans le résultat.
+
+    python easyocr/benchmarks/bench_startup.py --modes eager background lazy
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import cv2
+import numpy as np
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_frame():
+    """Frame synthétique avec une légende de meme, encodée en PNG"""
+    image = np.full((720, 1280, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "QUAND TU VOIS TON POTE", (80, 150), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 6)
+    cv2.putText(image, "ARRIVER EN RETARD", (160, 600), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (0, 0, 0), 6)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def request(url, data=None, timeout=300):
+    """Envoie une requête et retourne (statut, corps JSON), statut None si le port est fermé"""
+    headers = {"Content-Type": "application/octet-stream"} if data is not None else {}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers), timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+    except (urllib.error.URLError, ConnectionError):
+        return None, None
+
+
+def measure(mode, port, frame, timeout):
+    """Démarre le service dans un mode donné et mesure ses premiers temps de réponse"""
+    base_url = f"http://127.0.0.1:{port}"
+    start_time = time.time()
+    process = subprocess.Popen(
+        [sys.executable, "service.py", "--port", str(port), "--warmup", mode],
+        cwd=SERVICE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health_time = None
+        while health_time is None and time.time() - start_time < timeout:
+            status, _ = request(f"{base_url}/health", timeout=5)
+            if status == 200:
+                health_time = time.time() - start_time
+            else:
+                time.sleep(0.05)
+
+        ocr_time = None
+        texts = None
+        while ocr_time is None and time.time() - start_time < timeout:
+            status, body = request(f"{base_url}/process?use_cache=false&dedup=false&use_gpu=false", data=frame)
+            if status == 200:
+                ocr_time = time.time() - start_time
+                texts = body["texts"]
+            elif status == 503:
+                time.sleep(float(body.get("retry_after", 1)))
+            else:
+                time.sleep(0.05)
+
+        _, ready = request(f"{base_url}/ready", timeout=5)
+        return {
+            "mode": mode,
+            "time_to_health": round(health_time, 3) if health_time is not None else None,
+            "time_to_first_ocr": round(ocr_time, 3) if ocr_time is not None else None,
+            "texts": texts,
+            "ready": ready
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage du service EasyOCR")
+    parser.add_argument("--modes", nargs="+", choices=["eager", "background", "lazy"],
+                        default=["eager", "background", "lazy"], help="Modes de préchauffage testés")
+    parser.add_argument("--port", type=int, default=5099, help="Port utilisé par le service testé")
+    parser.add_argument("--timeout", type=float, default=300, help="Attente maximale par mode (secondes)")
+    args = parser.parse_args()
+
+    frame = make_frame()
+    report = [measure(mode, args.port, frame, args.timeout) for mode in args.modes]
+    print(json.dumps({"runs": report}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
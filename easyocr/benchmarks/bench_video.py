@@ -0,0 +1,126 @@
+"""Compare l'extraction des frames sur disque à l'échantillonnage direct de la vidéo.
+
+Génère une vidéo synthétique de reel (légendes qui changent toutes les
+quelques secondes sur un fond animé) ou utilise --video, puis mesure :
+
+- le flux actuel : extraction d'une frame par intervalle en images sur le disque
+  (ffmpeg comme server.js s'il est disponible, sinon cv2.imwrite), puis relecture
+  et décodage de chaque image comme le font index.py et le service ;
+- le flux direct : VideoFrameSampler décode les mêmes frames en mémoire, avec
+  et sans détection des changements de plan.
+
+    python easyocr/benchmarks/bench_video.py --duration 30
+    python easyocr/benchmarks/bench_video.py --video downloads/reel_complete.mp4
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from video_frames import VideoFrameSampler
+
+CAPTIONS = ["QUAND TU VOIS TON POTE", "MOI A 3H DU MATIN", "PERSONNE NE COMPREND", "MY FACE WHEN"]
+
+
+def make_video(path, duration, fps=30, size=(720, 1280)):
+    """Vidéo synthétique : fond qui défile et légende changeant toutes les 5 secondes"""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height * 2, width, 3), dtype=np.uint8), (31, 31), 0)
+    for index in range(int(duration * fps)):
+        offset = (index * 4) % height
+        frame = background[offset:offset + height].copy()
+        frame[:200] = 255
+        caption = CAPTIONS[(index // (5 * fps)) % len(CAPTIONS)]
+        cv2.putText(frame, caption, (30, 120), cv2.FONT_HERSHEY_SIMPLEX, 1.3, (0, 0, 0), 3)
+        writer.write(frame)
+    writer.release()
+
+
+def extract_to_disk(video, output_dir, interval):
+    """Extraction des frames en JPEG comme server.js (ffmpeg), ou avec OpenCV à défaut"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        subprocess.run(
+            [ffmpeg, "-loglevel", "error", "-i", video, "-vf", f"fps=1/{interval}", "-q:v", "3",
+             "-pix_fmt", "yuv420p", "-threads", "4", os.path.join(output_dir, "frame-%03d.jpg")],
+            check=True
+        )
+        return "ffmpeg"
+    for index, (_, frame) in enumerate(VideoFrameSampler(video, interval=interval)):
+        cv2.imwrite(os.path.join(output_dir, f"frame-{index + 1:03d}.jpg"), frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return "opencv"
+
+
+def run_frames_dir(video, interval):
+    """Flux actuel : frames écrites sur le disque puis relues et décodées"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        start_time = time.time()
+        extractor = extract_to_disk(video, output_dir, interval)
+        extract_time = time.time() - start_time
+
+        names = sorted(os.listdir(output_dir))
+        bytes_written = sum(os.path.getsize(os.path.join(output_dir, name)) for name in names)
+        read_start = time.time()
+        frames = [cv2.imread(os.path.join(output_dir, name)) for name in names]
+        read_time = time.time() - read_start
+    return {
+        "extractor": extractor,
+        "frames": len(frames),
+        "extract_time": round(extract_time, 3),
+        "read_decode_time": round(read_time, 3),
+        "total_time": round(extract_time + read_time, 3),
+        "bytes_written": bytes_written
+    }
+
+
+def run_direct(video, interval, scene_change):
+    """Flux direct : frames décodées en mémoire par VideoFrameSampler"""
+    start_time = time.time()
+    sampler = VideoFrameSampler(video, interval=interval, scene_change=scene_change)
+    frames = list(sampler)
+    return {
+        "scene_change": scene_change,
+        "frames": len(frames),
+        "total_time": round(time.time() - start_time, 3),
+        **{key: value for key, value in sampler.stats().items() if key in ("frames_read", "scene_skipped")}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'entrée vidéo directe")
+    parser.add_argument("--video", help="Vidéo à utiliser (sinon vidéo synthétique)")
+    parser.add_argument("--duration", type=float, default=30, help="Durée de la vidéo synthétique (secondes)")
+    parser.add_argument("--interval", type=float, default=1.0, help="Secondes entre deux frames")
+    parser.add_argument("--runs", type=int, default=3, help="Répétitions (meilleur temps retenu)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        video = args.video
+        if not video:
+            video = os.path.join(root, "reel.mp4")
+            make_video(video, args.duration)
+
+        report = {
+            "video": args.video or "synthetique",
+            "interval": args.interval,
+            "frames_dir": min((run_frames_dir(video, args.interval) for _ in range(args.runs)),
+                              key=lambda run: run["total_time"]),
+            "direct": [min((run_direct(video, args.interval, scene_change) for _ in range(args.runs)),
+                           key=lambda run: run["total_time"]) for scene_change in (False, True)]
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
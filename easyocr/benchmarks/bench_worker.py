@@ -0,0 +1,122 @@
+"""Compare le lancement d'index.py par vidéo au worker OCR persistant (--serve).
+
+Génère plusieurs dossiers de frames synthétiques, puis les traite une fois en
+lançant un processus index.py par dossier (chaque job réimporte torch et
+recharge le modèle) et une fois avec un seul worker qui reçoit les jobs sur
+stdin. Les corrections passent par le serveur OpenAI factice et les caches
+sont désactivés pour que chaque job refasse l'OCR. Rapporte la latence de
+chaque job, avec et sans le chargement du modèle.
+
+    python easyocr/benchmarks/bench_worker.py --jobs 5 --frames 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from mock_openai_server import start_server
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAPTIONS = ["QUAND TU VOIS TON POTE", "MOI A 3H DU MATIN", "PERSONNE NE COMPREND", "MY FACE WHEN"]
+
+
+def make_frames_dir(root, index, frames):
+    """Dossier de frames d'une vidéo synthétique (une légende répétée sur plusieurs frames)"""
+    frames_dir = os.path.join(root, f"video_{index}", "frames")
+    os.makedirs(frames_dir)
+    for frame in range(frames):
+        image = np.full((720, 1280, 3), 40 + 10 * frame, dtype=np.uint8)
+        caption = CAPTIONS[(index + frame // 4) % len(CAPTIONS)]
+        cv2.putText(image, caption, (80, 150), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (255, 255, 255), 6)
+        cv2.imwrite(os.path.join(frames_dir, f"frame_{frame:03d}.png"), image)
+    return frames_dir
+
+
+def run_one_shot(frames_dirs, env):
+    """Un processus index.py par dossier : chaque job paie les imports et le chargement du modèle"""
+    latencies = []
+    for frames_dir in frames_dirs:
+        start_time = time.time()
+        subprocess.run(
+            [sys.executable, "index.py", frames_dir, "--gpu", "False", "--no-cache"],
+            cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+        )
+        latencies.append(round(time.time() - start_time, 3))
+    return latencies
+
+
+def run_worker(frames_dirs, env):
+    """Un seul worker persistant qui reçoit tous les jobs sur stdin"""
+    start_time = time.time()
+    worker = subprocess.Popen(
+        [sys.executable, "index.py", "--serve", "--gpu", "False"],
+        cwd=SERVICE_DIR, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True, encoding="utf-8"
+    )
+    ready = json.loads(worker.stdout.readline())
+    startup_time = time.time() - start_time
+
+    jobs = []
+    for index, frames_dir in enumerate(frames_dirs):
+        job_start = time.time()
+        worker.stdin.write(json.dumps({"id": index, "frames_dir": frames_dir, "gpu": False, "use_cache": False}) + "\n")
+        worker.stdin.flush()
+        response = json.loads(worker.stdout.readline())
+        jobs.append({
+            "latency": round(time.time() - job_start, 3),
+            "job_time": round(response["performance"]["job_time"], 3),
+            "model_load_time": round(response["performance"]["model_load_time"], 3),
+            "success": response["success"]
+        })
+    worker.stdin.close()
+    worker.wait()
+    return {"startup_time": round(startup_time, 3), "model_load_time": round(ready["model_load_time"], 3), "jobs": jobs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du worker OCR persistant")
+    parser.add_argument("--jobs", type=int, default=5, help="Nombre de vidéos (dossiers de frames) traitées")
+    parser.add_argument("--frames", type=int, default=8, help="Frames par vidéo")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence simulée des appels ChatGPT (secondes)")
+    parser.add_argument("--port", type=int, default=8022, help="Port du serveur OpenAI factice")
+    args = parser.parse_args()
+
+    server = start_server(port=args.port, latency=args.latency, error_rate=0.0)
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "test",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.port}/v1",
+        "OCR_CACHE_ENABLED": "false",
+        "CORRECTION_CACHE_PERSIST": "false",
+        "KMP_DUPLICATE_LIB_OK": "TRUE"
+    }
+
+    with tempfile.TemporaryDirectory() as root:
+        frames_dirs = [make_frames_dir(root, index, args.frames) for index in range(args.jobs)]
+        one_shot = run_one_shot(frames_dirs, env)
+        worker = run_worker(frames_dirs, env)
+
+    server.shutdown()
+    warm_jobs = [job["latency"] for job in worker["jobs"] if job["model_load_time"] == 0]
+    print(json.dumps({
+        "jobs": args.jobs,
+        "frames_per_job": args.frames,
+        "one_shot": {
+            "latencies": one_shot,
+            "average_latency": round(sum(one_shot) / len(one_shot), 3)
+        },
+        "worker": {
+            **worker,
+            "average_latency_without_model_load": round(sum(warm_jobs) / len(warm_jobs), 3) if warm_jobs else None
+        }
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
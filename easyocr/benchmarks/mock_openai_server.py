@@ -0,0 +1,131 @@
+"""Serveur local compatible avec l'API OpenAI (chat completions) pour les tests hors ligne.
+
+Le serveur renvoie la première variante du message utilisateur comme "correction"
+(un objet JSON par groupe pour les prompts groupés),
+après une latence configurable, et peut injecter des erreurs 429/500 pour tester
+les reprises. Utilisation :
+
+    python easyocr/benchmarks/mock_openai_server.py --port 8001 --latency 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=test python easyocr/service.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+stats = {"requests": 0, "completions": 0, "errors": 0}
+stats_lock = threading.Lock()
+
+
+def build_answer(content):
+    """Construit la réponse à partir du message utilisateur.
+
+    Un prompt groupé ("Groupe N:" par groupe) reçoit un objet JSON contenant
+    la première variante de chaque groupe.
+    """
+    blocks = re.split(r"(?:^|\n\n)Groupe (\d+):\n", content)
+    if len(blocks) > 1:
+        answers = {number: text.split("\n---\n")[0] for number, text in zip(blocks[1::2], blocks[2::2])}
+        return json.dumps(answers, ensure_ascii=False)
+    return content.split("\n---\n")[0]
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with stats_lock:
+                self.send_json(200, dict(stats))
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with stats_lock:
+            stats["requests"] += 1
+
+        time.sleep(self.latency)
+
+        if random.random() < self.error_rate:
+            with stats_lock:
+                stats["errors"] += 1
+            status = random.choice([429, 500])
+            self.send_json(status, {"error": {"message": "erreur simulée", "type": "mock"}},
+                           headers={"Retry-After": "0"} if status == 429 else None)
+            return
+
+        messages = request.get("messages", [])
+        user_content = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        answer = build_answer(user_content)
+
+        with stats_lock:
+            stats["completions"] += 1
+        self.send_json(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(answer) // 4,
+                "total_tokens": (prompt_chars + len(answer)) // 4
+            }
+        })
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    # Des centaines d'appels simultanés pendant les tests de charge
+    request_queue_size = 512
+    daemon_threads = True
+
+
+def start_server(host="127.0.0.1", port=8001, latency=0.0, error_rate=0.0):
+    """Démarre le serveur dans un thread et le retourne"""
+    MockOpenAIHandler.latency = latency
+    MockOpenAIHandler.error_rate = error_rate
+    server = MockOpenAIServer((host, port), MockOpenAIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur OpenAI factice pour les tests hors ligne")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=8001, help="Port d'écoute")
+    parser.add_argument("--latency", type=float, default=0.5, help="Latence simulée par appel (secondes)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion d'erreurs 429/500 simulées")
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.latency, args.error_rate)
+    print(f"Serveur OpenAI factice sur http://{args.host}:{args.port}/v1")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,215 @@
+"""Frames de memes synthétiques et reproductibles, avec leur texte attendu.
+
+Chaque frame reproduit une mise en page courante des reels : légende noire
+sur un bandeau blanc au-dessus de l'image, ou texte blanc cerné de noir
+directement sur l'image, en haut et parfois en bas. Les légendes sont en
+français (accents compris) ou en anglais ; le fond varie (couleur unie,
+dégradé, « photo » floue, rayures). Une même graine donne toujours les mêmes
+frames pour une police donnée.
+
+Le texte est rendu avec une police TrueType (--font, ou une police grasse
+courante du système) ; sans police disponible, avec les polices Hershey
+d'OpenCV, accents retirés du texte attendu.
+
+    python easyocr/benchmarks/synthetic_memes.py --output ./frames_synthetiques --frames 40
+
+Le dossier produit contient les frames PNG et labels.json ({"nom.png": "texte
+attendu"}), le format lu par bench_preprocessing.py et bench_pipeline.py.
+"""
+import argparse
+import json
+import os
+import unicodedata
+
+import cv2
+import numpy as np
+
+CAPTIONS = {
+    "fr": [
+        "QUAND TU VOIS TON POTE ARRIVER EN RETARD", "MOI À 3H DU MATIN DEVANT LE FRIGO",
+        "PERSONNE NE COMPREND POURQUOI", "ÇA VA PAS LA TÊTE", "LUNDI MATIN ENCORE UNE FOIS",
+        "POV : TU EXPLIQUES LA BLAGUE", "MON CHAT À MINUIT", "LES ÉLÈVES APRÈS LE BAC",
+        "Quand la prof dit que c'est facile", "Mes économies après les soldes",
+        "JE SUIS PAS EN RETARD", "C'EST LA FÊTE AU BUREAU"
+    ],
+    "en": [
+        "MY FACE WHEN THE WEEKEND STARTS", "WHEN YOUR MOM SAYS NO", "NOBODY: ME AT 3AM",
+        "ME EXPLAINING THE MEME", "THIS IS FINE", "WHEN THE WIFI GOES DOWN",
+        "Me pretending to understand", "My bank account after the weekend",
+        "WAIT FOR IT", "HOW IT STARTED VS HOW IT'S GOING"
+    ]
+}
+
+RESOLUTIONS = {"720p": (720, 1280), "1080p": (1080, 1920)}
+
+# Polices grasses courantes (Windows, macOS, Linux), essayées dans l'ordre
+FONT_CANDIDATES = [
+    "C:/Windows/Fonts/impact.ttf", "C:/Windows/Fonts/arialbd.ttf",
+    "/Library/Fonts/Arial Bold.ttf", "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"
+]
+
+
+def find_font(path=None):
+    """Police TrueType à utiliser, ou None pour les polices Hershey d'OpenCV"""
+    for candidate in ([path] if path else FONT_CANDIDATES):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    if path:
+        raise FileNotFoundError(f"Police introuvable: {path}")
+    return None
+
+
+def strip_accents(text):
+    """Texte sans accents, seul rendu possible avec les polices Hershey"""
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+
+def make_background(rng, width, height):
+    """Fond d'image varié : couleur unie, dégradé, photo floue ou rayures"""
+    kind = rng.integers(4)
+    if kind == 0:
+        return np.full((height, width, 3), rng.integers(0, 256, 3), dtype=np.uint8)
+    if kind == 1:
+        start, end = rng.integers(0, 256, 3), rng.integers(0, 256, 3)
+        ramp = np.linspace(0.0, 1.0, height)[:, None, None]
+        column = (start * (1 - ramp) + end * ramp).astype(np.uint8)
+        return np.repeat(column, width, axis=1)
+    if kind == 2:
+        small = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+        return cv2.GaussianBlur(cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC), (31, 31), 0)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    period = int(rng.integers(20, 80))
+    colors = rng.integers(0, 256, (2, 3))
+    for y in range(0, height, period):
+        image[y:y + period] = colors[(y // period) % 2]
+    return image
+
+
+class CaptionRenderer:
+    """Écrit des légendes centrées, coupées en lignes à la largeur de l'image"""
+
+    def __init__(self, font_path=None):
+        self.font_path = font_path
+        self.fonts = {}
+
+    def font(self, size):
+        from PIL import ImageFont
+        if size not in self.fonts:
+            self.fonts[size] = ImageFont.truetype(self.font_path, size)
+        return self.fonts[size]
+
+    def text_width(self, text, size):
+        if self.font_path:
+            left, _, right, _ = self.font(size).getbbox(text)
+            return right - left
+        return cv2.getTextSize(text, cv2.FONT_HERSHEY_DUPLEX, size / 30, max(1, size // 12))[0][0]
+
+    def wrap(self, text, size, max_width):
+        """Coupe la légende en lignes qui tiennent dans `max_width` pixels"""
+        lines = []
+        for word in text.split():
+            if lines and self.text_width(f"{lines[-1]} {word}", size) <= max_width:
+                lines[-1] = f"{lines[-1]} {word}"
+            else:
+                lines.append(word)
+        return lines
+
+    def draw(self, image, text, top, size, color, outline=None):
+        """Écrit la légende à partir de `top` ; retourne le texte rendu et la hauteur occupée"""
+        if not self.font_path:
+            text = strip_accents(text)
+        width = image.shape[1]
+        lines = self.wrap(text, size, int(width * 0.9))
+        line_height = int(size * 1.25)
+        if self.font_path:
+            from PIL import Image, ImageDraw
+            canvas = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+            draw = ImageDraw.Draw(canvas)
+            for index, line in enumerate(lines):
+                x = (width - self.text_width(line, size)) // 2
+                draw.text((x, top + index * line_height), line, font=self.font(size), fill=color[::-1],
+                          stroke_width=max(2, size // 12) if outline else 0,
+                          stroke_fill=outline[::-1] if outline else None)
+            image[:] = cv2.cvtColor(np.asarray(canvas), cv2.COLOR_RGB2BGR)
+        else:
+            scale, thickness = size / 30, max(1, size // 12)
+            for index, line in enumerate(lines):
+                x = (width - self.text_width(line, size)) // 2
+                y = top + index * line_height + size
+                if outline:
+                    cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_DUPLEX, scale, outline, thickness * 3, cv2.LINE_AA)
+                cv2.putText(image, line, (x, y), cv2.FONT_HERSHEY_DUPLEX, scale, color, thickness, cv2.LINE_AA)
+        return " ".join(lines), len(lines) * line_height
+
+
+def make_meme(rng, renderer, resolution="1080p"):
+    """Frame de meme synthétique, sa langue et son texte attendu (légendes de haut en bas)"""
+    width, height = RESOLUTIONS[resolution]
+    language = "fr" if rng.random() < 0.5 else "en"
+    captions = CAPTIONS[language]
+    size = int(width * rng.uniform(0.045, 0.07))
+    image = make_background(rng, width, height)
+    texts = []
+
+    if rng.random() < 0.5:
+        # Légende noire sur un bandeau blanc au-dessus de l'image
+        caption = captions[rng.integers(len(captions))]
+        lines = renderer.wrap(caption if renderer.font_path else strip_accents(caption), size, int(width * 0.9))
+        band = int(len(lines) * size * 1.25 + size)
+        image[:int(height * 0.12) + band] = 255
+        text, _ = renderer.draw(image, caption, int(height * 0.12) + size // 2, size, (0, 0, 0))
+        texts.append(text)
+    else:
+        # Texte blanc cerné de noir sur l'image
+        caption = captions[rng.integers(len(captions))]
+        text, _ = renderer.draw(image, caption, int(height * 0.1), size, (255, 255, 255), outline=(0, 0, 0))
+        texts.append(text)
+
+    if rng.random() < 0.4:
+        caption = captions[rng.integers(len(captions))]
+        text, _ = renderer.draw(image, caption, int(height * 0.8), int(size * 0.8), (255, 255, 255), outline=(0, 0, 0))
+        texts.append(text)
+    return image, language, " ".join(texts)
+
+
+def generate(output_dir, count, resolutions=("720p", "1080p"), seed=0, font=None):
+    """Écrit `count` frames par résolution et labels.json ; retourne la description du jeu de frames"""
+    font_path = find_font(font)
+    renderer = CaptionRenderer(font_path)
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    labels = {}
+    languages = {"fr": 0, "en": 0}
+    for resolution in resolutions:
+        for index in range(count):
+            image, language, text = make_meme(rng, renderer, resolution)
+            name = f"meme_{resolution}_{index:04d}.png"
+            cv2.imwrite(os.path.join(output_dir, name), image)
+            labels[name] = text
+            languages[language] += 1
+    with open(os.path.join(output_dir, "labels.json"), "w", encoding="utf-8") as f:
+        json.dump(labels, f, ensure_ascii=False, indent=2)
+    return {
+        "frames": len(labels),
+        "resolutions": list(resolutions),
+        "languages": languages,
+        "seed": seed,
+        "font": os.path.basename(font_path) if font_path else "hershey"
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des frames de memes synthétiques étiquetées")
+    parser.add_argument("--output", required=True, help="Dossier des frames et de labels.json")
+    parser.add_argument("--frames", type=int, default=20, help="Frames par résolution")
+    parser.add_argument("--resolutions", nargs="+", default=["720p", "1080p"], choices=list(RESOLUTIONS))
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur")
+    parser.add_argument("--font", help="Police TrueType (par défaut : police grasse du système)")
+    args = parser.parse_args()
+    print(json.dumps(generate(args.output, args.frames, args.resolutions, args.seed, args.font), indent=2))
+
+
+if __name__ == "__main__":
+    main()
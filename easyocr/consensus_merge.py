@@ -0,0 +1,107 @@
+import difflib
+import time
+from collections import defaultdict
+
+
+def normalize_variant(text):
+    """Espaces superflus retirés, retours à la ligne conservés"""
+    return "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+
+
+def align_to_center(center, variant):
+    """Aligne une version sur la version centrale, caractère par caractère.
+
+    Retourne, pour chaque caractère de `center`, le caractère aligné de
+    `variant` ("" s'il est absent) et, pour chaque intervalle avant un
+    caractère de `center` (plus l'intervalle final), le texte inséré par
+    `variant` à cet endroit.
+    """
+    aligned = [""] * len(center)
+    inserted = [""] * (len(center) + 1)
+    matcher = difflib.SequenceMatcher(None, center, variant, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(i2 - i1):
+                aligned[i1 + offset] = variant[j1 + offset]
+        elif tag == "replace":
+            # Substitutions caractère par caractère, le surplus devient insertion ou suppression
+            common = min(i2 - i1, j2 - j1)
+            for offset in range(common):
+                aligned[i1 + offset] = variant[j1 + offset]
+            if j2 - j1 > common:
+                inserted[i1 + common] += variant[j1 + common:j2]
+        elif tag == "insert":
+            inserted[i1] += variant[j1:j2]
+        # "delete" : caractères du centre absents de la version
+    return aligned, inserted
+
+
+def merge_texts(texts, weights=None):
+    """Fusionne plusieurs lectures OCR d'un même texte par vote caractère par caractère.
+
+    Alignement multiple en étoile : la version la plus proche de toutes les
+    autres (pondérée par `weights`, par exemple les confiances OCR) sert de
+    centre, chaque version est alignée sur elle, puis chaque position retient
+    le caractère (ou l'absence de caractère) ayant le plus de poids ; les
+    insertions entre deux positions sont votées de la même façon, une version
+    sans insertion votant pour la chaîne vide. À poids égal, le centre l'emporte.
+
+    Retourne le texte fusionné et les statistiques de la fusion.
+    """
+    start_time = time.time()
+    texts = texts if isinstance(texts, list) else [texts]
+    variants = [normalize_variant(text) for text in texts]
+    weights = [1.0 if weight is None else max(float(weight), 1e-3)
+               for weight in (weights if weights is not None else [None] * len(variants))]
+    pairs = [(variant, weight) for variant, weight in zip(variants, weights) if variant]
+    if not pairs:
+        return "", {"variants": len(texts), "center": None, "changed_positions": 0, "merge_time": 0.0}
+    if len(pairs) == 1:
+        return pairs[0][0], {"variants": len(texts), "center": 0, "changed_positions": 0,
+                             "merge_time": time.time() - start_time}
+
+    # Centre : version la plus semblable aux autres, pondérée par leur poids
+    similarity = defaultdict(float)
+    for i, (a, weight_a) in enumerate(pairs):
+        for j in range(i + 1, len(pairs)):
+            b, weight_b = pairs[j]
+            ratio = difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+            similarity[i] += weight_b * ratio
+            similarity[j] += weight_a * ratio
+    center_index = max(range(len(pairs)), key=lambda i: (similarity[i] + pairs[i][1], -i))
+    center, center_weight = pairs[center_index]
+
+    char_votes = [defaultdict(float) for _ in center]
+    insert_votes = [defaultdict(float) for _ in range(len(center) + 1)]
+    for index, (variant, weight) in enumerate(pairs):
+        if index == center_index:
+            aligned, inserted = list(center), [""] * (len(center) + 1)
+        else:
+            aligned, inserted = align_to_center(center, variant)
+        for position, char in enumerate(aligned):
+            char_votes[position][char] += weight
+        for position, text in enumerate(inserted):
+            insert_votes[position][text] += weight
+
+    def winner(votes, default):
+        # Le choix du centre départage les égalités
+        best = max(votes.values())
+        return default if votes.get(default, 0) == best else max(votes, key=votes.get)
+
+    merged = []
+    changed = 0
+    for position, char in enumerate(center):
+        insertion = winner(insert_votes[position], "")
+        chosen = winner(char_votes[position], char)
+        changed += (insertion != "") + (chosen != char)
+        merged.append(insertion + chosen)
+    insertion = winner(insert_votes[len(center)], "")
+    changed += insertion != ""
+    merged.append(insertion)
+
+    return normalize_variant("".join(merged)), {
+        "variants": len(texts),
+        "center": variants.index(center),
+        "changed_positions": changed,
+        "merge_time": time.time() - start_time
+    }
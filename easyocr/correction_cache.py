@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Emplacement par défaut : dossier cache/ à la racine du projet (server.js vide ocr/ à chaque traitement)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "correction_cache.sqlite")
+
+
+class _InFlightCall:
+    """Appel en cours partagé entre plusieurs requêtes identiques"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class CorrectionCache:
+    """Cache LRU avec durée de vie des corrections ChatGPT.
+
+    Les entrées sont indexées par une version normalisée des textes envoyés et
+    par le modèle utilisé. Deux requêtes identiques concurrentes partagent un
+    seul appel à l'API : la seconde attend le résultat de la première. Les
+    corrections peuvent aussi être persistées dans une base SQLite.
+    """
+
+    def __init__(self, max_entries=1024, ttl=86400, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_seconds = 0.0
+
+        self.connection = None
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS corrections ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, call_time REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.connection.commit()
+
+    @staticmethod
+    def make_key(texts, model):
+        """Clé normalisée : espaces superflus retirés, doublons et ordre ignorés"""
+        normalized = sorted({" ".join(text.split()) for text in texts})
+        payload = json.dumps([model, normalized], ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _lookup(self, key):
+        """Cherche une entrée valide en mémoire puis sur disque (verrou tenu)"""
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[2] > now:
+                self.entries.move_to_end(key)
+                return entry
+            del self.entries[key]
+
+        if self.connection is not None:
+            row = self.connection.execute(
+                "SELECT value, call_time, created_at FROM corrections WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[2] + self.ttl > now:
+                entry = (row[0], row[1], row[2] + self.ttl)
+                self._store(key, entry, persist=False)
+                return entry
+        return None
+
+    def _store(self, key, entry, persist=True):
+        """Enregistre une entrée et évince la moins récemment utilisée (verrou tenu)"""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+        if persist and self.connection is not None:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO corrections (key, value, call_time, created_at) VALUES (?, ?, ?, ?)",
+                (key, entry[0], entry[1], entry[2] - self.ttl)
+            )
+            self.connection.commit()
+
+    def get(self, key):
+        """Retourne (valeur, durée de l'appel d'origine) si la clé est en cache, sinon None (compté comme miss)"""
+        with self.lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += entry[1]
+            return entry[0], entry[1]
+
+    def put(self, key, value, call_time):
+        """Enregistre une correction obtenue en dehors de get_or_compute (le miss a été compté par get)"""
+        with self.lock:
+            self._store(key, (value, call_time, time.time() + self.ttl))
+
+    def get_or_compute(self, key, compute):
+        """Retourne la correction associée à la clé en appelant `compute` au besoin.
+
+        Retourne un triplet (valeur, source, secondes économisées) où la source
+        vaut "cache", "coalesced" (appel partagé avec une requête concurrente)
+        ou "upstream" (appel effectif à l'API).
+        """
+        with self.lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                self.saved_seconds += entry[1]
+                return entry[0], "cache", entry[1]
+
+            call = self.inflight.get(key)
+            owner = call is None
+            if owner:
+                call = _InFlightCall()
+                self.inflight[key] = call
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            # Le temps économisé correspond à la durée de l'appel évité
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            with self.lock:
+                self.saved_seconds += call.value[1]
+            return call.value[0], "coalesced", call.value[1]
+
+        try:
+            start_time = time.time()
+            value = compute()
+            call_time = time.time() - start_time
+            call.value = (value, call_time)
+            with self.lock:
+                self._store(key, (value, call_time, time.time() + self.ttl))
+            return value, "upstream", 0.0
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            call.done.set()
+
+    def record_coalesced(self, saved_seconds):
+        """Compte une requête servie par un appel partagé géré en dehors de get_or_compute"""
+        with self.lock:
+            self.coalesced += 1
+            self.saved_seconds += saved_seconds
+
+    def stats(self):
+        """Compteurs globaux du cache"""
+        with self.lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "persistent": self.connection is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds
+            }
+
+
+# Les groupes d'une même requête peuvent être corrigés en parallèle
+_request_stats_lock = threading.Lock()
+
+
+def new_request_stats():
+    """Compteurs de cache pour une seule requête"""
+    return {"hits": 0, "misses": 0, "coalesced": 0, "hit_rate": 0.0, "saved_seconds": 0.0}
+
+
+def record_lookup(stats, source, saved_seconds):
+    """Ajoute le résultat d'une recherche dans le cache aux compteurs d'une requête"""
+    if stats is None:
+        return
+    with _request_stats_lock:
+        if source == "cache":
+            stats["hits"] += 1
+        elif source == "coalesced":
+            stats["coalesced"] += 1
+        else:
+            stats["misses"] += 1
+        stats["saved_seconds"] += saved_seconds
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups
+
+
+def create_correction_cache_from_env():
+    """Crée le cache des corrections selon les variables d'environnement"""
+    persist = os.getenv('CORRECTION_CACHE_PERSIST', 'True').lower() == 'true'
+    return CorrectionCache(
+        max_entries=int(os.getenv('CORRECTION_CACHE_MAX_ENTRIES', '1024')),
+        ttl=float(os.getenv('CORRECTION_CACHE_TTL', '86400')),
+        path=os.getenv('CORRECTION_CACHE_PATH', DEFAULT_CACHE_PATH) if persist else None
+    )
@@ -0,0 +1,248 @@
+import difflib
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from consensus_merge import merge_texts
+
+# Configuration par défaut (surchargeable via .env)
+GATE_ENABLED = os.getenv('CORRECTION_GATE_ENABLED', 'True').lower() == 'true'
+# Confiance minimale du reconnaisseur pour se passer de ChatGPT
+GATE_MIN_CONFIDENCE = float(os.getenv('CORRECTION_GATE_MIN_CONFIDENCE', '0.8'))
+# Score orthographique minimal (proportion pondérée de mots plausibles)
+GATE_MIN_SPELL_SCORE = float(os.getenv('CORRECTION_GATE_MIN_SPELL_SCORE', '0.85'))
+# Similarité minimale entre la version retenue et les autres versions du groupe
+GATE_MIN_AGREEMENT = float(os.getenv('CORRECTION_GATE_MIN_AGREEMENT', '0.85'))
+# Durée estimée d'un appel ChatGPT tant qu'aucun appel n'a été mesuré (secondes)
+GATE_DEFAULT_CALL_TIME = float(os.getenv('CORRECTION_GATE_DEFAULT_CALL_TIME', '1.5'))
+# Listes de mots supplémentaires, un mot par ligne (chemins séparés par os.pathsep)
+LEXICON_PATHS = os.getenv('CORRECTION_LEXICON_PATHS', '')
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon_fr_en.txt")
+
+# Score maximal d'un mot absent du lexique (nom propre, argot), selon sa plausibilité
+UNKNOWN_WORD_SCORE = 0.8
+# Mot mêlant lettres et chiffres (0 lu O, 1 lu l...) hors unités courantes
+MIXED_WORD_SCORE = 0.2
+
+TOKEN_STRIP = ".,;:!?\"'«»()[]…-–—*"
+LETTERS = re.compile(r"^[^\W\d_]+(?:['’-][^\W\d_]+)*$")
+NUMBER = re.compile(r"^\d+(?:[.,:h]\d+)?(?:h|k|m|e|er|ère|eme|ème|st|nd|rd|th|am|pm|%|€|\$)?$", re.IGNORECASE)
+
+
+def normalize_text(text):
+    """Texte en minuscules, espaces superflus retirés"""
+    return " ".join(text.casefold().split())
+
+
+class Lexicon:
+    """Mots connus fr/en et modèle de bigrammes de caractères appris sur ces mots.
+
+    Un mot du lexique vaut 1 ; un mot inconnu est jugé par la probabilité
+    moyenne de ses bigrammes de caractères, comparée à celle des mots du
+    lexique : « kevin » reste plausible, « qvand » ou « tnuit » beaucoup moins.
+    """
+
+    def __init__(self, paths):
+        self.words = set()
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    word = line.strip().casefold()
+                    if word and not word.startswith("#"):
+                        self.words.add(word)
+
+        self.bigrams = Counter()
+        self.unigrams = Counter()
+        for word in self.words:
+            padded = f"^{word}$"
+            self.unigrams.update(padded[:-1])
+            self.bigrams.update(zip(padded, padded[1:]))
+        self.alphabet = len(set(self.unigrams) | {"$"})
+
+        # Référence : probabilité moyenne des bigrammes d'un mot peu probable du lexique
+        scores = sorted(self.log_probability(word) for word in self.words if len(word) > 2)
+        self.reference = scores[len(scores) // 10] if scores else 0.0
+
+    def log_probability(self, word):
+        """Log-probabilité moyenne des bigrammes de caractères du mot (lissage de Laplace)"""
+        padded = f"^{word}$"
+        total = 0.0
+        for a, b in zip(padded, padded[1:]):
+            total += math.log((self.bigrams[(a, b)] + 1) / (self.unigrams[a] + self.alphabet))
+        return total / (len(padded) - 1)
+
+    def word_score(self, token):
+        """Plausibilité d'un mot entre 0 et 1"""
+        word = token.casefold()
+        # Casse incohérente au milieu du mot (QuAnD) : erreur de lecture probable
+        penalty = 0.5 if token[1:] != token[1:].lower() and token[1:] != token[1:].upper() else 1.0
+        if word in self.words or NUMBER.match(word):
+            return penalty
+        if not LETTERS.match(word):
+            if any(char.isdigit() for char in word) and any(char.isalpha() for char in word):
+                return MIXED_WORD_SCORE
+            return 0.0
+        # Élisions et mots composés : chaque partie est jugée séparément (j'ai, peut-être)
+        parts = [part for part in re.split(r"['’-]", word) if part]
+        if len(parts) > 1:
+            return penalty * min(self.word_score(part) for part in parts)
+        plausibility = min(1.0, math.exp(self.log_probability(word) - self.reference))
+        return UNKNOWN_WORD_SCORE * plausibility * penalty
+
+    def spell_score(self, text):
+        """Score orthographique d'un texte : moyenne des mots pondérée par leur longueur"""
+        total = 0.0
+        length = 0
+        for token in text.split():
+            token = token.strip(TOKEN_STRIP)
+            if not token:
+                continue
+            total += len(token) * self.word_score(token)
+            length += len(token)
+        return total / length if length else 0.0
+
+
+def load_lexicon(extra_paths=LEXICON_PATHS):
+    """Lexique par défaut complété des listes de mots de CORRECTION_LEXICON_PATHS"""
+    paths = [DEFAULT_LEXICON_PATH] + [path for path in extra_paths.split(os.pathsep) if path]
+    return Lexicon(paths)
+
+
+def agreement_scores(texts):
+    """Similarité moyenne de chaque version avec les autres versions du groupe"""
+    normalized = [normalize_text(text) for text in texts]
+    if len(normalized) < 2:
+        return [1.0] * len(normalized)
+    scores = []
+    for i, text in enumerate(normalized):
+        ratios = [difflib.SequenceMatcher(None, text, other, autojunk=False).ratio()
+                  for j, other in enumerate(normalized) if j != i]
+        scores.append(sum(ratios) / len(ratios))
+    return scores
+
+
+class CorrectionGate:
+    """Décide si un groupe de textes OCR doit être corrigé par ChatGPT.
+
+    Trois signaux, calculés localement : la confiance du reconnaisseur, un
+    score orthographique fr/en (voir Lexicon) et l'accord entre les versions
+    d'un même groupe (plusieurs lectures de la même légende). Si la meilleure
+    version locale (une des lectures ou leur fusion, voir merge_texts) passe
+    les trois seuils, elle est retenue sans appel réseau.
+    Le temps économisé est estimé d'après la durée moyenne des appels mesurés.
+    """
+
+    def __init__(self, lexicon=None, min_confidence=GATE_MIN_CONFIDENCE, min_spell_score=GATE_MIN_SPELL_SCORE,
+                 min_agreement=GATE_MIN_AGREEMENT, default_call_time=GATE_DEFAULT_CALL_TIME):
+        self.lexicon = lexicon or load_lexicon()
+        self.min_confidence = min_confidence
+        self.min_spell_score = min_spell_score
+        self.min_agreement = min_agreement
+        self.default_call_time = default_call_time
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.call_time = 0.0
+        self.decisions = Counter()
+        self.saved_seconds = 0.0
+
+    def decide(self, texts, confidences=None, variants=True):
+        """Évalue un groupe de textes ; retourne la décision et la meilleure version locale.
+
+        `confidences` donne la confiance OCR de chaque texte (None si inconnue).
+        Avec `variants=False`, les textes sont des parties distinctes (paragraphes
+        d'une frame) : ils sont jugés ensemble et l'accord n'est pas mesuré.
+        """
+        texts = texts if isinstance(texts, list) else [texts]
+        confidences = list(confidences) if confidences is not None else [None] * len(texts)
+        if variants:
+            agreements = agreement_scores(texts)
+            spells = [self.lexicon.spell_score(text) for text in texts]
+            # Meilleure version : soutenue par les autres, bien orthographiée et lue avec confiance
+            best = max(range(len(texts)), key=lambda i: agreements[i] * spells[i] * (
+                confidences[i] if confidences[i] is not None else 1.0))
+            text, confidence = texts[best], confidences[best]
+            spell_score, agreement = spells[best], agreements[best]
+            # La fusion des versions (vote par caractère) corrige souvent les erreurs isolées
+            if len(texts) > 1:
+                merged = merge_texts(texts, confidences)[0]
+                merged_spell = self.lexicon.spell_score(merged)
+                if merged != text and merged_spell >= spell_score:
+                    text, spell_score = merged, merged_spell
+                    agreement = agreement_scores([merged] + texts)[0]
+        else:
+            text = "\n".join(texts)
+            known = [(part, value) for part, value in zip(texts, confidences) if value is not None]
+            length = sum(len(part) for part, _ in known)
+            confidence = sum(len(part) * value for part, value in known) / length if length else None
+            spell_score, agreement = self.lexicon.spell_score(text), None
+
+        if confidence is not None and confidence < self.min_confidence:
+            reason = "low_confidence"
+        elif spell_score < self.min_spell_score:
+            reason = "spelling"
+        elif agreement is not None and agreement < self.min_agreement:
+            reason = "disagreement"
+        else:
+            reason = "confident"
+        use_llm = reason != "confident"
+
+        saved_seconds = 0.0 if use_llm else self.estimated_call_time()
+        with self.lock:
+            self.decisions[reason] += 1
+            self.saved_seconds += saved_seconds
+        return {
+            "use_llm": use_llm,
+            "reason": reason,
+            "text": text,
+            "confidence": round(confidence, 4) if confidence is not None else None,
+            "spell_score": round(spell_score, 4),
+            "agreement": round(agreement, 4) if agreement is not None else None,
+            "saved_seconds": saved_seconds
+        }
+
+    def record_call(self, seconds):
+        """Enregistre la durée d'un appel ChatGPT effectivement réalisé"""
+        with self.lock:
+            self.calls += 1
+            self.call_time += seconds
+
+    def estimated_call_time(self):
+        """Durée moyenne des appels mesurés (valeur par défaut avant le premier appel)"""
+        with self.lock:
+            return self.call_time / self.calls if self.calls else self.default_call_time
+
+    def stats(self):
+        """Compteurs globaux des décisions"""
+        with self.lock:
+            total = sum(self.decisions.values())
+            return {
+                "decisions": total,
+                "local": self.decisions["confident"],
+                "sent_to_llm": total - self.decisions["confident"],
+                "reasons": dict(self.decisions),
+                "average_call_time": self.call_time / self.calls if self.calls else None,
+                "saved_seconds": self.saved_seconds
+            }
+
+
+# Les groupes d'une même requête peuvent être évalués en parallèle
+_request_stats_lock = threading.Lock()
+
+
+def new_gate_stats():
+    """Compteurs des décisions pour une seule requête"""
+    return {"groups": 0, "local": 0, "sent_to_llm": 0, "reasons": {}, "saved_seconds": 0.0}
+
+
+def record_decision(stats, decision):
+    """Ajoute une décision aux compteurs d'une requête"""
+    if stats is None:
+        return
+    with _request_stats_lock:
+        stats["groups"] += 1
+        stats["sent_to_llm" if decision["use_llm"] else "local"] += 1
+        stats["reasons"][decision["reason"]] = stats["reasons"].get(decision["reason"], 0) + 1
+        stats["saved_seconds"] += decision["saved_seconds"]
@@ -0,0 +1,206 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Configuration par défaut (surchargeable via .env)
+DETECTION_REUSE_ENABLED = os.getenv('OCR_DETECTION_REUSE', 'False').lower() == 'true'
+# Différence moyenne de niveau de gris au-delà de laquelle une boîte est relue
+BOX_DIFF_THRESHOLD = float(os.getenv('OCR_BOX_DIFF_THRESHOLD', '12'))
+# Proportion de pixels modifiés hors des boîtes au-delà de laquelle la détection est relancée
+FRAME_DIFF_THRESHOLD = float(os.getenv('OCR_FRAME_DIFF_THRESHOLD', '0.005'))
+
+# Écart de niveau de gris à partir duquel un pixel est considéré modifié
+PIXEL_DIFF = 30
+# Détection relancée si plus de cette proportion des boîtes a changé
+MAX_CHANGED_BOXES = 0.5
+
+
+def box_rect(box, shape):
+    """Rectangle (x0, y0, x1, y1) d'une boîte horizontale [x_min, x_max, y_min, y_max] ou libre (4 points)"""
+    height, width = shape[:2]
+    if len(box) == 4 and not hasattr(box[0], '__len__'):
+        x0, x1, y0, y1 = box
+    else:
+        xs = [point[0] for point in box]
+        ys = [point[1] for point in box]
+        x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+    x0, y0 = max(0, int(x0)), max(0, int(y0))
+    x1, y1 = min(width, int(np.ceil(x1))), min(height, int(np.ceil(y1)))
+    return x0, y0, max(x0 + 1, x1), max(y0 + 1, y1)
+
+
+class FramePlan:
+    """Boîtes de texte d'une frame et boîtes à reconnaître sur cette frame.
+
+    `sources[i]` est l'index de la frame dont la reconnaissance de la boîte i
+    est réutilisée (la frame elle-même si la boîte doit être relue).
+    """
+
+    def __init__(self, index, keyframe, horizontal_list, free_list, rects, sources):
+        self.index = index
+        self.keyframe = keyframe
+        self.horizontal_list = horizontal_list
+        self.free_list = free_list
+        self.rects = rects
+        self.sources = sources
+
+    def changed_boxes(self):
+        """Index des boîtes à reconnaître sur cette frame"""
+        return [box for box, source in enumerate(self.sources) if source == self.index]
+
+    def boxes_to_recognize(self):
+        """Listes horizontale et libre restreintes aux boîtes à reconnaître"""
+        changed = set(self.changed_boxes())
+        count = len(self.horizontal_list)
+        horizontal = [box for i, box in enumerate(self.horizontal_list) if i in changed]
+        free = [box for i, box in enumerate(self.free_list) if i + count in changed]
+        return horizontal, free
+
+    def assign_lines(self, lines):
+        """Répartit les lignes reconnues sur cette frame entre ses boîtes relues.
+
+        Chaque ligne ([boîte, texte, confiance]) est attribuée à la boîte qui
+        contient son centre. Retourne {index de boîte: [lignes]}.
+        """
+        changed = self.changed_boxes()
+        assigned = {box: [] for box in changed}
+        for line in lines:
+            center_x = sum(point[0] for point in line[0]) / len(line[0])
+            center_y = sum(point[1] for point in line[0]) / len(line[0])
+            owner = changed[0] if changed else None
+            for box in changed:
+                x0, y0, x1, y1 = self.rects[box]
+                if x0 <= center_x <= x1 and y0 <= center_y <= y1:
+                    owner = box
+                    break
+            if owner is not None:
+                assigned[owner].append(line)
+        return assigned
+
+
+class DetectionTracker:
+    """Réutilise les boîtes détectées sur une keyframe pour les frames suivantes.
+
+    La détection complète (`detect(image)` → listes horizontale et libre) n'est
+    lancée que sur les keyframes. Pour les frames suivantes, les pixels de
+    chaque boîte sont comparés à ceux de la dernière frame où elle a été lue :
+    seules les boîtes modifiées sont reconnues à nouveau. La détection est
+    relancée si la frame change de taille, si plus de FRAME_DIFF_THRESHOLD des
+    pixels hors des boîtes ont changé (nouveau texte) ou si plus de la moitié
+    des boîtes a changé. Les frames doivent être planifiées dans l'ordre de la
+    vidéo, par un seul thread.
+    """
+
+    def __init__(self, detect, box_threshold=BOX_DIFF_THRESHOLD, frame_threshold=FRAME_DIFF_THRESHOLD):
+        self.detect = detect
+        self.box_threshold = box_threshold
+        self.frame_threshold = frame_threshold
+        self.keyframe = None
+        self.outside = None
+        self.horizontal_list = []
+        self.free_list = []
+        self.rects = []
+        self.references = []
+        self.sources = []
+        # Lignes reconnues par (frame, boîte), pour les boîtes réutilisées ensuite
+        self.box_lines = {}
+
+        self.frames = 0
+        self.keyframes = 0
+        self.boxes_total = 0
+        self.boxes_recognized = 0
+        self.detection_time = 0.0
+        self.recognition_time = 0.0
+        self.diff_time = 0.0
+
+    def plan(self, index, image):
+        """Décide pour une frame entre détection complète et réutilisation des boîtes"""
+        diff_start = time.time()
+        changed = None
+        if self.keyframe is not None and self.keyframe.shape == image.shape:
+            diff = cv2.absdiff(image, self.keyframe)
+            outside_changed = float(np.count_nonzero((diff > PIXEL_DIFF) & self.outside)) / max(1, np.count_nonzero(self.outside))
+            if outside_changed <= self.frame_threshold:
+                changed = []
+                for box, (x0, y0, x1, y1) in enumerate(self.rects):
+                    box_diff = cv2.absdiff(image[y0:y1, x0:x1], self.references[box])
+                    if float(box_diff.mean()) > self.box_threshold:
+                        changed.append(box)
+                if len(changed) > MAX_CHANGED_BOXES * len(self.rects):
+                    changed = None
+        diff_time = time.time() - diff_start
+
+        if changed is None:
+            detect_start = time.time()
+            horizontal_list, free_list = self.detect(image)
+            detection_time = time.time() - detect_start
+            self._set_keyframe(index, image, horizontal_list, free_list)
+        else:
+            detection_time = 0.0
+            for box in changed:
+                x0, y0, x1, y1 = self.rects[box]
+                self.references[box] = image[y0:y1, x0:x1].copy()
+                self.sources[box] = index
+
+        plan = FramePlan(index, changed is None, self.horizontal_list, self.free_list, self.rects, list(self.sources))
+        self.frames += 1
+        self.diff_time += diff_time
+        self.boxes_total += len(self.rects)
+        self.boxes_recognized += len(plan.changed_boxes())
+        if plan.keyframe:
+            self.keyframes += 1
+            self.detection_time += detection_time
+        return plan
+
+    def collect(self, plan, lines, recognition_time=0.0):
+        """Enregistre les lignes reconnues sur les boîtes relues d'une frame.
+
+        Retourne toutes les lignes de la frame : celles qui viennent d'être
+        reconnues et celles des boîtes inchangées, lues sur une frame précédente.
+        """
+        self.recognition_time += recognition_time
+        for box, box_lines in plan.assign_lines(lines).items():
+            self.box_lines[(plan.index, box)] = box_lines
+        frame_lines = []
+        for box, source in enumerate(plan.sources):
+            frame_lines.extend(self.box_lines.get((source, box), []))
+        return frame_lines
+
+    def _set_keyframe(self, index, image, horizontal_list, free_list):
+        """Mémorise les boîtes détectées et les pixels de référence d'une keyframe"""
+        self.keyframe = image.copy()
+        self.horizontal_list = horizontal_list
+        self.free_list = free_list
+        self.rects = [box_rect(box, image.shape) for box in list(horizontal_list) + list(free_list)]
+        self.references = [image[y0:y1, x0:x1].copy() for x0, y0, x1, y1 in self.rects]
+        self.sources = [index] * len(self.rects)
+        self.box_lines = {}
+        self.outside = np.ones(image.shape[:2], dtype=bool)
+        for x0, y0, x1, y1 in self.rects:
+            self.outside[y0:y1, x0:x1] = False
+
+    def stats(self):
+        """Taux de détections évitées et temps économisé.
+
+        Le temps économisé est estimé d'après la durée moyenne d'une détection
+        et de la reconnaissance d'une boîte, moins le coût des comparaisons.
+        """
+        skipped = self.frames - self.keyframes
+        boxes_reused = self.boxes_total - self.boxes_recognized
+        average_detection = self.detection_time / self.keyframes if self.keyframes else 0.0
+        average_recognition = self.recognition_time / self.boxes_recognized if self.boxes_recognized else 0.0
+        return {
+            "frames": self.frames,
+            "keyframes": self.keyframes,
+            "detections_skipped": skipped,
+            "detector_skip_rate": skipped / self.frames if self.frames else 0.0,
+            "boxes_recognized": self.boxes_recognized,
+            "boxes_reused": boxes_reused,
+            "detection_time": self.detection_time,
+            "diff_time": self.diff_time,
+            "detection_time_saved": max(0.0, average_detection * skipped - self.diff_time),
+            "recognition_time_saved": average_recognition * boxes_reused
+        }
+
@@ -0,0 +1,145 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration par défaut (surchargeable via .env)
+# Frames décodées et prétraitées à l'avance (0 = traitement séquentiel)
+PREFETCH_DEPTH = int(os.getenv('OCR_PREFETCH_DEPTH', '4'))
+# Threads de décodage/prétraitement (OpenCV libère le GIL pendant ces opérations)
+PREFETCH_WORKERS = int(os.getenv('OCR_PREFETCH_WORKERS', '2'))
+
+
+class FramePrefetcher:
+    """Prépare les frames suivantes pendant que la frame courante passe dans l'OCR.
+
+    `load(item)` (lecture, décodage, prétraitement) est exécuté dans un pool de
+    `workers` threads, au plus `depth` frames en avance sur le consommateur :
+    la file est bornée et la mémoire reste limitée à quelques frames.
+    L'itération produit des triplets (item, résultat, erreur) dans l'ordre
+    d'origine, pour que le dédoublonnage et le cache voient les frames comme
+    en traitement séquentiel. `items` peut être une liste ou un itérateur
+    (voir background_iter pour une source coûteuse comme une vidéo).
+    """
+
+    def __init__(self, items, load, depth=PREFETCH_DEPTH, workers=PREFETCH_WORKERS):
+        self.items = items
+        self.load = load
+        self.depth = max(0, depth)
+        self.workers = max(1, workers)
+        self.load_time = 0.0
+        self.wait_time = 0.0
+        self.elapsed = 0.0
+        self.frames = 0
+
+    def _timed_load(self, item):
+        """Exécute `load` et retourne (item, résultat, erreur, durée)"""
+        start_time = time.time()
+        try:
+            result, error = self.load(item), None
+        except Exception as e:
+            result, error = None, e
+        return item, result, error, time.time() - start_time
+
+    def __iter__(self):
+        start_time = time.time()
+        try:
+            if self.depth == 0:
+                for item in self.items:
+                    item, result, error, load_time = self._timed_load(item)
+                    self._record(load_time, load_time)
+                    yield item, result, error
+                return
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                upcoming = iter(self.items)
+                pending = deque()
+                for item in upcoming:
+                    pending.append(executor.submit(self._timed_load, item))
+                    if len(pending) >= self.depth:
+                        break
+                while pending:
+                    wait_start = time.time()
+                    item, result, error, load_time = pending.popleft().result()
+                    self._record(load_time, time.time() - wait_start)
+                    # Remplacer la frame consommée par la suivante
+                    next_item = next(upcoming, None)
+                    if next_item is not None:
+                        pending.append(executor.submit(self._timed_load, next_item))
+                    yield item, result, error
+        finally:
+            self.elapsed = time.time() - start_time
+            # Source générée (background_iter) : l'arrêter si le consommateur s'arrête tôt
+            close = getattr(self.items, "close", None)
+            if close is not None:
+                close()
+
+    def _record(self, load_time, wait_time):
+        self.frames += 1
+        self.load_time += load_time
+        self.wait_time += wait_time
+
+    def stats(self):
+        """Occupation des threads de préparation et attente du consommateur"""
+        capacity = self.elapsed * (self.workers if self.depth else 1)
+        return {
+            "depth": self.depth,
+            "workers": self.workers if self.depth else 0,
+            "frames": self.frames,
+            "load_time": self.load_time,
+            "wait_time": self.wait_time,
+            "elapsed": self.elapsed,
+            "utilization": min(1.0, self.load_time / capacity) if capacity else 0.0
+        }
+
+
+def background_iter(iterable, depth=PREFETCH_DEPTH):
+    """Parcourt `iterable` dans un thread dédié, au plus `depth` éléments en avance.
+
+    Pour une source séquentielle coûteuse (décodage d'une vidéo) qui ne peut pas
+    être répartie entre plusieurs threads : sa lecture se fait pendant l'OCR.
+    Une exception levée par la source est relancée chez le consommateur. Si le
+    consommateur s'arrête avant la fin (break, exception), le thread s'arrête
+    aussi et ferme la source (libération de la VideoCapture).
+    """
+    items = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    done = object()
+
+    def put(entry):
+        """Ajoute un élément à la file ; False si le consommateur s'est arrêté"""
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((None, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
@@ -0,0 +1,148 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from adaptive_preprocessing import find_text_bands
+from video_frames import VideoFrameSampler, scene_difference, scene_thumbnail, FRAME_INTERVAL, SCENE_THRESHOLD
+
+# Configuration par défaut (surchargeable via .env)
+# "content" : frames choisies selon les changements de contenu, "uniform" : une frame sur N
+SELECTION_MODE = os.getenv('OCR_FRAME_SELECTION', 'content').lower()
+# Threads de lecture des miniatures
+SELECTION_WORKERS = int(os.getenv('OCR_SELECTION_WORKERS', '4'))
+
+# Poids minimal d'une frame sans texte probable (elle reste choisie s'il reste de la place)
+MIN_TEXT_WEIGHT = 0.25
+
+
+class FrameFeatures:
+    """Miniature en niveaux de gris et densité de contours de texte d'une frame"""
+
+    def __init__(self, thumbnail, text_score):
+        self.thumbnail = thumbnail
+        self.text_score = text_score
+
+
+def image_features(image):
+    """Caractéristiques d'une frame déjà décodée (BGR ou niveaux de gris)"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    bands, _, density = find_text_bands(gray)
+    return FrameFeatures(scene_thumbnail(gray), density if bands else 0.0)
+
+
+def file_features(path):
+    """Caractéristiques d'une image sur le disque, décodée en niveaux de gris réduits au quart"""
+    image = cv2.imread(str(path), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    return image_features(image) if image is not None else None
+
+
+def select_uniform(count, max_frames):
+    """Une frame à intervalle régulier (sélection historique d'index.py)"""
+    indices = list(range(count))
+    if max_frames and max_frames > 0 and count > max_frames:
+        step = count // max_frames
+        indices = indices[::step][:max_frames]
+    return indices
+
+
+def select_frames(features, max_frames=0, threshold=SCENE_THRESHOLD):
+    """Choisit au plus `max_frames` frames couvrant un maximum de contenus différents.
+
+    Les frames sont d'abord découpées en segments : un segment commence dès
+    qu'une zone de la miniature diffère de plus de `threshold` de la première
+    frame du segment (changement de légende ou de plan). Chaque segment est
+    représenté par sa frame la plus riche en texte probable. S'il y a plus de
+    segments que `max_frames`, les représentants sont choisis un à un en
+    maximisant le gain : densité de texte pondérée par la nouveauté par rapport
+    aux frames déjà choisies (un contenu déjà couvert n'apporte rien).
+
+    `features` contient une entrée par frame (None pour une frame illisible).
+    Retourne les index choisis dans l'ordre de la vidéo et le nombre de segments.
+    """
+    segments = []
+    start = None
+    for index, feature in enumerate(features):
+        if feature is None:
+            continue
+        if start is None or scene_difference(feature.thumbnail, features[start].thumbnail) >= threshold:
+            segments.append([])
+            start = index
+        segments[-1].append(index)
+
+    representatives = [max(segment, key=lambda index: features[index].text_score) for segment in segments]
+    if not max_frames or max_frames <= 0 or len(representatives) <= max_frames:
+        return representatives, len(segments)
+
+    max_score = max(features[index].text_score for index in representatives) or 1.0
+    weights = {index: MIN_TEXT_WEIGHT + features[index].text_score / max_score for index in representatives}
+    novelty = {index: 1.0 for index in representatives}
+    chosen = []
+    while len(chosen) < max_frames:
+        best = max((index for index in representatives if index not in chosen),
+                   key=lambda index: weights[index] * novelty[index])
+        if novelty[best] <= 0 and chosen:
+            break
+        chosen.append(best)
+        for index in representatives:
+            distance = scene_difference(features[index].thumbnail, features[best].thumbnail)
+            novelty[index] = min(novelty[index], min(1.0, distance / threshold))
+    return sorted(chosen), len(segments)
+
+
+def select_frame_paths(paths, max_frames=0, mode=SELECTION_MODE, workers=SELECTION_WORKERS):
+    """Sélectionne les images d'un dossier de frames à envoyer à l'OCR.
+
+    Retourne les chemins choisis et les statistiques de sélection, dont le
+    nombre d'appels OCR évités par rapport à la sélection uniforme.
+    """
+    start_time = time.time()
+    uniform = select_uniform(len(paths), max_frames)
+    if mode != "content":
+        return [paths[index] for index in uniform], selection_stats(mode, len(paths), uniform, len(uniform), start_time)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        features = list(executor.map(file_features, paths))
+    selected, segments = select_frames(features, max_frames)
+    return [paths[index] for index in selected], selection_stats(mode, len(paths), selected, segments, start_time, len(uniform))
+
+
+def select_images(images, max_frames=0, mode=SELECTION_MODE):
+    """Sélectionne parmi des frames déjà décodées ; retourne les index choisis et les statistiques"""
+    start_time = time.time()
+    uniform = select_uniform(len(images), max_frames)
+    if mode != "content":
+        return uniform, selection_stats(mode, len(images), uniform, len(uniform), start_time)
+    selected, segments = select_frames([image_features(image) for image in images], max_frames)
+    return selected, selection_stats(mode, len(images), selected, segments, start_time, len(uniform))
+
+
+def select_video_positions(path, max_frames=0, interval=FRAME_INTERVAL):
+    """Sélectionne selon leur contenu les frames échantillonnées d'une vidéo.
+
+    Une première lecture calcule les caractéristiques de chaque frame
+    échantillonnée (sans les garder en mémoire) ; retourne les rangs choisis,
+    à passer à VideoFrameSampler(positions=...), et les statistiques. La
+    vidéo est donc décodée deux fois : le temps de cette première lecture
+    est compté dans `selection_time`.
+    """
+    start_time = time.time()
+    sampler = VideoFrameSampler(path, interval=interval, scene_change=False)
+    features = [image_features(image) for _, image in sampler]
+    uniform = select_uniform(len(features), max_frames)
+    selected, segments = select_frames(features, max_frames)
+    return selected, selection_stats("content", len(features), selected, segments, start_time, len(uniform))
+
+
+def selection_stats(mode, available, selected, segments, start_time, uniform_count=None):
+    """Statistiques de sélection : frames disponibles, choisies et appels OCR évités"""
+    uniform_count = len(selected) if uniform_count is None else uniform_count
+    return {
+        "mode": mode,
+        "frames_available": available,
+        "frames_selected": len(selected),
+        "segments": segments,
+        "ocr_calls_saved": max(0, uniform_count - len(selected)),
+        "selection_time": time.time() - start_time
+    }
@@ -0,0 +1,25 @@
+"""Configuration gunicorn du service EasyOCR.
+
+    cd easyocr && gunicorn -c gunicorn.conf.py "service:create_app()"
+
+Les modèles sont chargés une seule fois dans le processus maître (preload_app)
+puis partagés en copie sur écriture par les workers. CUDA ne supporte pas le
+fork : pour utiliser le GPU, lancer avec OCR_PRELOAD=false et OCR_WORKERS=1.
+"""
+import os
+
+bind = os.getenv('OCR_BIND', '127.0.0.1:5000')
+workers = int(os.getenv('OCR_WORKERS', '1'))
+preload_app = os.getenv('OCR_PRELOAD', 'True').lower() == 'true'
+
+# Un thread par reader et par requête en file d'attente, plus quelques-uns pour
+# répondre 503 avec Retry-After au lieu de laisser les requêtes s'empiler
+worker_class = 'gthread'
+threads = int(os.getenv('OCR_CPU_POOL_SIZE', '2')) + int(os.getenv('OCR_QUEUE_MAX', '16')) + 4
+timeout = 300
+
+
+def post_fork(server, worker):
+    """Rouvre les caches SQLite et répartit les threads PyTorch dans chaque worker"""
+    import service
+    service.reset_after_fork()
@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+def compute_dhash(image, hash_size=16):
+    """Calcule le hash perceptuel (dHash) d'une image.
+
+    L'image est réduite à hash_size x hash_size cellules en niveaux de gris,
+    puis chaque bit indique si une cellule est plus claire que sa voisine de
+    droite, et chaque bit suivant si elle est plus claire que celle du dessus.
+    Deux frames quasi identiques ont des hashes à faible distance de Hamming,
+    tandis qu'un changement de légende modifie les gradients de sa zone.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (hash_size + 1, hash_size + 1), interpolation=cv2.INTER_AREA)
+    horizontal = small[1:, 1:] > small[1:, :-1]
+    vertical = small[1:, 1:] > small[:-1, 1:]
+    bits = np.concatenate((horizontal.flatten(), vertical.flatten()))
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(hash_a, hash_b):
+    """Nombre de bits différents entre deux hashes"""
+    return bin(hash_a ^ hash_b).count('1')
+
+
+class FrameDeduplicator:
+    """Mémorise les hashes perceptuels des frames déjà traitées.
+
+    `find` retourne la valeur associée à la première frame connue dont le hash
+    est à une distance de Hamming inférieure ou égale à `threshold`, ce qui
+    permet de réutiliser son résultat OCR au lieu de relancer `readtext`.
+    """
+
+    def __init__(self, threshold=4, max_entries=None):
+        self.threshold = threshold
+        self.entries = deque(maxlen=max_entries)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def find(self, frame_hash):
+        """Retourne la valeur d'une frame similaire déjà vue, ou None"""
+        with self.lock:
+            for known_hash, value in self.entries:
+                if hamming_distance(known_hash, frame_hash) <= self.threshold:
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def add(self, frame_hash, value):
+        """Enregistre le résultat d'une frame traitée"""
+        with self.lock:
+            self.entries.append((frame_hash, value))
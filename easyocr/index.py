@@ -1,31 +1,48 @@
-import easyocr
-from openai import OpenAI
 import os
 import sys
 from pathlib import Path
-import difflib
 import json
 from dotenv import load_dotenv
 import argparse
 import time
 import multiprocessing
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import threading
+from contextlib import nullcontext
 import cv2
 import numpy as np
-import hashlib
-import torch  # Ajout de l'import torch pour diagnostic CUDA
+from image_hash import compute_dhash, FrameDeduplicator
+from ocr_cache import OCRResultCache, create_cache_from_env
+from correction_cache import create_correction_cache_from_env
+from parallel_correction import call_with_retry, run_concurrently, CALL_TIMEOUT, MAX_CONCURRENCY
+from packed_correction import correct_groups_cached
+from text_grouping import group_similar_texts
+from adaptive_preprocessing import preprocess_frame, PREPROCESS_MODE
+from detection_tracking import DetectionTracker, DETECTION_REUSE_ENABLED
+from frame_prefetch import FramePrefetcher, background_iter, PREFETCH_DEPTH
+from video_frames import VideoFrameSampler, is_video_file, FRAME_INTERVAL, SCENE_CHANGE_ENABLED
+from frame_selection import select_frame_paths, select_video_positions, SELECTION_MODE
+from ocr_results import build_frame_result, text_confidence
+from correction_gate import CorrectionGate, new_gate_stats, record_decision, GATE_ENABLED
+from consensus_merge import merge_texts
+from ocr_worker import serve_stdio, serve_unix_socket, submit_job, WORKER_SOCKET
+from instrumentation import (metrics, get_logger, configure_logging, observe_stage, record_error, FRAMES, CACHE_HITS,
+                             DEDUP_SKIPS)
+from profiling import RequestProfiler, make_profile_id, active_profiler
 
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
+configure_logging()
+log = get_logger("index")
+# Source des métriques de ce script
+METRICS_SOURCE = "index"
 
 # Variable globale pour la configuration GPU
 gpu_enabled = os.getenv('EASYOCR_GPU_ENABLED', 'True').lower() == 'true'
 
-# Diagnostic CUDA
-print(f"CUDA disponible: {torch.cuda.is_available()}")
-print(f"Nombre de GPUs: {torch.cuda.device_count()}")
-if torch.cuda.is_available():
-    print(f"GPU actif: {torch.cuda.get_device_name(0)}")
+# torch et easyocr sont importés au premier chargement du modèle (voir load_ocr_modules) :
+# le client du worker persistant n'a pas à payer ces imports
+torch = None
+easyocr = None
 
 # Récupérer la clé API depuis les variables d'environnement
 api_key = os.getenv('OPENAI_API_KEY')
@@ -34,11 +51,16 @@ if not api_key:
     print("Veuillez définir OPENAI_API_KEY dans le fichier .env")
     sys.exit(1)
 
-# Initialiser le client OpenAI avec la clé récupérée
-client = OpenAI(api_key=api_key)
+# Client OpenAI, créé à la première correction (voir get_client)
+client = None
+client_lock = threading.Lock()
 
-# Afficher la configuration GPU
-print(f"EasyOCR GPU enabled: {gpu_enabled}")
+# Modèle utilisé pour la correction et cache des corrections déjà obtenues
+# Options: gpt-3.5-turbo (équilibré), gpt-3.5-turbo-instruct (plus rapide)
+CORRECTION_MODEL = "gpt-3.5-turbo"  # Essayer avec le modèle standard qui est souvent plus rapide
+correction_cache = create_correction_cache_from_env()
+# Filtre local : seuls les groupes douteux sont envoyés à ChatGPT
+correction_gate = CorrectionGate()
 
 # Variable pour tracking des performances
 performance_metrics = {
@@ -46,83 +68,179 @@ performance_metrics = {
     'ocr_time': 0,
     'total_time': 0,
     'images_processed': 0,
-    'unique_images': 0
+    'unique_images': 0,
+    'hashing_time': 0,
+    'frames_skipped': 0,
+    'cache_hits': 0,
+    'ocr_time_saved': 0,
+    'model_load_time': 0,
+    'detections_skipped': 0,
+    'detector_skip_rate': 0,
+    'detection_time_saved': 0,
+    'recognition_time_saved': 0,
+    'prefetch_depth': 0,
+    'prefetch_wait_time': 0,
+    'prefetch_utilization': 0,
+    'ocr_utilization': 0,
+    'video_decode_time': 0,
+    'video_frames_read': 0,
+    'frames_available': 0,
+    'selection_time': 0,
+    'ocr_calls_saved': 0,
+    'groups_corrected_locally': 0,
+    'groups_sent_to_llm': 0,
+    'correction_time_saved': 0
 }
 
-# Initialiser EasyOCR avec la langue française
-# Ajout des paramètres d'optimisation pour la détection GPU
-reader = easyocr.Reader(['fr','en'], 
-                        gpu=gpu_enabled,
-                        download_enabled=False,    # Évite de vérifier les téléchargements à chaque fois
-                        detector=True,
-                        recognizer=True,
-                        cudnn_benchmark=gpu_enabled # Optimisation CUDA si GPU activé
-                       )
+# Langues et paramètres OCR (identiques à service.py pour partager le cache)
+READER_LANGS = ['fr', 'en']
+OCR_PARAMS = {
+    'min_size': 10,
+    'contrast_ths': 0.3,
+    'adjust_contrast': 0.5,
+    'text_threshold': 0.6,
+    'link_threshold': 0.3,
+    'width_ths': 0.5,
+    'low_text': 0.3,
+}
+
+# Paramètres utilisés uniquement par le détecteur
+DETECT_PARAM_KEYS = ('min_size', 'text_threshold', 'link_threshold', 'width_ths', 'low_text')
+
+# Readers EasyOCR déjà chargés, par mode GPU/CPU : en mode worker (--serve),
+# le modèle n'est chargé qu'une fois pour tous les dossiers de frames traités
+readers = {}
+
+def load_ocr_modules():
+    """Importe torch et easyocr et affiche le diagnostic CUDA"""
+    global torch, easyocr
+    if torch is not None:
+        return
+    import easyocr
+    import torch
+    
+    # Afficher la configuration GPU et le diagnostic CUDA
+    log.info("cuda", gpu_enabled=gpu_enabled, available=torch.cuda.is_available(), devices=torch.cuda.device_count(),
+             device=torch.cuda.get_device_name(0) if torch.cuda.is_available() else None)
+
+def get_reader(use_gpu):
+    """Retourne le reader EasyOCR du mode demandé et son temps de chargement (0 s'il était déjà chargé)"""
+    if use_gpu in readers:
+        return readers[use_gpu], 0.0
+    
+    log.info("model_load_start", gpu=use_gpu)
+    init_start = time.time()
+    load_ocr_modules()
+    
+    # Initialiser EasyOCR avec les paramètres optimisés
+    readers[use_gpu] = easyocr.Reader(
+        READER_LANGS, 
+        gpu=use_gpu,
+        quantize=not use_gpu,
+        recognizer=True,
+        download_enabled=False,
+        detector=True,
+        cudnn_benchmark=use_gpu
+    )
+    
+    init_time = time.time() - init_start
+    log.info("model_loaded", seconds=init_time)
+    return readers[use_gpu], init_time
+
+def get_client():
+    """Client OpenAI partagé par tous les jobs"""
+    global client
+    with client_lock:
+        if client is None:
+            from openai import OpenAI
+            # Les nouveaux essais sont gérés par call_with_retry (backoff sur 429/5xx)
+            client = OpenAI(api_key=api_key, timeout=CALL_TIMEOUT, max_retries=0)
+    return client
 
 def get_image_hash(image):
-    """Calcule un hash simple de l'image pour identifier les images similaires"""
-    # Redimensionner l'image à une petite taille fixe
-    small_img = cv2.resize(image, (32, 32))
-    # Convertir en niveaux de gris
-    gray_img = cv2.cvtColor(small_img, cv2.COLOR_BGR2GRAY)
-    # Calculer le hash basé sur le contenu de l'image
-    img_hash = hashlib.md5(gray_img.tobytes()).hexdigest()
-    return img_hash
-
-def preprocess_image(image_path, scale_percent=30):
-    """Prétraite l'image en la redimensionnant pour accélérer l'OCR"""
-    start_time = time.time()
-    img = cv2.imread(image_path)
+    """Calcule un hash perceptuel (dHash) de l'image pour identifier les images similaires"""
+    return compute_dhash(image)
+
+def preprocess_image(image_path, scale_percent=30, image=None, mode=PREPROCESS_MODE):
+    """Prétraite l'image pour accélérer l'OCR.
+
+    En mode "adaptive", seules les bandes de texte probables sont conservées,
+    à une échelle adaptée à la taille du texte (au moins `scale_percent`) ;
+    en mode "fixed", toute l'image est réduite à `scale_percent`.
+    Retourne l'image prétraitée et la description des bandes (voir preprocess_frame).
+    """
+    img = image if image is not None else cv2.imread(image_path)
     if img is None:
-        print(f"Erreur: Impossible de lire l'image {image_path}")
-        return None
-        
-    # Redimensionner l'image plus agressivement (30% au lieu de 50%)
-    width = int(img.shape[1] * scale_percent / 100)
-    height = int(img.shape[0] * scale_percent / 100)
-    resized = cv2.resize(img, (width, height))
+        log.error("image_unreadable", path=image_path)
+        return None, None
     
-    # Convertir en niveaux de gris pour accélérer l'OCR
-    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    enhanced, info = preprocess_frame(img, scale_percent, mode)
+    if info["mode"] == "adaptive":
+        log.debug("adaptive_preprocess", scale=info['scale'], bands=len(info['bands']), pixels=info['pixels'])
     
-    # Améliorer le contraste pour une meilleure détection de texte
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-    enhanced = clahe.apply(gray)
+    return enhanced, info
+
+def ocr_incremental(reader, tracker, index, image, batch_size=1, canvas_size=1024):
+    """OCR d'une frame en réutilisant les boîtes détectées sur la keyframe précédente.
+
+    La détection n'est relancée que si le tracker l'exige ; sinon seules les
+    boîtes dont les pixels ont changé sont reconnues, les autres reprennent
+    le texte lu sur une frame précédente. Retourne les lignes de la frame
+    ([boîte, texte, confiance], voir build_frame_result).
+    """
+    plan = tracker.plan(index, image)
+    horizontal_list, free_list = plan.boxes_to_recognize()
     
-    # Mise à jour des métriques
-    performance_metrics['preprocessing_time'] += time.time() - start_time
+    recog_start = time.time()
+    lines = []
+    if horizontal_list or free_list:
+        lines = reader.recognize(
+            image,
+            horizontal_list,
+            free_list,
+            batch_size=batch_size,
+            detail=1,
+            paragraph=False,
+            contrast_ths=OCR_PARAMS['contrast_ths'],
+            adjust_contrast=OCR_PARAMS['adjust_contrast'],
+            reformat=False
+        )
+    frame_lines = tracker.collect(plan, lines, time.time() - recog_start)
     
-    return enhanced
+    if not plan.keyframe:
+        log.debug("detection_reused", changed=len(plan.changed_boxes()), boxes=len(plan.sources))
+    return frame_lines
 
 def process_image_worker(image_path, scale_percent=30, fast_mode=True):
     """Fonction de travail pour le traitement parallèle"""
     try:
-    # Initialiser EasyOCR avec la langue française pour chaque processus
-    # Paramètres optimisés en fonction du mode GPU/CPU
+        # Initialiser EasyOCR avec la langue française pour chaque processus
+        # Paramètres optimisés en fonction du mode GPU/CPU
         init_start = time.time()
-        print(f"[TIMING] Début initialisation du modèle EasyOCR pour {image_path}")
-    local_reader = easyocr.Reader(
-        ['fr','en'], 
-        gpu=gpu_enabled,
-        # Optimisations spécifiques selon le mode
-        quantize=not gpu_enabled,  # Quantification seulement en mode CPU
-        recognizer=True,
-        download_enabled=False,    # Évite de vérifier les téléchargements à chaque fois
-        detector=True,
-        cudnn_benchmark=gpu_enabled # Optimisation CUDA si GPU activé
-    )
+        log.debug("worker_model_load_start", path=str(image_path))
+        load_ocr_modules()
+        local_reader = easyocr.Reader(
+            ['fr','en'], 
+            gpu=gpu_enabled,
+            # Optimisations spécifiques selon le mode
+            quantize=not gpu_enabled,  # Quantification seulement en mode CPU
+            recognizer=True,
+            download_enabled=False,    # Évite de vérifier les téléchargements à chaque fois
+            detector=True,
+            cudnn_benchmark=gpu_enabled # Optimisation CUDA si GPU activé
+        )
         init_time = time.time() - init_start
-        print(f"[TIMING] Initialisation du modèle EasyOCR terminée en {init_time:.2f}s")
+        log.debug("worker_model_loaded", seconds=init_time)
         
-    start_time = time.time()
-    
-    # Prétraiter l'image pour accélérer l'OCR
+        start_time = time.time()
+        
+        # Prétraiter l'image pour accélérer l'OCR
         preproc_start = time.time()
-    preprocessed_img = preprocess_image(image_path, scale_percent=scale_percent)
+        preprocessed_img, _ = preprocess_image(image_path, scale_percent=scale_percent)
         preproc_time = time.time() - preproc_start
-        print(f"[TIMING] Prétraitement de l'image {image_path} en {preproc_time:.2f}s")
-    
-    if preprocessed_img is not None:
+        log.debug("worker_preprocess", path=str(image_path), seconds=preproc_time)
+        
+        if preprocessed_img is not None:
             # Paramètres optimisés pour GPU ou CPU selon le mode activé
             batch_size = 8 if gpu_enabled else 1
             canvas_size = 2048 if gpu_enabled else 1024
@@ -143,15 +261,15 @@ def process_image_worker(image_path, scale_percent=30, fast_mode=True):
                 canvas_size=canvas_size    # Taille du canvas adaptée au matériel
             )
             readtext_time = time.time() - readtext_start
-            print(f"[TIMING] Lecture OCR de l'image {image_path} en {readtext_time:.2f}s")
+            log.debug("worker_ocr", path=str(image_path), seconds=readtext_time)
             
             # Convertir le résultat en texte
             text = "\n".join(result) if isinstance(result, list) else str(result)
             
             # Libérer la mémoire immédiatement
             del preprocessed_img
-    else:
-        # Fallback sur l'image originale en cas d'erreur
+        else:
+            # Fallback sur l'image originale en cas d'erreur
             # Ajuster le batch_size selon le mode GPU/CPU
             batch_size = 8 if gpu_enabled else 1
             readtext_start = time.time()
@@ -163,12 +281,12 @@ def process_image_worker(image_path, scale_percent=30, fast_mode=True):
                 text_threshold=0.6
             )
             readtext_time = time.time() - readtext_start
-            print(f"[TIMING] Lecture OCR (fallback) de l'image {image_path} en {readtext_time:.2f}s")
+            log.debug("worker_ocr", path=str(image_path), seconds=readtext_time, fallback=True)
             
             text = "\n".join(result) if isinstance(result, list) else str(result)
         
-    ocr_time = time.time() - start_time
-    
+        ocr_time = time.time() - start_time
+        
         # Libérer la mémoire explicitement après l'OCR
         if gpu_enabled and torch.cuda.is_available():
             torch.cuda.empty_cache()
@@ -182,7 +300,8 @@ def process_image_worker(image_path, scale_percent=30, fast_mode=True):
         
         return text, str(image_path), ocr_time
     except Exception as e:
-        print(f"Erreur dans process_image_worker pour {image_path}: {str(e)}")
+        log.error("worker_error", path=str(image_path), error=str(e))
+        record_error(METRICS_SOURCE, "frame")
         # Retourner une valeur par défaut en cas d'erreur pour éviter de bloquer le processus
         return f"ERREUR: {str(e)}", str(image_path), 0
 
@@ -195,220 +314,437 @@ def calculate_hash(img_path):
         return img_path, img_hash
     return img_path, None
 
-def process_images(frames_dir, max_images=40, scale_percent=30, fast_mode=True, use_gpu=True):
-    """Traite toutes les images, groupe les textes similaires et corrige chaque groupe"""
+def process_images(frames_dir, max_images=40, scale_percent=30, fast_mode=True, use_gpu=True, dedup_threshold=4, use_cache=True,
+                   max_concurrency=MAX_CONCURRENCY, correction_mode="per_group", preprocess_mode=PREPROCESS_MODE,
+                   incremental=DETECTION_REUSE_ENABLED, prefetch_depth=PREFETCH_DEPTH,
+                   frame_interval=FRAME_INTERVAL, scene_change=SCENE_CHANGE_ENABLED, selection=SELECTION_MODE,
+                   detail=False, gate=GATE_ENABLED):
+    """Traite toutes les images, groupe les textes similaires et corrige chaque groupe
+
+    Les frames dont le hash perceptuel est à moins de `dedup_threshold` bits
+    d'une frame déjà traitée réutilisent son résultat OCR (-1 pour désactiver).
+    Les résultats sont aussi conservés dans le cache persistant du dossier cache/
+    et réutilisés lorsque la même image est soumise à nouveau. Les groupes de
+    textes sont corrigés avec au plus `max_concurrency` appels ChatGPT simultanés,
+    ou regroupés dans un minimum d'appels avec `correction_mode="packed"`.
+    `preprocess_mode="adaptive"` limite l'OCR aux bandes de texte de chaque
+    frame, `"fixed"` réduit toute l'image à `scale_percent`. Avec `incremental`,
+    la détection n'est lancée que sur les keyframes et seules les zones de texte
+    modifiées d'une frame à l'autre sont relues. Jusqu'à `prefetch_depth` frames
+    sont lues et prétraitées à l'avance pendant l'OCR de la frame courante
+    (0 pour un traitement séquentiel).
+
+    `frames_dir` peut aussi être un fichier vidéo : une frame est alors décodée
+    en mémoire toutes les `frame_interval` secondes (au plus `max_images`, et
+    seulement aux changements de plan avec `scene_change`), sans passer par
+    des PNG sur le disque.
+
+    Avec `selection="content"`, les `max_images` frames sont choisies d'après
+    les changements de contenu (une par légende ou plan, les plus riches en
+    texte) au lieu d'être prises à intervalle régulier (`"uniform"`).
+
+    La confiance de chaque texte brut est celle du reconnaisseur, obtenue dans
+    la même passe que le texte. Avec `detail`, chaque résultat contient aussi
+    les lignes de sa frame source (boîte dans la frame, texte, confiance).
+
+    Avec `gate`, un groupe n'est envoyé à ChatGPT que si sa meilleure version
+    locale est douteuse (confiance OCR, orthographe fr/en ou désaccord entre
+    les versions, voir CorrectionGate) ; sinon cette version est retenue.
+    """
     # Utiliser le chemin fourni en argument
     image_dir = Path(frames_dir)
-    print(f"[TIMING] Démarrage du traitement à {time.strftime('%H:%M:%S')}")
-    print(f"Traitement des images dans le dossier : {image_dir}")
-    print(f"Mode rapide: {fast_mode}, Redimensionnement: {scale_percent}%, GPU: {use_gpu}")
+    log.info("job_start", frames_dir=str(image_dir), fast=fast_mode, scale=scale_percent, preprocess=preprocess_mode,
+             gpu=use_gpu, incremental=incremental)
     
     total_start_time = time.time()
     
+    # Les métriques sont propres à chaque job (le worker persistant en traite plusieurs)
+    for metric in performance_metrics:
+        performance_metrics[metric] = 0
+    
     if not image_dir.exists():
-        print(f"Erreur : Le dossier {image_dir} n'existe pas")
+        log.error("frames_dir_missing", frames_dir=str(image_dir))
+        record_error(METRICS_SOURCE, "frames_dir")
         return []
     
     # Liste pour stocker tous les textes extraits avec leur frame source
     textes_extraits = []
     frames_sources = {}
+    # Confiance OCR de chaque texte et lignes détaillées de chaque frame source
+    textes_confidences = {}
+    frames_details = {}
     
     # Mesurer le temps d'extraction OCR total
     ocr_start_time = time.time()
     
-    # Récupérer toutes les images à traiter
-    image_paths = sorted(image_dir.glob('*.png'))
-    
-    # Limiter le nombre d'images à traiter si spécifié
-    if max_images and max_images > 0 and len(image_paths) > max_images:
-        print(f"Limitation à {max_images} images sur {len(image_paths)} disponibles")
-        # Prendre les images à intervalle régulier pour couvrir toute la vidéo
-        if len(image_paths) > 1:
-            step = len(image_paths) // max_images
-            image_paths = image_paths[::step][:max_images]
+    video_sampler = None
+    selection_stats = None
+    if is_video_file(str(image_dir)):
+        # Vidéo : frames décodées en mémoire pendant l'OCR, sans PNG intermédiaires
+        if selection == "content":
+            # La sélection lit toute la vidéo une première fois (caractéristiques seulement),
+            # puis l'OCR la relit jusqu'à la dernière frame choisie : deux décodages
+            positions, selection_stats = select_video_positions(str(image_dir), max_images, interval=frame_interval)
+            # Frames déjà choisies selon leurs changements de contenu : pas de second filtre par plan
+            video_sampler = VideoFrameSampler(str(image_dir), interval=frame_interval, scene_change=False,
+                                              positions=positions)
         else:
-            image_paths = image_paths[:max_images]
+            video_sampler = VideoFrameSampler(str(image_dir), interval=frame_interval, max_frames=max_images,
+                                              scene_change=scene_change)
+        frame_items = background_iter(video_sampler, depth=max(1, prefetch_depth))
+        num_images = video_sampler.expected_frames
+        log.info("video", fps=video_sampler.fps, step=video_sampler.step, scene_change=video_sampler.scene_change)
+    else:
+        # Récupérer toutes les images à traiter
+        image_paths = sorted(image_dir.glob('*.png'))
+        
+        # Choisir les images à traiter : selon leur contenu ou à intervalle régulier,
+        # au plus max_images pour couvrir toute la vidéo
+        image_paths, selection_stats = select_frame_paths(image_paths, max_images, mode=selection)
+        frame_items = [(img_path.name, img_path) for img_path in image_paths]
+        num_images = len(image_paths)
     
-    print(f"Traitement de {len(image_paths)} images")
+    if selection_stats is not None:
+        performance_metrics['frames_available'] = selection_stats['frames_available']
+        performance_metrics['selection_time'] = selection_stats['selection_time']
+        performance_metrics['ocr_calls_saved'] = selection_stats['ocr_calls_saved']
+        log.info("selection", mode=selection_stats['mode'], selected=selection_stats['frames_selected'],
+                 available=selection_stats['frames_available'], segments=selection_stats['segments'],
+                 ocr_calls_saved=selection_stats['ocr_calls_saved'], seconds=selection_stats['selection_time'])
+    log.info("frames", count=num_images)
     
     # Déterminer le nombre optimal de processus pour le traitement
-    num_images = len(image_paths)
-    use_hash_detection = num_images > 10  # Désactiver le hachage pour les petits lots (< 10 images)
+    use_hash_detection = dedup_threshold >= 0
+    deduplicator = FrameDeduplicator(threshold=dedup_threshold)
     
     # Ajuster le nombre de processus en fonction des cœurs CPU disponibles
     num_cores = multiprocessing.cpu_count()
-    print(f"Nombre de cœurs CPU disponibles: {num_cores}")
     
     if use_gpu:
         # En mode GPU, limiter à 2 processus pour éviter de saturer la mémoire GPU
         max_workers = min(2, num_images)
-        print(f"Mode GPU: utilisation de {max_workers} processus")
     else:
         # En mode CPU, adapter selon le nombre de cœurs (utiliser 75% des cœurs disponibles)
         max_workers = max(1, min(num_images, int(num_cores * 0.75)))
-        print(f"Mode CPU: utilisation de {max_workers} processus sur {num_cores} cœurs disponibles")
+    log.debug("workers", cores=num_cores, processes=max_workers, gpu=use_gpu)
     
     # *** OPTIMISATION 1: INITIALISER LE MODÈLE UNE SEULE FOIS ***
-    print("[TIMING] Initialisation unique du modèle EasyOCR...")
-    init_start = time.time()
-    
-    # Initialiser EasyOCR avec les paramètres optimisés
-    easyocr_reader = easyocr.Reader(
-        ['fr','en'], 
-        gpu=use_gpu,
-        quantize=not use_gpu,
-        recognizer=True,
-        download_enabled=False,
-        detector=True,
-        cudnn_benchmark=use_gpu
-    )
-    
-    init_time = time.time() - init_start
-    print(f"[TIMING] Initialisation du modèle terminée en {init_time:.2f}s")
+    # (déjà chargé par un job précédent en mode worker)
+    easyocr_reader, init_time = get_reader(use_gpu)
+    performance_metrics['model_load_time'] = init_time
     
     # Paramètres communs pour l'OCR
     batch_size = 8 if use_gpu else 1
     canvas_size = 2048 if use_gpu else 1024
     
     # Options spéciales pour accélérer le traitement
-    if fast_mode:
-        print("Mode rapide activé: paramètres OCR optimisés pour la vitesse")
+    # Cache persistant des résultats OCR, partagé avec service.py
+    ocr_cache = create_cache_from_env() if use_cache else None
+    cache_params = {
+        "scale_percent": scale_percent,
+        "preprocess": preprocess_mode,
+        "canvas_size": canvas_size,
+        "langs": READER_LANGS,
+        **OCR_PARAMS
+    }
+    
+    # Réutilisation des boîtes détectées d'une frame à l'autre (mode incrémental)
+    tracker = None
+    if incremental:
+        detect_params = {key: OCR_PARAMS[key] for key in DETECT_PARAM_KEYS}
+        
+        def detect(image):
+            horizontal_agg, free_agg = easyocr_reader.detect(
+                cv2.cvtColor(image, cv2.COLOR_GRAY2BGR),
+                reformat=False,
+                canvas_size=canvas_size,
+                **detect_params
+            )
+            return horizontal_agg[0], free_agg[0]
+        
+        tracker = DetectionTracker(detect)
+    
+    # *** OPTIMISATION 2: DÉDOUBLONNAGE DES FRAMES PAR HASH PERCEPTUEL ***
+    # Les frames quasi identiques (meme statique) réutilisent le résultat d'une frame précédente
+    log.debug("ocr_start", elapsed=time.time() - total_start_time)
+    
+    def load_frame(item):
+        """Lecture, clé de cache, hash et prétraitement d'une frame (threads de préchargement)"""
+        _, source = item
+        if isinstance(source, np.ndarray):
+            image = source  # Frame vidéo déjà décodée (temps compté dans video_decode_time)
+        else:
+            decode_start = time.time()
+            image = cv2.imread(str(source))
+            observe_stage(METRICS_SOURCE, "decode", time.time() - decode_start)
+        frame = {"image": image, "cache_key": None, "cached": None,
+                 "frame_hash": None, "hash_time": 0, "preprocessed": None, "preprocess_info": None, "preproc_time": 0}
+        if image is None:
+            return frame
+        if ocr_cache is not None:
+            frame["cache_key"] = OCRResultCache.make_key(image, cache_params)
+            frame["cached"] = ocr_cache.get(frame["cache_key"])
+            if frame["cached"] is not None and detail and "lines" not in frame["cached"]:
+                frame["cached"] = None  # Entrée antérieure sans boîtes ni confiances
+            if frame["cached"] is not None:
+                return frame
+        if use_hash_detection:
+            hash_start = time.time()
+            frame["frame_hash"] = get_image_hash(image)
+            frame["hash_time"] = time.time() - hash_start
+        preproc_start = time.time()
+        frame["preprocessed"], frame["preprocess_info"] = preprocess_image(
+            str(source), scale_percent=scale_percent, image=image, mode=preprocess_mode
+        )
+        frame["preproc_time"] = time.time() - preproc_start
+        return frame
     
-    # *** OPTIMISATION 2: TRAITEMENT SANS HACHAGE POUR LES PETITS LOTS ***
-    # Traiter les images directement puisque le lot est petit
-    print(f"[TIMING] Début traitement OCR à {time.time() - total_start_time:.2f}s")
+    # *** OPTIMISATION 3: PIPELINE LECTURE/PRÉTRAITEMENT → OCR ***
+    # Les frames suivantes sont décodées et prétraitées pendant l'OCR de la frame courante
+    # (avec --profile, lecture séquentielle dans le thread profilé : un seul cProfile par processus)
+    if active_profiler() is not None:
+        prefetch_depth = 0
+    prefetcher = FramePrefetcher(frame_items, load_frame, depth=prefetch_depth)
     
-    # Traiter les images séquentiellement avec le même modèle EasyOCR
-    for i, img_path in enumerate(image_paths):
+    # Traiter les images dans l'ordre avec le même modèle EasyOCR
+    for i, ((frame_name, source), frame, load_error) in enumerate(prefetcher):
         try:
             process_start = time.time()
+            if load_error is not None:
+                raise load_error
+            
+            cache_key = frame["cache_key"]
+            cached = frame["cached"]
+            if cached is not None:
+                texte = "\n".join(cached["texts"])
+                performance_metrics['cache_hits'] += 1
+                performance_metrics['ocr_time_saved'] += cached["ocr_time"]
+                CACHE_HITS.inc(source=METRICS_SOURCE, cache="ocr")
+                log.debug("cache_hit", frame=i + 1, frames=num_images)
+                if texte.strip():
+                    textes_extraits.append(texte)
+                    frames_sources.setdefault(texte, frame_name)
+                    if "paragraphs" in cached:
+                        textes_confidences.setdefault(texte, text_confidence(cached))
+                        frames_details.setdefault(frame_name, cached)
+                continue
+            
+            frame_hash = frame["frame_hash"]
+            if frame_hash is not None:
+                duplicate = deduplicator.find(frame_hash)
+                performance_metrics['hashing_time'] += frame["hash_time"]
+                
+                if duplicate is not None:
+                    texte, duplicate_ocr_time = duplicate
+                    performance_metrics['frames_skipped'] += 1
+                    performance_metrics['ocr_time_saved'] += duplicate_ocr_time
+                    DEDUP_SKIPS.inc(source=METRICS_SOURCE)
+                    log.debug("duplicate_frame", frame=i + 1, frames=num_images)
+                    if texte.strip():
+                        textes_extraits.append(texte)
+                    continue
             
-            # Prétraiter l'image
-            preproc_start = time.time()
-            preprocessed_img = preprocess_image(str(img_path), scale_percent=scale_percent)
-            preproc_time = time.time() - preproc_start
-            print(f"[TIMING] Prétraitement image {i+1}: {preproc_time:.2f}s")
+            # Image prétraitée en avance par le pipeline
+            preprocessed_img = frame["preprocessed"]
+            preproc_time = frame["preproc_time"]
             
             if preprocessed_img is not None:
                 # Effectuer l'OCR avec le modèle préchargé
                 ocr_start = time.time()
-                result = easyocr_reader.readtext(
-                    preprocessed_img,
-                    detail=0,
-                    paragraph=True,
-                    batch_size=batch_size,
-                    min_size=10,
-                    contrast_ths=0.3,
-                    adjust_contrast=0.5,
-                    text_threshold=0.6,
-                    link_threshold=0.3,
-                    width_ths=0.5,
-                    low_text=0.3,
-                    canvas_size=canvas_size
-                )
+                if tracker is not None:
+                    lines = ocr_incremental(easyocr_reader, tracker, i, preprocessed_img,
+                                            batch_size=batch_size, canvas_size=canvas_size)
+                else:
+                    lines = easyocr_reader.readtext(
+                        preprocessed_img,
+                        detail=1,           # Boîtes et confiances de chaque ligne
+                        paragraph=False,    # Paragraphes regroupés par build_frame_result
+                        batch_size=batch_size,
+                        canvas_size=canvas_size,
+                        **OCR_PARAMS
+                    )
                 ocr_time = time.time() - ocr_start
-                print(f"[TIMING] OCR image {i+1}: {ocr_time:.2f}s")
                 
-                # Convertir le résultat en texte
-                texte = "\n".join(result) if isinstance(result, list) else str(result)
+                # Paragraphes, boîtes dans la frame d'origine et confiances
+                frame_result = build_frame_result(lines, frame["preprocess_info"])
+                texte = "\n".join(frame_result["texts"])
+                
+                if cache_key is not None:
+                    ocr_cache.put(cache_key, {**frame_result, "ocr_time": ocr_time})
                 
                 # Libérer la mémoire
                 del preprocessed_img
+                frame["preprocessed"] = None
             else:
                 # Fallback sur l'image originale
                 ocr_start = time.time()
-                result = easyocr_reader.readtext(
-                    str(img_path),
-                    detail=0,
-                    paragraph=True,
+                lines = easyocr_reader.readtext(
+                    str(source),
+                    detail=1,
+                    paragraph=False,
                     batch_size=batch_size,
                     text_threshold=0.6
                 )
                 ocr_time = time.time() - ocr_start
-                print(f"[TIMING] OCR fallback image {i+1}: {ocr_time:.2f}s")
                 
-                texte = "\n".join(result) if isinstance(result, list) else str(result)
+                frame_result = build_frame_result(lines)
+                texte = "\n".join(frame_result["texts"])
             
             process_total = time.time() - process_start
-            print(f"[TIMING] Image {i+1}/{len(image_paths)}: OCR={ocr_time:.2f}s, Total={process_total:.2f}s")
+            log.debug("frame_ocr", frame=i + 1, frames=num_images, preprocess=preproc_time, ocr=ocr_time,
+                      total=process_total)
             
             # Mise à jour des métriques
             performance_metrics['ocr_time'] += ocr_time
             performance_metrics['preprocessing_time'] += preproc_time
             performance_metrics['images_processed'] += 1
+            observe_stage(METRICS_SOURCE, "preprocess", preproc_time)
+            observe_stage(METRICS_SOURCE, "ocr", ocr_time)
+            
+            if frame_hash is not None:
+                deduplicator.add(frame_hash, (texte, ocr_time))
             
             if texte.strip():  # Ne garder que les textes non vides
                 textes_extraits.append(texte)
-                frames_sources[texte] = img_path.name
-                print(f"Texte extrait de l'image {i+1}: {texte[:100]}..." if len(texte) > 100 else f"Texte extrait: {texte}")
-                    else:
-                print(f"Aucun texte extrait de l'image {i+1}")
-                        
-            except Exception as e:
-            print(f"Erreur lors du traitement de {img_path}: {str(e)}")
+                frames_sources[texte] = frame_name
+                textes_confidences[texte] = text_confidence(frame_result)
+                frames_details[frame_name] = frame_result
+            log.debug("frame_text", frame=i + 1, text=texte[:100])
+                
+        except Exception as e:
+            log.error("frame_error", frame=frame_name, error=str(e))
+            record_error(METRICS_SOURCE, "frame")
         
         # Libérer la mémoire GPU explicitement après chaque image
         if use_gpu and torch.cuda.is_available():
             torch.cuda.empty_cache()
         
         # Force garbage collection
-            import gc
-            gc.collect()
-    
-    # Libérer le modèle EasyOCR après utilisation
-    del easyocr_reader
+        import gc
+        gc.collect()
     
     ocr_total_time = time.time() - ocr_start_time
-    print(f"[TIMING] Traitement OCR terminé en {ocr_total_time:.2f}s")
+    log.info("ocr_done", seconds=ocr_total_time, processed=performance_metrics['images_processed'],
+             cache_hits=performance_metrics['cache_hits'], frames_skipped=performance_metrics['frames_skipped'])
+    
+    if video_sampler is not None:
+        video_stats = video_sampler.stats()
+        num_images = video_stats['frames_kept']
+        performance_metrics['video_decode_time'] = video_stats['decode_time']
+        performance_metrics['video_frames_read'] = video_stats['frames_read']
+        observe_stage(METRICS_SOURCE, "decode", video_stats['decode_time'])
+        log.info("video_decoded", frames_read=video_stats['frames_read'], frames_kept=num_images,
+                 scene_skipped=video_stats['scene_skipped'], seconds=video_stats['decode_time'])
+    FRAMES.inc(num_images, source=METRICS_SOURCE)
+    
+    # Occupation de chaque étage du pipeline : préparation des frames et OCR
+    prefetch_stats = prefetcher.stats()
+    performance_metrics['prefetch_depth'] = prefetch_stats['depth']
+    performance_metrics['prefetch_wait_time'] = prefetch_stats['wait_time']
+    performance_metrics['prefetch_utilization'] = prefetch_stats['utilization']
+    performance_metrics['ocr_utilization'] = performance_metrics['ocr_time'] / ocr_total_time if ocr_total_time > 0 else 0
     
     # Regrouper les textes similaires
-    print("\nRegroupement des textes similaires...")
     grouping_start = time.time()
     
     if textes_extraits:
         # Utiliser un seuil de similitude (0.7 est un bon compromis)
         groupes_textes = group_similar_texts(textes_extraits, threshold=0.7)
         grouping_time = time.time() - grouping_start
-        print(f"[TIMING] Regroupement terminé en {grouping_time:.2f}s - {len(groupes_textes)} groupes de textes identifiés")
+        observe_stage(METRICS_SOURCE, "group", grouping_time)
+        log.info("grouped", seconds=grouping_time, texts=len(textes_extraits), groups=len(groupes_textes))
         
         # Correction des groupes avec ChatGPT
         gpt_start_time = time.time()
         results = []
         
+        def ocr_confidence(texte, default):
+            """Confiance du reconnaisseur pour un texte (`default` si elle n'est pas connue)"""
+            confidence = textes_confidences.get(texte)
+            return default if confidence is None else round(confidence, 4)
+        
+        def with_detail(result, texte):
+            """Ajoute les lignes de la frame source du texte si `detail` est demandé"""
+            if detail:
+                result["lines"] = frames_details.get(frames_sources.get(texte), {}).get("lines", [])
+            return result
+        
+        # Pour les groupes de textes similaires, utiliser ChatGPT pour obtenir la meilleure version
+        # Les appels sont lancés en parallèle, les résultats restent dans l'ordre des groupes
+        # Filtre local : les groupes déjà fiables ne sont pas envoyés à ChatGPT
+        gate_stats = new_gate_stats()
+        decisions = {}
+        if gate:
+            for i, groupe in enumerate(groupes_textes):
+                if len(groupe) > 1:
+                    decisions[i] = correction_gate.decide(groupe, [textes_confidences.get(texte) for texte in groupe])
+                    record_decision(gate_stats, decisions[i])
+            performance_metrics['groups_corrected_locally'] = gate_stats['local']
+            performance_metrics['correction_time_saved'] = gate_stats['saved_seconds']
+            log.info("correction_gate", local=gate_stats['local'], groups=gate_stats['groups'],
+                     reasons=gate_stats['reasons'], saved_seconds=gate_stats['saved_seconds'])
+        groupes_a_corriger = [groupe for i, groupe in enumerate(groupes_textes)
+                              if len(groupe) > 1 and decisions.get(i, {}).get("use_llm", True)]
+        performance_metrics['groups_sent_to_llm'] = len(groupes_a_corriger)
+        if correction_mode == "packed":
+            outcomes, packed_stats = correct_groups_with_chatgpt_packed(groupes_a_corriger)
+            log.info("packed_correction", groups=len(groupes_a_corriger), chunks=packed_stats['chunks'],
+                     prompt_tokens=packed_stats['prompt_tokens'], completion_tokens=packed_stats['completion_tokens'],
+                     fallback_groups=packed_stats['fallback_groups'], failed_groups=packed_stats['failed_groups'])
+            corrections = iter(outcomes)
+        else:
+            log.info("correction_start", groups=len(groupes_a_corriger), max_concurrency=max_concurrency)
+            corrections = iter(run_concurrently(groupes_a_corriger, correct_text_with_chatgpt, max_concurrency=max_concurrency))
+        
         for i, groupe in enumerate(groupes_textes):
-            group_start_time = time.time()
-            print(f"\nTraitement du groupe {i+1}/{len(groupes_textes)}")
-            
-            if len(groupe) > 1:
-                # Pour les groupes de textes similaires, utiliser ChatGPT pour obtenir la meilleure version
-                print(f"Correction de {len(groupe)} textes similaires avec ChatGPT")
-                try:
-                    corrected_text = correct_text_with_chatgpt(groupe)
-                    
+            decision = decisions.get(i)
+            gate_info = {key: value for key, value in decision.items() if key != "text"} if decision else None
+            if decision is not None and not decision["use_llm"]:
+                # Version locale fiable : pas d'appel à ChatGPT
+                text = decision["text"]
+                log.debug("group_kept", group=i + 1, text=text[:100])
+                results.append(with_detail({
+                    "text": text,
+                    "text_type": "consensus",
+                    "image": frames_sources.get(text, frames_sources.get(groupe[0], "inconnu")),
+                    "confidence": ocr_confidence(text, ocr_confidence(groupe[0], 0.8)),
+                    "original_texts": groupe,
+                    "gate": gate_info,
+                    "is_significant": True
+                }, text if text in frames_sources else groupe[0]))
+            elif len(groupe) > 1:
+                corrected_text, error = next(corrections)
+                if error is None:
                     # Trouver l'image source représentative (prendre celle du premier texte du groupe)
                     source_image = frames_sources.get(groupe[0], "inconnu")
-                    
-                    print(f"Texte corrigé: {corrected_text[:100]}..." if len(corrected_text) > 100 else f"Texte corrigé: {corrected_text}")
-                    results.append({
+                    log.debug("group_corrected", group=i + 1, text=corrected_text[:100])
+                    results.append(with_detail({
                         "text": corrected_text,
                         "text_type": "corrected",
                         "image": source_image,
                         "confidence": 0.95,  # Confiance élevée car corrigé par IA
+                        "ocr_confidence": ocr_confidence(groupe[0], None),
                         "original_texts": groupe,
+                        "gate": gate_info,
                         "is_significant": True
-                    })
-                except Exception as e:
-                    print(f"Erreur lors de la correction avec ChatGPT: {str(e)}")
+                    }, groupe[0]))
+                else:
+                    log.error("correction_error", group=i + 1, error=str(error))
+                    record_error(METRICS_SOURCE, "correction")
                     
-                    # En cas d'erreur, utiliser le premier texte du groupe
-                    source_image = frames_sources.get(groupe[0], "inconnu")
-                    results.append({
-                        "text": groupe[0],
-                        "text_type": "raw",
-                        "image": source_image,
-                        "confidence": 0.8,  # Confiance plus faible car non corrigé
+                    # En cas d'erreur, fusion locale des versions du groupe (vote pondéré par la confiance)
+                    merged_text, merge_stats = merge_texts(groupe, [textes_confidences.get(texte) for texte in groupe])
+                    center = groupe[merge_stats["center"] or 0]
+                    results.append(with_detail({
+                        "text": merged_text,
+                        "text_type": "consensus",
+                        "image": frames_sources.get(center, "inconnu"),
+                        "confidence": ocr_confidence(center, 0.8),  # Confiance du reconnaisseur
+                        "original_texts": groupe,
+                        "fallback": "local_merge",
+                        "gate": gate_info,
                         "is_significant": True
-                    })
+                    }, center))
             else:
                 # Pour les textes uniques, les ajouter tels quels
                 text = groupe[0]
@@ -417,86 +753,114 @@ def process_images(frames_dir, max_images=40, scale_percent=30, fast_mode=True,
                 # Filtrer les textes non significatifs (trop courts ou sans sens)
                 is_significant = len(text.strip()) > 3  # Plus de 3 caractères
                 
-                results.append({
+                results.append(with_detail({
                     "text": text,
                     "text_type": "raw",
                     "image": source_image,
-                    "confidence": 0.7,  # Confiance moyenne pour les textes non corrigés
+                    "confidence": ocr_confidence(text, 0.7),  # Confiance du reconnaisseur
                     "is_significant": is_significant
-                })
-            
-            group_time = time.time() - group_start_time
-            print(f"[TIMING] Groupe {i+1} traité en {group_time:.2f}s")
+                }, text))
         
         gpt_total_time = time.time() - gpt_start_time
-        print(f"[TIMING] Correction GPT terminée en {gpt_total_time:.2f}s")
+        observe_stage(METRICS_SOURCE, "correct", gpt_total_time)
+        log.info("correction_done", seconds=gpt_total_time, groups=len(groupes_a_corriger))
     else:
-        print("Aucun texte extrait, pas de correction ChatGPT nécessaire")
+        log.info("no_text")
         results = []
         
     total_time = time.time() - total_start_time
     
     # Mettre à jour les métriques finales
     performance_metrics['total_time'] = total_time
-    performance_metrics['unique_images'] = len(image_paths)
-    
-    # Afficher les statistiques
-    print("\n--- Statistiques de performance ---")
-    print(f"Mode GPU: {use_gpu}")
-    print(f"Images totales: {len(image_paths)}")
-    print(f"Temps d'initialisation du modèle: {init_time:.2f}s")
-    print(f"Temps de prétraitement: {performance_metrics['preprocessing_time']:.2f}s")
-    print(f"Temps OCR: {performance_metrics['ocr_time']:.2f}s")
-    if 'grouping_time' in locals():
-        print(f"Temps de regroupement: {grouping_time:.2f}s")
-    if 'gpt_total_time' in locals():
-        print(f"Temps de correction GPT: {gpt_total_time:.2f}s")
-    print(f"Temps total: {performance_metrics['total_time']:.2f}s")
-    if performance_metrics['images_processed'] > 0:
-        print(f"Moyenne par image: {performance_metrics['ocr_time']/performance_metrics['images_processed']:.2f}s")
-    
-    print("\n[TIMING] Répartition du temps:")
-    print(f"- Initialisation: {init_time:.2f}s ({(init_time/total_time)*100:.1f}%)")
-    print(f"- OCR: {ocr_total_time:.2f}s ({(ocr_total_time/total_time)*100:.1f}%)")
+    performance_metrics['unique_images'] = num_images - performance_metrics['frames_skipped'] - performance_metrics['cache_hits']
+    if tracker is not None:
+        tracking = tracker.stats()
+        for metric in ('detections_skipped', 'detector_skip_rate', 'detection_time_saved', 'recognition_time_saved'):
+            performance_metrics[metric] = tracking[metric]
+    
+    observe_stage(METRICS_SOURCE, "total", total_time)
+    
+    # Résumé du job : un seul événement, champs absents lorsque l'étape n'a pas eu lieu
+    summary = {
+        "gpu": use_gpu,
+        "frames": num_images,
+        "model_load": init_time,
+        "preprocess": performance_metrics['preprocessing_time'],
+        "ocr": performance_metrics['ocr_time'],
+        "prefetch_depth": prefetch_stats['depth'],
+        "prefetch_wait": prefetch_stats['wait_time'],
+        "prefetch_utilization": prefetch_stats['utilization'],
+        "ocr_utilization": performance_metrics['ocr_utilization'],
+        "total": total_time
+    }
+    if ocr_cache is not None:
+        cache_stats = ocr_cache.stats()
+        summary.update(cache_hits=performance_metrics['cache_hits'], cache_entries=cache_stats['entries'])
+    if use_hash_detection:
+        summary.update(frames_skipped=performance_metrics['frames_skipped'], hashing=performance_metrics['hashing_time'],
+                       ocr_saved=performance_metrics['ocr_time_saved'])
+    if tracker is not None:
+        summary.update(detections_skipped=performance_metrics['detections_skipped'],
+                       detector_skip_rate=performance_metrics['detector_skip_rate'],
+                       detection_saved=performance_metrics['detection_time_saved'],
+                       recognition_saved=performance_metrics['recognition_time_saved'])
+    if performance_metrics['groups_corrected_locally']:
+        summary.update(groups_local=performance_metrics['groups_corrected_locally'],
+                       groups_sent=performance_metrics['groups_sent_to_llm'],
+                       correction_saved=performance_metrics['correction_time_saved'])
+    log.info("job_summary", **summary)
+    
+    # Part du temps total passée dans chaque étape
+    breakdown = {"model_load": init_time, "ocr": ocr_total_time}
     if 'grouping_time' in locals():
-        print(f"- Regroupement: {grouping_time:.2f}s ({(grouping_time/total_time)*100:.1f}%)")
+        breakdown["group"] = grouping_time
     if 'gpt_total_time' in locals():
-        print(f"- Correction GPT: {gpt_total_time:.2f}s ({(gpt_total_time/total_time)*100:.1f}%)")
-    print("-----------------------------------")
+        breakdown["correct"] = gpt_total_time
+    if total_time > 0:
+        log.info("time_breakdown", **{f"{stage}_share": seconds / total_time for stage, seconds in breakdown.items()})
     
     return results
 
-def are_texts_similar(text1, text2, threshold=0.7):
-    """Détermine si deux textes sont similaires en utilisant la similarité de séquence."""
-    similarity = difflib.SequenceMatcher(None, text1, text2).ratio()
-    return similarity >= threshold
+def correct_text_with_chatgpt(texts):
+    """Utilise ChatGPT pour corriger un groupe de textes similaires.
 
-def group_similar_texts(texts, threshold=0.7):
-    """Groupe les textes similaires ensemble."""
-    if not texts:
-        return []
-        
-    groups = []
-    processed = [False] * len(texts)
-    
-    for i in range(len(texts)):
-        if processed[i]:
-            continue
-            
-        current_group = [texts[i]]
-        processed[i] = True
-        
-        for j in range(i + 1, len(texts)):
-            if not processed[j] and are_texts_similar(texts[i], texts[j], threshold):
-                current_group.append(texts[j])
-                processed[j] = True
-                
-        groups.append(current_group)
-        
-    return groups
+    Les corrections déjà obtenues (y compris lors d'exécutions précédentes)
+    sont réutilisées depuis le cache des corrections.
+    """
+    key = correction_cache.make_key(texts, CORRECTION_MODEL)
+    corrected, source, saved_seconds = correction_cache.get_or_compute(
+        key, lambda: request_chatgpt_correction(texts)
+    )
+    count_correction_cache_hit(source, saved_seconds)
+    return corrected
 
-def correct_text_with_chatgpt(texts):
-    """Utilise ChatGPT pour corriger un groupe de textes similaires."""
+def count_correction_cache_hit(source, saved_seconds):
+    """Compte une correction servie par le cache (ou partagée avec un appel en cours)"""
+    if source != "upstream":
+        CACHE_HITS.inc(source=METRICS_SOURCE, cache="correction")
+        log.debug("correction_cache_hit", saved_seconds=saved_seconds)
+
+def correct_groups_with_chatgpt_packed(groupes):
+    """Corrige les groupes absents du cache avec un minimum d'appels groupés à ChatGPT.
+
+    Retourne un couple (correction, erreur) par groupe, comme run_concurrently.
+    """
+    return correct_groups_cached(groupes, correction_cache, CORRECTION_MODEL, request_packed_correction,
+                                 correct_text_with_chatgpt, on_lookup=count_correction_cache_hit)
+
+def request_packed_correction(messages, max_tokens):
+    """Appelle l'API ChatGPT avec le prompt groupé de plusieurs groupes"""
+    response = call_with_retry(lambda: get_client().chat.completions.create(
+        model=CORRECTION_MODEL,
+        messages=messages,
+        temperature=0.1,
+        max_tokens=max_tokens,
+        top_p=0.95
+    ))
+    return response.choices[0].message.content, response.usage
+
+def request_chatgpt_correction(texts):
+    """Appelle l'API ChatGPT pour corriger un groupe de textes similaires."""
     start_time = time.time()
     
     # Prompt plus concis pour réduire les tokens
@@ -505,37 +869,132 @@ def correct_text_with_chatgpt(texts):
         {"role": "user", "content": "\n---\n".join(texts)}
     ]
 
-    print(f"[TIMING] Début appel API ChatGPT pour {len(texts)} textes")
-    print(f"[TIMING] Nombre de tokens d'entrée approximatif: {len(' '.join(texts)) // 4}")
+    log.debug("chatgpt_call", texts=len(texts), approx_tokens=len(' '.join(texts)) // 4)
     
     # Utiliser gpt-3.5-turbo-instruct pour des réponses plus rapides
     api_start = time.time()
+    model = CORRECTION_MODEL
     
-    # Options: gpt-3.5-turbo (équilibré), gpt-3.5-turbo-instruct (plus rapide)
-    model = "gpt-3.5-turbo"  # Essayer avec le modèle standard qui est souvent plus rapide
-    
-    response = client.chat.completions.create(
+    response = call_with_retry(lambda: get_client().chat.completions.create(
         model=model,
         messages=messages,
         temperature=0.1,  # Très bas pour plus de cohérence
         max_tokens=100,   # Réduire pour plus de rapidité
         top_p=0.95        # Réduire la randomisation
-    )
+    ))
     
     api_time = time.time() - api_start
     gpt_time = time.time() - start_time
-    print(f"[TIMING] API ChatGPT ({model}): appel={api_time:.2f}s, total={gpt_time:.2f}s")
+    log.debug("chatgpt_done", model=model, api=api_time, total=gpt_time)
+    correction_gate.record_call(gpt_time)
 
     return response.choices[0].message.content
 
+def write_results(frames_dir, results):
+    """Écrit les résultats dans ocr/easyocr_results.json à côté du dossier de frames (ou de la vidéo)"""
+    # Créer le dossier ocr s'il n'existe pas
+    output_dir = os.path.join(os.path.dirname(frames_dir), "ocr")
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Écrire les résultats dans un fichier JSON pour que le serveur Node.js puisse les lire
+    output_file = os.path.join(output_dir, "easyocr_results.json")
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return output_file
+
+def log_profile(profile):
+    """Fichiers écrits et fonctions les plus coûteuses d'un job profilé"""
+    log.info("profile", id=profile["id"], status=profile["status"], wall_time=profile["wall_time"],
+             torch=profile.get("torch"), **profile["files"])
+    for rank, hotspot in enumerate(profile.get("by_self_time", [])[:5], 1):
+        log.info("hotspot", rank=rank, **hotspot)
+    if "error" in profile:
+        log.error("profile_error", error=profile["error"])
+
+def run_job(job):
+    """Traite un dossier de frames décrit par un job et écrit ses résultats.
+
+    Les clés du job reprennent les options de la ligne de commande. Retourne le
+    fichier de résultats, les résultats et les métriques du job, dont sa durée
+    (`job_time`) et le temps de chargement du modèle (`model_load_time`, nul
+    lorsque le worker a déjà chargé le reader). Avec `metrics`, la réponse
+    contient aussi les histogrammes et compteurs du processus (cumulés sur
+    tous les jobs d'un worker persistant). Avec `profile`, le job est profilé
+    (cProfile et torch.profiler, fichiers nommés d'après l'identifiant du job
+    ou le dossier de frames) et la réponse contient le résumé des fonctions
+    les plus coûteuses.
+    """
+    job_start = time.time()
+    frames_dir = job['frames_dir']
+    profiler = None
+    if job.get('profile'):
+        profiler = RequestProfiler(make_profile_id(job.get('id') or Path(frames_dir).stem))
+    with profiler or nullcontext():
+        results = process_images(frames_dir,
+                                 max_images=job.get('max_images', 40),
+                                 scale_percent=job.get('scale', 30),
+                                 fast_mode=job.get('fast', True),
+                                 use_gpu=job.get('gpu', gpu_enabled),
+                                 dedup_threshold=job.get('dedup_threshold', 4),
+                                 use_cache=job.get('use_cache', True),
+                                 max_concurrency=job.get('max_concurrency', MAX_CONCURRENCY),
+                                 correction_mode=job.get('correction_mode', 'per_group'),
+                                 preprocess_mode=job.get('preprocess', PREPROCESS_MODE),
+                                 incremental=job.get('incremental', DETECTION_REUSE_ENABLED),
+                                 prefetch_depth=job.get('prefetch_depth', PREFETCH_DEPTH),
+                                 frame_interval=job.get('frame_interval', FRAME_INTERVAL),
+                                 scene_change=job.get('scene_change', SCENE_CHANGE_ENABLED),
+                                 selection=job.get('selection', SELECTION_MODE),
+                                 detail=job.get('detail', False),
+                                 gate=job.get('gate', GATE_ENABLED))
+    output_file = write_results(frames_dir, results)
+    job_time = time.time() - job_start
+    log.info("job_done", seconds=job_time, model_load=performance_metrics['model_load_time'])
+    
+    # Libérer la mémoire GPU entre deux jobs
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    import gc
+    gc.collect()
+    
+    response = {
+        "output_file": output_file,
+        "results": results,
+        "performance": {**performance_metrics, "job_time": job_time}
+    }
+    if job.get('metrics'):
+        response["metrics"] = metrics.to_dict()
+    if profiler is not None:
+        response["profile"] = profiler.report()
+        log_profile(response["profile"])
+    return response
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Analyse OCR des images avec EasyOCR et OpenAI')
-    parser.add_argument('frames_dir', help='Chemin vers le dossier contenant les frames')
+    parser.add_argument('frames_dir', nargs='?', help='Chemin vers le dossier contenant les frames, ou vers une vidéo')
     parser.add_argument('--lang', default='fra', help='Langue à utiliser pour l\'OCR')
     parser.add_argument('--gpu', default='True', help='Utiliser le GPU pour EasyOCR (True/False)')
-    parser.add_argument('--scale', type=int, default=30, help='Pourcentage de redimensionnement des images (30 = 30%)')
-    parser.add_argument('--max-images', type=int, default=40, help='Nombre maximum d\'images à traiter (0 = toutes)')
+    parser.add_argument('--scale', type=int, default=30, help='Pourcentage de redimensionnement des images (30 = 30%%)')
+    parser.add_argument('--max-images', type=int, default=40, help='Nombre maximum d\'images à traiter (0 = toutes en sélection uniforme, une par segment en sélection par contenu)')
     parser.add_argument('--fast', action='store_true', help='Mode rapide avec paramètres optimisés')
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY, help='Nombre maximum d\'appels ChatGPT simultanés')
+    parser.add_argument('--correction-mode', choices=['per_group', 'packed'], default='per_group', help='Un appel ChatGPT par groupe ou un appel groupé pour tous les groupes')
+    parser.add_argument('--no-cache', action='store_true', help='Désactiver le cache persistant des résultats OCR')
+    parser.add_argument('--dedup-threshold', type=int, default=4, help='Distance de Hamming maximale entre deux frames considérées identiques (-1 = désactivé)')
+    parser.add_argument('--preprocess', choices=['adaptive', 'fixed'], default=PREPROCESS_MODE, help='Prétraitement guidé par les bandes de texte ou réduction fixe de toute l\'image à --scale')
+    parser.add_argument('--incremental', action=argparse.BooleanOptionalAction, default=DETECTION_REUSE_ENABLED, help='Détection sur les keyframes seulement, relecture des seules zones de texte modifiées')
+    parser.add_argument('--prefetch-depth', type=int, default=PREFETCH_DEPTH, help='Frames lues et prétraitées à l\'avance pendant l\'OCR (0 = séquentiel)')
+    parser.add_argument('--frame-interval', type=float, default=FRAME_INTERVAL, help='Vidéo : secondes entre deux frames échantillonnées')
+    parser.add_argument('--scene-change', action=argparse.BooleanOptionalAction, default=SCENE_CHANGE_ENABLED, help='Vidéo en sélection uniforme : ne garder que les frames qui changent de plan (la sélection par contenu découpe déjà par plan)')
+    parser.add_argument('--selection', choices=['content', 'uniform'], default=SELECTION_MODE, help='Choix des --max-images frames : selon les changements de contenu ou à intervalle régulier')
+    parser.add_argument('--detail', action='store_true', help='Ajouter aux résultats les lignes de la frame source (boîte, texte, confiance)')
+    parser.add_argument('--no-gate', action='store_true', default=not GATE_ENABLED, help='Envoyer tous les groupes à ChatGPT, même ceux dont la lecture est déjà fiable')
+    parser.add_argument('--serve', action='store_true', help='Worker persistant : charge le modèle une fois puis traite un job JSON par ligne (stdin/stdout, ou --socket)')
+    parser.add_argument('--socket', default=WORKER_SOCKET, help='Socket Unix du worker persistant (en mode client, repli sur un traitement local si aucun worker n\'écoute)')
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], type=str.upper, help='Niveau du journal (par défaut OCR_LOG_LEVEL ; DEBUG pour le détail de chaque frame)')
+    parser.add_argument('--log-format', choices=['text', 'json'], help='Journal lisible ou une ligne JSON par événement (par défaut OCR_LOG_FORMAT)')
+    parser.add_argument('--profile', action='store_true', help='Profiler le job (cProfile et torch.profiler) : profils écrits dans OCR_PROFILE_DIR, fonctions les plus coûteuses dans le journal')
+    parser.add_argument('--metrics-json', help='Écrire dans ce fichier les histogrammes par étape et les compteurs du job (JSON)')
     
     args = parser.parse_args()
     
@@ -543,29 +1002,72 @@ if __name__ == "__main__":
     import sys
     import codecs
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer)
+    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer)
+    configure_logging(args.log_level, args.log_format)
     
-    try:
     # Mise à jour de la configuration GPU en fonction de l'argument passé
-        # Utiliser une approche différente: créer une nouvelle variable au lieu de modifier gpu_enabled
-        use_gpu = args.gpu.lower() == 'true'
-        print(f"GPU activé pour EasyOCR: {use_gpu}")
+    # Utiliser une approche différente: créer une nouvelle variable au lieu de modifier gpu_enabled
+    use_gpu = args.gpu.lower() == 'true'
     
-    frames_dir = args.frames_dir
-        
-        # Utiliser la variable locale au lieu de la variable globale
-        # On passe l'état GPU en paramètre à la fonction process_images
-        results = process_images(frames_dir, max_images=args.max_images, scale_percent=args.scale, fast_mode=args.fast, use_gpu=use_gpu)
-    
-    # Créer le dossier ocr s'il n'existe pas
-    output_dir = os.path.join(os.path.dirname(frames_dir), "ocr")
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Écrire les résultats dans un fichier JSON pour que le serveur Node.js puisse les lire
-    output_file = os.path.join(output_dir, "easyocr_results.json")
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    def load_reader():
+        """Charge le modèle du worker avant son premier job"""
+        log.info("gpu", enabled=use_gpu)
+        _, init_time = get_reader(use_gpu)
+        get_client()
+        return {"model_load_time": init_time, "gpu": use_gpu}
     
-    print(f"\nRésultats écrits dans {output_file}")
+    try:
+        if args.serve:
+            # Worker persistant : un seul chargement du modèle pour tous les jobs
+            if args.socket:
+                load_reader()
+                serve_unix_socket(args.socket, run_job)
+            else:
+                serve_stdio(run_job, load_reader)
+            sys.exit(0)
+        
+        log.info("gpu", enabled=use_gpu)
+        
+        if not args.frames_dir:
+            parser.error("frames_dir est requis hors mode --serve")
+        
+        # Le worker peut tourner dans un autre dossier : chemin absolu
+        job = {
+            "frames_dir": os.path.abspath(args.frames_dir),
+            "max_images": args.max_images,
+            "scale": args.scale,
+            "fast": args.fast,
+            "gpu": use_gpu,
+            "dedup_threshold": args.dedup_threshold,
+            "use_cache": not args.no_cache,
+            "max_concurrency": args.max_concurrency,
+            "correction_mode": args.correction_mode,
+            "preprocess": args.preprocess,
+            "incremental": args.incremental,
+            "prefetch_depth": args.prefetch_depth,
+            "frame_interval": args.frame_interval,
+            "scene_change": args.scene_change,
+            "selection": args.selection,
+            "detail": args.detail,
+            "gate": not args.no_gate,
+            "metrics": bool(args.metrics_json),
+            "profile": args.profile
+        }
+        
+        # Client léger : confier le job au worker persistant s'il écoute, sinon le traiter ici
+        response = submit_job(args.socket, job)
+        if response is None:
+            response = run_job(job)
+        elif not response["success"]:
+            raise RuntimeError(response["error"])
+        else:
+            log.info("worker_job_done", socket=args.socket, seconds=response['performance']['job_time'])
+        
+        if args.metrics_json:
+            # Métriques du processus qui a traité le job (le worker, le cas échéant)
+            with open(args.metrics_json, "w", encoding="utf-8") as f:
+                json.dump(response["metrics"], f, ensure_ascii=False, indent=2)
+        print(f"\nRésultats écrits dans {response['output_file']}")
         
     except Exception as e:
         print(f"Erreur fatale dans le script principal: {str(e)}")
@@ -574,7 +1076,7 @@ if __name__ == "__main__":
         sys.exit(1)
     finally:
         # Nettoyage final de la mémoire GPU
-        if torch.cuda.is_available():
+        if torch is not None and torch.cuda.is_available():
             torch.cuda.empty_cache()
         
         # Forcer le garbage collection
@@ -0,0 +1,385 @@
+import bisect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+# Configuration par défaut (surchargeable via .env)
+# Niveau des journaux : DEBUG (détail de chaque frame), INFO, WARNING ou ERROR
+LOG_LEVEL = os.getenv('OCR_LOG_LEVEL', 'INFO').upper()
+# Format des journaux : "text" (événement et champs clé=valeur) ou "json" (un objet par ligne)
+LOG_FORMAT = os.getenv('OCR_LOG_FORMAT', 'text').lower()
+# Histogrammes et compteurs agrégés (/metrics) ; false les réduit à un simple test
+METRICS_ENABLED = os.getenv('OCR_METRICS_ENABLED', 'True').lower() == 'true'
+
+# Étapes mesurées par les histogrammes de durée ; "ocr" regroupe détection et
+# reconnaissance lorsqu'elles sont faites par un seul appel (readtext)
+STAGES = ("decode", "preprocess", "detect", "recognize", "ocr", "group", "correct", "total")
+# Bornes des histogrammes de durée (secondes)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Type de contenu du format texte de Prometheus
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labelnames, values, extra=None):
+    """Étiquettes d'un échantillon au format Prometheus : {nom="valeur",...}"""
+    pairs = list(zip(labelnames, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    escaped = [(name, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+               for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur cumulatif, une série par combinaison d'étiquettes"""
+
+    kind = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not self.registry.enabled or not amount:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self.lock:
+            series = sorted(self.values.items())
+        return [f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}" for key, value in series]
+
+    def to_dict(self):
+        with self.lock:
+            return [{"labels": dict(zip(self.labelnames, key)), "value": value}
+                    for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    """Histogramme à bornes fixes, une série par combinaison d'étiquettes.
+
+    Chaque série garde le nombre d'observations par intervalle, leur somme et
+    leur nombre ; les percentiles du JSON sont interpolés dans les intervalles,
+    comme histogram_quantile de Prometheus.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def quantile(self, series, q):
+        """Percentile estimé d'une série par interpolation linéaire dans son intervalle"""
+        if not series["count"]:
+            return None
+        rank = q * series["count"]
+        cumulative = 0
+        for index, count in enumerate(series["counts"]):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower  # Au-delà de la dernière borne : borne inférieure
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self):
+        lines = []
+        with self.lock:
+            series = sorted((key, dict(value, counts=list(value["counts"]))) for key, value in self.series.items())
+        for key, value in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), value["counts"]):
+                cumulative += count
+                labels = format_labels(self.labelnames, key, {"le": format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(value['sum'])}")
+            lines.append(f"{self.name}_count{labels} {value['count']}")
+        return lines
+
+    def to_dict(self):
+        with self.lock:
+            series = sorted((key, dict(value, counts=list(value["counts"]))) for key, value in self.series.items())
+        return [{
+            "labels": dict(zip(self.labelnames, key)),
+            "count": value["count"],
+            "sum": value["sum"],
+            "mean": value["sum"] / value["count"] if value["count"] else None,
+            "p50": self.quantile(value, 0.5),
+            "p95": self.quantile(value, 0.95),
+            "p99": self.quantile(value, 0.99),
+            "buckets": dict(zip([format_value(bound) for bound in self.buckets + (float("inf"),)], value["counts"]))
+        } for key, value in series]
+
+
+class Gauge:
+    """Valeur instantanée lue au moment de l'export.
+
+    `read()` retourne un nombre, ou un dictionnaire {valeurs d'étiquettes: nombre}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, registry, name, documentation, read, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return sorted((key if isinstance(key, tuple) else (key,), sample) for key, sample in value.items()
+                          if sample is not None)
+        return [((), value)] if value is not None else []
+
+    def render(self):
+        return [f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}" for key, value in self.samples()]
+
+    def to_dict(self):
+        return [{"labels": dict(zip(self.labelnames, key)), "value": value} for key, value in self.samples()]
+
+
+class MetricsRegistry:
+    """Métriques agrégées d'un processus, exportées au format Prometheus ou en JSON"""
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        return self.register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, read, labelnames=()):
+        return self.register(Gauge(self, name, documentation, read, labelnames))
+
+    def render(self):
+        """Toutes les métriques au format texte de Prometheus"""
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        """Toutes les métriques en JSON, percentiles des histogrammes compris"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {
+            "enabled": self.enabled,
+            "time": time.time(),
+            "metrics": {metric.name: {"type": metric.kind, "help": metric.documentation, "series": metric.to_dict()}
+                        for metric in metrics}
+        }
+
+
+# Registre partagé par le service et index.py
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "easyocr_stage_seconds", "Durée des étapes du pipeline OCR par requête (service) ou par frame (index.py)",
+    ("source", "stage")
+)
+FRAMES = metrics.counter("easyocr_frames_total", "Frames reçues pour l'OCR", ("source",))
+CACHE_HITS = metrics.counter("easyocr_cache_hits_total", "Résultats servis par un cache (OCR ou correction)",
+                             ("source", "cache"))
+DEDUP_SKIPS = metrics.counter("easyocr_dedup_skips_total", "Frames quasi identiques à une frame déjà lue, OCR évité",
+                              ("source",))
+ERRORS = metrics.counter("easyocr_errors_total", "Erreurs par source et par type", ("source", "kind"))
+
+# Clés des métriques de performance (réponses du service, index.py) et étape correspondante
+PERFORMANCE_STAGES = {
+    "decode_time": "decode",
+    "preprocessing_time": "preprocess",
+    "detection_time": "detect",
+    "recognition_time": "recognize",
+    "grouping_time": "group",
+    "correction_time": "correct",
+    "total_time": "total"
+}
+
+
+def observe_stage(source, stage, seconds):
+    STAGE_SECONDS.observe(seconds, source=source, stage=stage)
+
+
+def record_error(source, kind):
+    ERRORS.inc(source=source, kind=kind)
+
+
+def record_performance(source, performance, frames=1):
+    """Ajoute aux métriques agrégées les durées et compteurs d'une réponse du service.
+
+    Les étapes absentes ou nulles (frame servie par le cache, pas de
+    correction) ne sont pas observées ; sans détection ni reconnaissance
+    séparées, la durée de l'OCR (`ocr_time`) est observée comme étape "ocr".
+    """
+    if not metrics.enabled or not performance:
+        return
+    for key, stage in PERFORMANCE_STAGES.items():
+        value = performance.get(key)
+        if isinstance(value, (int, float)) and value > 0:
+            STAGE_SECONDS.observe(value, source=source, stage=stage)
+    if not performance.get("detection_time") and (performance.get("ocr_time") or 0) > 0:
+        STAGE_SECONDS.observe(performance["ocr_time"], source=source, stage="ocr")
+    FRAMES.inc(frames, source=source)
+    CACHE_HITS.inc(int(performance.get("cache_hits") or performance.get("cache_hit") or 0), source=source, cache="ocr")
+    DEDUP_SKIPS.inc(performance.get("frames_skipped") or 0, source=source)
+
+
+def record_correction_cache(source, cache_stats):
+    """Ajoute les corrections servies par le cache (ou partagées avec une requête identique)"""
+    if cache_stats:
+        CACHE_HITS.inc(cache_stats.get("hits", 0) + cache_stats.get("coalesced", 0), source=source, cache="correction")
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Écrit sur la sortie standard courante : le worker d'index.py la redirige vers stderr"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class StructuredFormatter(logging.Formatter):
+    """Un événement par ligne : texte « clé=valeur » ou objet JSON"""
+
+    def __init__(self, output_format=LOG_FORMAT):
+        super().__init__()
+        self.output_format = output_format
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        if self.output_format == "json":
+            return json.dumps({
+                "time": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "event": record.getMessage(),
+                **fields
+            }, ensure_ascii=False, default=str)
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        values = " ".join(f"{name}={format_field(value)}" for name, value in fields.items())
+        return f"{timestamp} {record.levelname} {record.name} {record.getMessage()}" + (f" {values}" if values else "")
+
+
+def format_field(value):
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    if isinstance(value, str) and (" " in value or not value):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class StructuredLogger:
+    """Journal d'événements nommés avec des champs, par niveau.
+
+    Les champs ne sont formatés que si le niveau est actif : dans une boucle
+    chaude, un événement DEBUG désactivé ne coûte qu'un test de niveau.
+    """
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+
+    def enabled(self, level):
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level, event, **fields):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+
+# Journal racine du projet, distinct du journal "easyocr" de la bibliothèque EasyOCR
+LOGGER_ROOT = "ezmeme"
+
+
+def get_logger(name):
+    """Journal structuré d'un module (sous le journal racine du projet, LOGGER_ROOT)"""
+    return StructuredLogger(f"{LOGGER_ROOT}.{name}")
+
+
+def configure_logging(level=None, output_format=None):
+    """Configure le niveau et le format des journaux du projet (remplace la configuration précédente).
+
+    Sans argument, OCR_LOG_LEVEL et OCR_LOG_FORMAT sont relus : le fichier
+    .env est chargé après l'import de ce module.
+    """
+    level = level or os.getenv('OCR_LOG_LEVEL', LOG_LEVEL)
+    output_format = (output_format or os.getenv('OCR_LOG_FORMAT', LOG_FORMAT)).lower()
+    root = logging.getLogger(LOGGER_ROOT)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = ConsoleHandler()
+    handler.setFormatter(StructuredFormatter(output_format))
+    root.addHandler(handler)
+    root.propagate = False
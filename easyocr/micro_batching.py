@@ -0,0 +1,162 @@
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from reader_pool import PoolBusyError
+
+# Configuration par défaut (surchargeable via .env)
+MICRO_BATCH_ENABLED = os.getenv('OCR_MICRO_BATCH_ENABLED', 'True').lower() == 'true'
+MICRO_BATCH_MAX_SIZE = int(os.getenv('OCR_MICRO_BATCH_MAX_SIZE', '8'))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv('OCR_MICRO_BATCH_MAX_WAIT_MS', '10'))
+
+# Nombre de latences conservées pour le calcul des percentiles
+LATENCY_WINDOW = 1000
+
+
+class _PendingItem:
+    """Élément soumis par une requête, en attente de son lot"""
+
+    def __init__(self, item):
+        self.item = item
+        self.submitted = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.batch_size = 0
+        self.queue_time = 0.0
+
+
+def percentile(values, fraction):
+    """Percentile d'une liste triée (plus proche rang)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(math.ceil(fraction * len(values))) - 1)]
+
+
+class MicroBatcher:
+    """Regroupe en lots les éléments soumis par des requêtes concurrentes.
+
+    Un thread répartiteur attend qu'un des `workers` soit libre, puis forme un
+    lot avec les éléments arrivés dans les `max_wait_ms` millisecondes suivant
+    le premier (au plus `max_batch_size`). `process_batch(items)` traite le lot
+    et retourne un résultat par élément, renvoyé à la requête qui l'a soumis.
+    Au-delà de `max_pending` éléments en attente, PoolBusyError est levée.
+    """
+
+    def __init__(self, name, process_batch, max_batch_size=MICRO_BATCH_MAX_SIZE,
+                 max_wait_ms=MICRO_BATCH_MAX_WAIT_MS, workers=1, max_pending=16):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.slots = threading.Semaphore(workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.stats_lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.total_batch_time = 0.0
+
+        self.thread = threading.Thread(target=self._dispatch, name=f"micro-batcher-{name}", daemon=True)
+        self.thread.start()
+
+    def retry_after(self):
+        """Délai conseillé (secondes) avant de réessayer"""
+        with self.stats_lock:
+            average_batch = self.total_batch_time / self.batches if self.batches else 1.0
+        batches_ahead = len(self.queue) / self.max_batch_size + 1
+        return max(1, math.ceil(average_batch * batches_ahead / self.workers))
+
+    def submit(self, item):
+        """Soumet un élément et attend son résultat.
+
+        Retourne (résultat, taille du lot, temps passé dans la file).
+        """
+        pending = _PendingItem(item)
+        with self.condition:
+            if len(self.queue) >= self.max_pending:
+                with self.stats_lock:
+                    self.rejected += 1
+                raise PoolBusyError(f"File d'attente OCR pleine ({len(self.queue)} frames)", self.retry_after())
+            self.queue.append(pending)
+            self.condition.notify()
+
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result, pending.batch_size, pending.queue_time
+
+    def _dispatch(self):
+        """Boucle du répartiteur : forme les lots dès qu'un worker est libre"""
+        while True:
+            self.slots.acquire()
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                # Attendre d'autres éléments jusqu'à l'échéance du premier
+                deadline = self.queue[0].submitted + self.max_wait
+                while len(self.queue) < self.max_batch_size:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch = [self.queue.popleft() for _ in range(min(self.max_batch_size, len(self.queue)))]
+            self.executor.submit(self._execute, batch)
+
+    def _execute(self, batch):
+        """Traite un lot et transmet les résultats aux requêtes en attente"""
+        start_time = time.time()
+        try:
+            for pending in batch:
+                pending.batch_size = len(batch)
+                pending.queue_time = start_time - pending.submitted
+            results = self.process_batch([pending.item for pending in batch])
+            for pending, result in zip(batch, results):
+                pending.result = result
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        finally:
+            batch_time = time.time() - start_time
+            with self.stats_lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[len(batch)] += 1
+                self.total_batch_time += batch_time
+                self.latencies.extend(pending.queue_time for pending in batch)
+            self.slots.release()
+            for pending in batch:
+                pending.done.set()
+
+    def stats(self):
+        """Histogramme des tailles de lot et latence ajoutée par la file pour /health"""
+        with self.stats_lock:
+            latencies = sorted(self.latencies)
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "workers": self.workers,
+                "pending": len(self.queue),
+                "batches": self.batches,
+                "items": self.items,
+                "rejected": self.rejected,
+                "average_batch_size": self.items / self.batches if self.batches else 0.0,
+                "average_batch_time": self.total_batch_time / self.batches if self.batches else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                "queue_latency": {
+                    "p50": percentile(latencies, 0.50),
+                    "p95": percentile(latencies, 0.95),
+                    "p99": percentile(latencies, 0.99),
+                    "max": latencies[-1] if latencies else 0.0
+                }
+            }
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# Emplacement par défaut : dossier cache/ à la racine du projet (server.js vide ocr/ à chaque traitement)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "ocr_cache.sqlite")
+
+
+class OCRResultCache:
+    """Cache persistant (SQLite) des résultats OCR, adressé par contenu.
+
+    Chaque entrée est indexée par un hash du contenu de l'image et des
+    paramètres OCR utilisés. Le nombre d'entrées est borné : au-delà de
+    `max_entries`, les entrées les moins récemment utilisées sont supprimées.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ocr_results_last_access ON ocr_results (last_access)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(image, params):
+        """Construit la clé d'une image (pixels décodés) et de ses paramètres OCR"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(str(image.shape).encode())
+        digest.update(np.ascontiguousarray(image))
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Retourne le résultat associé à la clé, ou None"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM ocr_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.connection.execute(
+                "UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.connection.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, value):
+        """Enregistre un résultat puis évince les entrées les plus anciennes si nécessaire"""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, value, last_access) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time())
+            )
+            count = self.connection.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self.connection.execute(
+                    "DELETE FROM ocr_results WHERE key IN ("
+                    "SELECT key FROM ocr_results ORDER BY last_access ASC LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+            self.connection.commit()
+
+    def stats(self):
+        """Compteurs du cache pour le suivi des performances"""
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+
+def create_cache_from_env():
+    """Crée le cache selon les variables d'environnement, ou None s'il est désactivé"""
+    if os.getenv('OCR_CACHE_ENABLED', 'True').lower() != 'true':
+        return None
+    return OCRResultCache(
+        path=os.getenv('OCR_CACHE_PATH', DEFAULT_CACHE_PATH),
+        max_entries=int(os.getenv('OCR_CACHE_MAX_ENTRIES', '10000'))
+    )
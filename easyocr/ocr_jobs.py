@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from reader_pool import PoolBusyError
+
+# Configuration par défaut (surchargeable via .env)
+# Jobs traités simultanément (ils se partagent ensuite les readers du pool)
+JOB_WORKERS = int(os.getenv('OCR_JOB_WORKERS', '1'))
+# Jobs en attente au plus avant de répondre 503
+JOB_QUEUE_MAX = int(os.getenv('OCR_JOB_QUEUE_MAX', '32'))
+# Durée de conservation d'un job terminé et de ses résultats (secondes)
+JOB_TTL = float(os.getenv('OCR_JOB_TTL', '600'))
+# Frames lues ensemble par le worker : 1 pour un événement dès chaque frame lue
+JOB_CHUNK_SIZE = int(os.getenv('OCR_JOB_CHUNK_SIZE', '4'))
+
+# Commentaire SSE envoyé pour garder la connexion ouverte pendant les longues frames
+KEEPALIVE_INTERVAL = 15
+
+FINAL_STATES = ("done", "cancelled", "failed")
+
+
+class JobCancelled(Exception):
+    """Annulation demandée pendant le traitement d'un job"""
+
+
+class Job:
+    """Job OCR : état, événements émis depuis sa création et demande d'annulation.
+
+    Les événements sont conservés pour qu'un client puisse se reconnecter au
+    flux et reprendre après le dernier événement reçu (Last-Event-ID).
+    """
+
+    def __init__(self, payload, frames):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.frames = frames
+        self.state = "queued"
+        self.processed = 0
+        self.error = None
+        self.summary = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = False
+        self.events = []
+        self.condition = threading.Condition()
+
+    def emit(self, event, data):
+        """Ajoute un événement et réveille les clients qui suivent le job"""
+        with self.condition:
+            if event == "frame":
+                self.processed += 1
+            self.events.append((len(self.events), event, data))
+            self.condition.notify_all()
+
+    def events_after(self, cursor, timeout):
+        """Événements d'index supérieur ou égal à `cursor`, en attendant au plus `timeout` secondes"""
+        with self.condition:
+            if cursor >= len(self.events) and self.state not in FINAL_STATES:
+                self.condition.wait(timeout)
+            return self.events[cursor:]
+
+    def check_cancelled(self):
+        """À appeler entre deux étapes du traitement : lève JobCancelled si l'annulation est demandée"""
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def finish(self, state, event, data):
+        """Passe le job dans un état final et émet le dernier événement du flux"""
+        with self.condition:
+            self.state = state
+            self.finished_at = time.time()
+            self.payload = None  # Frames décodées libérées, seuls les événements sont conservés
+            self.events.append((len(self.events), event, data))
+            self.condition.notify_all()
+
+    def status(self):
+        """État du job pour GET /jobs/<id>"""
+        with self.condition:
+            return {
+                "id": self.id,
+                "state": self.state,
+                "frames": self.frames,
+                "processed": self.processed,
+                "events": len(self.events),
+                "error": self.error,
+                "summary": self.summary,
+                "queue_time": (self.started_at or self.finished_at or time.time()) - self.created_at,
+                "run_time": ((self.finished_at or time.time()) - self.started_at) if self.started_at else None
+            }
+
+
+class JobQueue:
+    """File de jobs OCR traités en arrière-plan par `workers` threads.
+
+    `process(job)` traite un job en émettant un événement par frame et
+    retourne le résumé envoyé avec l'événement final "done" ; il appelle
+    job.check_cancelled() entre deux lots de frames pour qu'une annulation
+    libère le CPU au plus tôt. Les threads sont démarrés au premier job, donc
+    après le fork des workers gunicorn. Les jobs terminés sont oubliés après
+    `ttl` secondes.
+    """
+
+    def __init__(self, process, workers=JOB_WORKERS, max_queue=JOB_QUEUE_MAX, ttl=JOB_TTL):
+        self.process = process
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.jobs = OrderedDict()
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.threads = []
+        self.counters = {"submitted": 0, "done": 0, "cancelled": 0, "failed": 0, "rejected": 0}
+
+    def submit(self, payload, frames):
+        """Ajoute un job à la file ; lève PoolBusyError si la file est pleine"""
+        with self.condition:
+            self._purge()
+            if len(self.queue) >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise PoolBusyError(f"File des jobs OCR pleine ({len(self.queue)} jobs)", 5)
+            job = Job(payload, frames)
+            self.jobs[job.id] = job
+            self.queue.append(job)
+            self.counters["submitted"] += 1
+            job.emit("status", {"state": "queued", "position": len(self.queue)})
+            if not self.threads:
+                self.threads = [threading.Thread(target=self._work, name=f"ocr-job-{index}", daemon=True)
+                                for index in range(max(1, self.workers))]
+                for thread in self.threads:
+                    thread.start()
+            self.condition.notify()
+            return job
+
+    def get(self, job_id):
+        with self.condition:
+            self._purge()
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Demande l'annulation d'un job : immédiate s'il attend encore, au prochain lot sinon"""
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state in FINAL_STATES:
+                return job
+            job.cancel_requested = True
+            if job.state == "queued":
+                self.queue.remove(job)
+                self.counters["cancelled"] += 1
+                job.finish("cancelled", "cancelled", {"processed": 0})
+            return job
+
+    def _purge(self):
+        """Oublie les jobs terminés depuis plus de `ttl` secondes (verrou tenu)"""
+        now = time.time()
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.finished_at is not None and job.finished_at + self.ttl < now]:
+            del self.jobs[job_id]
+
+    def _work(self):
+        """Boucle d'un worker : traite les jobs dans l'ordre d'arrivée"""
+        while True:
+            with self.condition:
+                while not self.queue:
+                    self.condition.wait()
+                job = self.queue.popleft()
+                job.state = "running"
+                job.started_at = time.time()
+            job.emit("status", {"state": "running"})
+            try:
+                job.summary = self.process(job)
+                state, event, data = "done", "done", job.summary
+            except JobCancelled:
+                state, event, data = "cancelled", "cancelled", {"processed": job.processed}
+            except Exception as e:
+                job.error = str(e)
+                state, event, data = "failed", "error", {"error": str(e), "processed": job.processed}
+            job.finish(state, event, data)
+            with self.condition:
+                self.counters[state] += 1
+
+    def stats(self):
+        """Compteurs globaux et jobs en attente ou en cours"""
+        with self.condition:
+            return {
+                "workers": self.workers,
+                "queued": len(self.queue),
+                "running": sum(1 for job in self.jobs.values() if job.state == "running"),
+                "retained": len(self.jobs),
+                **self.counters
+            }
+
+
+def format_event(event_id, event, data):
+    """Événement au format Server-Sent Events"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def is_final_event(event):
+    return event in ("done", "cancelled", "error")
+
+
+def stream_events(job, cursor=0, keepalive=KEEPALIVE_INTERVAL):
+    """Générateur du flux SSE d'un job à partir de l'événement `cursor`, jusqu'à l'événement final"""
+    while True:
+        events = job.events_after(cursor, keepalive)
+        if not events:
+            if job.state in FINAL_STATES:
+                return  # Reprise après l'événement final
+            yield ": keep-alive\n\n"
+            continue
+        for event_id, event, data in events:
+            yield format_event(event_id, event, data)
+        cursor = events[-1][0] + 1
+        if is_final_event(events[-1][1]):
+            return
+
+
+async def stream_events_async(job, cursor=0, keepalive=KEEPALIVE_INTERVAL, poll_interval=0.2):
+    """Version asyncio de stream_events : interroge le job sans bloquer la boucle"""
+    idle = 0.0
+    while True:
+        events = job.events_after(cursor, 0)
+        if not events:
+            if job.state in FINAL_STATES:
+                return
+            if idle >= keepalive:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(poll_interval)
+            idle += poll_interval
+            continue
+        idle = 0.0
+        for event_id, event, data in events:
+            yield format_event(event_id, event, data)
+        cursor = events[-1][0] + 1
+        if is_final_event(events[-1][1]):
+            return
+
+
+def resume_cursor(last_event_id):
+    """Premier événement à envoyer après une reconnexion (en-tête Last-Event-ID)"""
+    try:
+        return int(last_event_id) + 1
+    except (TypeError, ValueError):
+        return 0
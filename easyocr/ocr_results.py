@@ -0,0 +1,152 @@
+import bisect
+
+
+def line_bounds(points):
+    """Rectangle [x0, y0, x1, y1] englobant les points d'une boîte EasyOCR"""
+    xs = [float(point[0]) for point in points]
+    ys = [float(point[1]) for point in points]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def to_frame_box(bounds, info):
+    """Ramène un rectangle de l'image prétraitée aux coordonnées de la frame d'origine.
+
+    L'image prétraitée empile des bandes de la frame (position `bands`, début
+    `offsets` dans l'image prétraitée) redimensionnées d'un facteur `scale`.
+    Sans description du prétraitement, le rectangle est retourné tel quel.
+    """
+    x0, y0, x1, y1 = bounds
+    if not info:
+        return [int(round(x0)), int(round(y0)), int(round(x1)), int(round(y1))]
+    scale = info["scale"] or 1.0
+    band = max(0, bisect.bisect_right(info["offsets"], (y0 + y1) / 2) - 1)
+    top, offset = info["bands"][band][0], info["offsets"][band]
+    return [
+        int(round(x0 / scale)), int(round(top + (y0 - offset) / scale)),
+        int(round(x1 / scale)), int(round(top + (y1 - offset) / scale))
+    ]
+
+
+def weighted_confidence(items):
+    """Confiance moyenne pondérée par la longueur des textes"""
+    total = sum(len(text) for text, _ in items)
+    if not total:
+        return 0.0
+    return sum(len(text) * confidence for text, confidence in items) / total
+
+
+def merge_paragraphs(lines, x_ths=1.0, y_ths=0.5):
+    """Regroupe les lignes reconnues en paragraphes, comme readtext(paragraph=True).
+
+    Même règle que get_paragraph d'EasyOCR : une ligne rejoint un paragraphe si
+    elle chevauche, horizontalement et verticalement, son rectangle élargi de
+    `x_ths` et `y_ths` fois la hauteur moyenne de ses lignes. Dans un
+    paragraphe, les lignes sont lues de haut en bas puis de gauche à droite.
+    Contrairement à get_paragraph, la confiance de chaque paragraphe (moyenne
+    pondérée par la longueur du texte) et ses lignes sont conservées.
+
+    `lines` contient des triplets (boîte, texte, confiance). Retourne une liste
+    de dictionnaires {"bounds", "text", "confidence", "lines"} où "lines"
+    donne les index des lignes du paragraphe dans leur ordre de lecture.
+    """
+    bounds = [line_bounds(box) for box, _, _ in lines]
+    remaining = list(range(len(lines)))
+    groups = []
+    while remaining:
+        group = [remaining.pop(0)]
+        while True:
+            mean_height = sum(bounds[i][3] - bounds[i][1] for i in group) / len(group)
+            min_x = min(bounds[i][0] for i in group) - x_ths * mean_height
+            max_x = max(bounds[i][2] for i in group) + x_ths * mean_height
+            min_y = min(bounds[i][1] for i in group) - y_ths * mean_height
+            max_y = max(bounds[i][3] for i in group) + y_ths * mean_height
+            for i in remaining:
+                x0, y0, x1, y1 = bounds[i]
+                if (min_x <= x0 <= max_x or min_x <= x1 <= max_x) and (min_y <= y0 <= max_y or min_y <= y1 <= max_y):
+                    group.append(i)
+                    remaining.remove(i)
+                    break
+            else:
+                break
+        groups.append(group)
+
+    paragraphs = []
+    for group in groups:
+        mean_height = sum(bounds[i][3] - bounds[i][1] for i in group) / len(group)
+        order = []
+        pending = list(group)
+        while pending:
+            highest = min((bounds[i][1] + bounds[i][3]) / 2 for i in pending)
+            candidates = [i for i in pending if (bounds[i][1] + bounds[i][3]) / 2 < highest + 0.4 * mean_height]
+            leftmost = min(candidates, key=lambda i: bounds[i][0])
+            order.append(leftmost)
+            pending.remove(leftmost)
+        paragraphs.append({
+            "bounds": [min(bounds[i][0] for i in group), min(bounds[i][1] for i in group),
+                       max(bounds[i][2] for i in group), max(bounds[i][3] for i in group)],
+            "text": " ".join(lines[i][1] for i in order),
+            "confidence": weighted_confidence([(lines[i][1], lines[i][2]) for i in order]),
+            "lines": order
+        })
+    return paragraphs
+
+
+def build_frame_result(lines, info=None):
+    """Résultat structuré d'une frame à partir des lignes d'une seule passe de reconnaissance.
+
+    Retourne {"texts", "lines", "paragraphs"} : les textes des paragraphes
+    (ceux de readtext(detail=0, paragraph=True)), puis chaque ligne et chaque
+    paragraphe avec son rectangle [x0, y0, x1, y1] dans la frame d'origine et
+    sa confiance ; chaque ligne indique l'index de son paragraphe.
+    """
+    paragraphs = merge_paragraphs(lines)
+    line_records = [None] * len(lines)
+    paragraph_records = []
+    for index, paragraph in enumerate(paragraphs):
+        for line in paragraph["lines"]:
+            box, text, confidence = lines[line]
+            line_records[line] = {
+                "box": to_frame_box(line_bounds(box), info),
+                "text": text,
+                "confidence": round(float(confidence), 4),
+                "paragraph": index
+            }
+        paragraph_records.append({
+            "box": to_frame_box(paragraph["bounds"], info),
+            "text": paragraph["text"],
+            "confidence": round(float(paragraph["confidence"]), 4)
+        })
+    # Lignes dans l'ordre de lecture
+    line_records = [line_records[line] for paragraph in paragraphs for line in paragraph["lines"]]
+    return {
+        "texts": [paragraph["text"] for paragraph in paragraph_records],
+        "lines": line_records,
+        "paragraphs": paragraph_records
+    }
+
+
+def text_confidence(frame_result):
+    """Confiance du texte complet d'une frame (None si elle n'est pas connue)"""
+    paragraphs = frame_result.get("paragraphs") if frame_result else None
+    if paragraphs is None:
+        return None
+    return weighted_confidence([(paragraph["text"], paragraph["confidence"]) for paragraph in paragraphs])
+
+
+def to_columnar(frame_results):
+    """Encodage compact des lignes de plusieurs frames en tableaux parallèles.
+
+    Une entrée par ligne dans chaque tableau : index de la frame et du
+    paragraphe, rectangle, texte et confiance. Évite de répéter les noms de
+    champs pour chaque ligne lorsque la réponse couvre de nombreuses frames.
+    """
+    columns = {"frame": [], "paragraph": [], "x0": [], "y0": [], "x1": [], "y1": [], "text": [], "confidence": []}
+    for frame, result in enumerate(frame_results):
+        for line in (result or {}).get("lines", []):
+            columns["frame"].append(frame)
+            columns["paragraph"].append(line["paragraph"])
+            for name, value in zip(("x0", "y0", "x1", "y1"), line["box"]):
+                columns[name].append(value)
+            columns["text"].append(line["text"])
+            columns["confidence"].append(line["confidence"])
+    return columns
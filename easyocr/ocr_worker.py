@@ -0,0 +1,101 @@
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+
+from instrumentation import get_logger
+
+# Socket Unix du worker OCR persistant (vide : pas de worker, traitement dans le processus)
+WORKER_SOCKET = os.getenv('OCR_WORKER_SOCKET', '')
+
+log = get_logger("worker")
+
+
+def handle_line(line, handle_job):
+    """Exécute le job décrit par une ligne JSON et retourne la réponse.
+
+    `handle_job(job)` retourne un dictionnaire de résultats ; la réponse
+    reprend l'identifiant du job et indique le succès ou l'erreur.
+    """
+    try:
+        job = json.loads(line)
+    except ValueError as e:
+        return {"id": None, "success": False, "error": f"Job JSON invalide: {str(e)}"}
+
+    start_time = time.time()
+    try:
+        response = {"success": True, **handle_job(job)}
+    except Exception as e:
+        log.error("job_error", job=job.get('id'), error=str(e))
+        response = {"success": False, "error": str(e)}
+    response["id"] = job.get("id")
+    response["worker_time"] = time.time() - start_time
+    return response
+
+
+def serve_stdio(handle_job, load=None):
+    """Lit un job JSON par ligne sur stdin et écrit chaque réponse sur une ligne de stdout.
+
+    Les messages de progression (print) sont redirigés vers stderr pour ne pas
+    se mêler aux réponses. `load()` charge le modèle avant le premier job ; une
+    première ligne {"event": "ready"} (complétée par ce que retourne `load`)
+    signale ensuite que le worker est prêt.
+    """
+    output = sys.stdout
+    sys.stdout = sys.stderr
+
+    def send(message):
+        output.write(json.dumps(message, ensure_ascii=False) + "\n")
+        output.flush()
+
+    ready_info = load() if load is not None else None
+    send({"event": "ready", **(ready_info or {})})
+    for line in sys.stdin:
+        if line.strip():
+            send(handle_line(line, handle_job))
+
+
+def serve_unix_socket(path, handle_job):
+    """Sert les jobs reçus sur un socket Unix, un job par ligne, l'un après l'autre"""
+    if os.path.exists(path):
+        os.unlink(path)
+
+    class JobHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    response = handle_line(line.decode("utf-8"), handle_job)
+                    self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    # Serveur non multithreadé : un seul reader, les jobs sont traités en série
+    with socketserver.UnixStreamServer(path, JobHandler) as server:
+        print(f"Worker OCR en écoute sur {path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
+
+
+def submit_job(path, job, timeout=None):
+    """Envoie un job au worker persistant et retourne sa réponse.
+
+    Retourne None si aucun worker n'écoute sur `path` (ou si la plateforme
+    ne supporte pas les sockets Unix), pour que l'appelant traite le job
+    lui-même.
+    """
+    if not path or not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall((json.dumps(job, ensure_ascii=False) + "\n").encode("utf-8"))
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+    if not line:
+        raise RuntimeError("Le worker OCR a fermé la connexion sans répondre")
+    return json.loads(line)
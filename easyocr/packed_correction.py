@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import time
+
+from instrumentation import get_logger, record_error
+
+# Budgets de tokens d'un appel groupé (surchargeables via .env)
+PACKED_MAX_PROMPT_TOKENS = int(os.getenv('CORRECTION_PACKED_MAX_PROMPT_TOKENS', '3000'))
+PACKED_MAX_COMPLETION_TOKENS = int(os.getenv('CORRECTION_PACKED_MAX_COMPLETION_TOKENS', '2000'))
+
+PACKED_SYSTEM_PROMPT = (
+    "Corrige les erreurs OCR. Pour chaque groupe numéroté, retourne uniquement la meilleure "
+    "version du texte. Réponds uniquement avec un objet JSON de la forme "
+    "{\"1\": \"texte corrigé\", \"2\": \"texte corrigé\"}."
+)
+
+log = get_logger("correction")
+
+
+def estimate_tokens(text):
+    """Estimation grossière du nombre de tokens (≈ 4 caractères par token)"""
+    return len(text) // 4 + 1
+
+
+def format_group(number, group):
+    """Représentation d'un groupe dans le prompt groupé"""
+    return f"Groupe {number}:\n" + "\n---\n".join(group)
+
+
+def expected_completion_tokens(group):
+    """Tokens de réponse attendus pour un groupe (texte le plus long + marge JSON)"""
+    return int(max(estimate_tokens(text) for text in group) * 1.2) + 10
+
+
+def chunk_groups(groups, max_prompt_tokens=PACKED_MAX_PROMPT_TOKENS, max_completion_tokens=PACKED_MAX_COMPLETION_TOKENS):
+    """Répartit les groupes en lots dont le prompt et la réponse tiennent dans les budgets"""
+    chunks = []
+    current = []
+    prompt_tokens = estimate_tokens(PACKED_SYSTEM_PROMPT)
+    completion_tokens = 0
+    for group in groups:
+        group_prompt = estimate_tokens(format_group(len(current) + 1, group))
+        group_completion = expected_completion_tokens(group)
+        if current and (prompt_tokens + group_prompt > max_prompt_tokens
+                        or completion_tokens + group_completion > max_completion_tokens):
+            chunks.append(current)
+            current = []
+            prompt_tokens = estimate_tokens(PACKED_SYSTEM_PROMPT)
+            completion_tokens = 0
+        current.append(group)
+        prompt_tokens += group_prompt
+        completion_tokens += group_completion
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_packed_messages(chunk):
+    """Messages de l'appel groupé pour un lot de groupes"""
+    content = "\n\n".join(format_group(number, group) for number, group in enumerate(chunk, start=1))
+    return [
+        {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+        {"role": "user", "content": content}
+    ]
+
+
+def parse_packed_response(content, count):
+    """Extrait la correction de chaque groupe de la réponse JSON, ValueError si invalide"""
+    match = re.search(r"\{.*\}", content or "", re.DOTALL)
+    if not match:
+        raise ValueError("Aucun objet JSON dans la réponse")
+    answers = json.loads(match.group(0))
+    if not isinstance(answers, dict):
+        raise ValueError("La réponse JSON n'est pas un objet")
+    corrections = []
+    for number in range(1, count + 1):
+        answer = answers.get(str(number))
+        if not isinstance(answer, str):
+            raise ValueError(f"Correction manquante pour le groupe {number}")
+        corrections.append(answer)
+    return corrections
+
+
+def new_packed_stats(groups):
+    """Statistiques d'une correction groupée de `groups` groupes"""
+    return {
+        "mode": "packed",
+        "groups": groups,
+        "chunks": 0,
+        "fallback_groups": 0,
+        "failed_groups": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "packed_groups": [],
+        "correction_time": 0.0
+    }
+
+
+def correct_groups_packed(groups, request_chunk, correct_group):
+    """Corrige plusieurs groupes en un minimum d'appels à l'API.
+
+    `request_chunk(messages, max_tokens)` effectue l'appel groupé et retourne
+    (contenu, usage) ; `correct_group(group)` corrige un groupe seul et sert de
+    repli lorsque la réponse groupée ne peut pas être analysée. Retourne un
+    couple (correction, erreur) par groupe, dans l'ordre des groupes, comme
+    run_concurrently : si le repli échoue aussi, la correction est None et
+    l'erreur celle du repli, l'appelant choisit alors la version locale. Les
+    statistiques de l'opération listent dans `packed_groups` les index des
+    groupes corrigés par un appel groupé, seules réponses que l'appelant doit
+    mettre en cache (le repli groupe par groupe gère son propre cache).
+    """
+    start_time = time.time()
+    stats = new_packed_stats(len(groups))
+    outcomes = []
+    for chunk in chunk_groups(groups):
+        stats["chunks"] += 1
+        max_tokens = min(PACKED_MAX_COMPLETION_TOKENS, sum(expected_completion_tokens(group) for group in chunk))
+        try:
+            content, usage = request_chunk(build_packed_messages(chunk), max_tokens)
+            if usage is not None:
+                stats["prompt_tokens"] += usage.prompt_tokens
+                stats["completion_tokens"] += usage.completion_tokens
+            answers = parse_packed_response(content, len(chunk))
+            stats["packed_groups"].extend(range(len(outcomes), len(outcomes) + len(answers)))
+            outcomes.extend((answer, None) for answer in answers)
+        except Exception as e:
+            record_error("correction", "packed_response")
+            log.warning("packed_response_unusable", groups=len(chunk), error=str(e))
+            stats["fallback_groups"] += len(chunk)
+            for group in chunk:
+                try:
+                    outcomes.append((correct_group(group), None))
+                except Exception as group_error:
+                    record_error("correction", "group")
+                    log.error("correction_error", error=str(group_error))
+                    stats["failed_groups"] += 1
+                    outcomes.append((None, group_error))
+    stats["correction_time"] = time.time() - start_time
+    return outcomes, stats
+
+
+def correct_groups_cached(groups, cache, model, request_chunk, correct_group, on_lookup=None):
+    """Correction groupée des seuls groupes absents du cache des corrections.
+
+    Les groupes déjà corrigés sont lus dans `cache` (clé selon `model`), les
+    autres passent par correct_groups_packed et seules les réponses de l'appel
+    groupé sont mises en cache, le repli `correct_group` gérant le sien.
+    `on_lookup(source, saved_seconds)` est appelé pour chaque groupe lu dans
+    le cache ("cache") et chaque réponse mise en cache ("upstream"). Retourne
+    un couple (correction, erreur) par groupe et les statistiques.
+    """
+    keys = [cache.make_key(group, model) for group in groups]
+    outcomes = [None] * len(groups)
+    for index, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is not None:
+            outcomes[index] = (cached[0], None)
+            if on_lookup is not None:
+                on_lookup("cache", cached[1])
+
+    pending = [index for index, outcome in enumerate(outcomes) if outcome is None]
+    stats = new_packed_stats(len(groups))
+    if pending:
+        packed, stats = correct_groups_packed([groups[index] for index in pending], request_chunk, correct_group)
+        stats["groups"] = len(groups)
+        call_time = stats["correction_time"] / len(pending)
+        for index, outcome in zip(pending, packed):
+            outcomes[index] = outcome
+        for position in stats["packed_groups"]:
+            cache.put(keys[pending[position]], packed[position][0], call_time)
+            if on_lookup is not None:
+                on_lookup("upstream", 0.0)
+    stats.pop("packed_groups")
+    return outcomes, stats
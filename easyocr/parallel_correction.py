@@ -0,0 +1,96 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import get_logger, record_error
+
+# Codes HTTP pour lesquels un nouvel essai a des chances de réussir
+RETRYABLE_STATUS_CODES = (408, 409, 429)
+
+# Configuration par défaut (surchargeable via .env)
+MAX_CONCURRENCY = int(os.getenv('CORRECTION_MAX_CONCURRENCY', '4'))
+CALL_TIMEOUT = float(os.getenv('CORRECTION_TIMEOUT', '20'))
+MAX_RETRIES = int(os.getenv('CORRECTION_MAX_RETRIES', '3'))
+
+log = get_logger("correction")
+
+
+def is_retryable_error(error):
+    """Indique si une erreur de l'API (429, 5xx, timeout, connexion) justifie un nouvel essai"""
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    # APITimeoutError / APIConnectionError n'ont pas de code HTTP
+    return type(error).__name__ in ('APITimeoutError', 'APIConnectionError', 'TimeoutError')
+
+
+def get_retry_after(error):
+    """Délai demandé par le serveur via l'en-tête Retry-After, ou None"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(func, max_retries=MAX_RETRIES, base_delay=0.5, max_delay=8.0):
+    """Appelle `func` en réessayant avec un backoff exponentiel sur les erreurs transitoires"""
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            delay = get_retry_after(e)
+            if delay is None:
+                # Backoff exponentiel avec jitter pour ne pas resynchroniser les appels
+                delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            attempt += 1
+            record_error("correction", "retry")
+            log.warning("retry", error=e.__class__.__name__, attempt=attempt, max_retries=max_retries, delay=delay)
+            time.sleep(delay)
+
+
+async def async_call_with_retry(func, max_retries=MAX_RETRIES, base_delay=0.5, max_delay=8.0):
+    """Version asyncio de call_with_retry : `func` retourne une coroutine, l'attente ne bloque pas la boucle"""
+    attempt = 0
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            delay = get_retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+            attempt += 1
+            record_error("correction", "retry")
+            log.warning("retry", error=e.__class__.__name__, attempt=attempt, max_retries=max_retries, delay=delay)
+            await asyncio.sleep(delay)
+
+
+def run_concurrently(items, func, max_concurrency=MAX_CONCURRENCY):
+    """Applique `func` à chaque élément avec au plus `max_concurrency` appels simultanés.
+
+    Retourne une liste de couples (résultat, erreur) dans l'ordre des éléments
+    d'origine ; une erreur sur un élément n'interrompt pas les autres.
+    """
+    if not items:
+        return []
+
+    def safe_call(item):
+        try:
+            return func(item), None
+        except Exception as e:
+            return None, e
+
+    workers = max(1, min(max_concurrency, len(items)))
+    if workers == 1:
+        return [safe_call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(safe_call, items))
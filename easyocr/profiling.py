@@ -0,0 +1,225 @@
+import cProfile
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+
+# Configuration par défaut (surchargeable via .env)
+# Profilage à la demande de /process (en-tête X-Profile ou ?profile=true) ; --profile d'index.py reste disponible
+PROFILING_ENABLED = os.getenv('OCR_PROFILING_ENABLED', 'True').lower() == 'true'
+# Dossier des profils : <id>.prof (cProfile, lisible avec pstats ou snakeviz) et <id>.trace.json (torch.profiler)
+# (par défaut : dossier profiles/ à la racine du projet)
+PROFILE_DIR = os.getenv('OCR_PROFILE_DIR') or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                           "profiles")
+# Fonctions et opérateurs PyTorch retenus dans le résumé de la réponse
+PROFILE_TOP = int(os.getenv('OCR_PROFILE_TOP', '15'))
+# Trace torch.profiler en plus de cProfile
+PROFILE_TORCH = os.getenv('OCR_PROFILE_TORCH', 'True').lower() == 'true'
+
+# Une seule session de profilage à la fois dans le processus : torch.profiler est
+# global et, depuis Python 3.12, un second cProfile actif lève une ValueError
+_session_lock = threading.Lock()
+# Profileur actif dans le thread courant (voir active_profiler)
+_local = threading.local()
+
+
+def active_profiler():
+    """Profileur de la requête traitée par le thread courant, ou None"""
+    return getattr(_local, "profiler", None)
+
+
+def make_profile_id(request_id=None):
+    """Nom des fichiers d'un profil : horodatage et identifiant de la requête (généré s'il manque)"""
+    request_id = re.sub(r"[^A-Za-z0-9_.-]", "_", str(request_id))[:64] if request_id else uuid.uuid4().hex[:12]
+    return f"{time.strftime('%Y%m%d-%H%M%S')}_{request_id}"
+
+
+def request_profiler(headers, query):
+    """Profileur d'une requête HTTP si elle le demande (X-Profile: 1 ou ?profile=true), sinon None.
+
+    L'identifiant du profil reprend l'en-tête X-Request-ID s'il est fourni.
+    Sans demande, le seul coût est la lecture de l'en-tête et du paramètre.
+    """
+    if not PROFILING_ENABLED:
+        return None
+    flag = headers.get('X-Profile') or query.get('profile')
+    if not flag or flag.lower() not in ('1', 'true', 'yes'):
+        return None
+    return RequestProfiler(make_profile_id(headers.get('X-Request-ID')))
+
+
+def function_name(key):
+    """Fonction d'une entrée pstats : fichier:ligne(nom), ou nom seul pour les fonctions natives"""
+    filename, line, name = key
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def top_functions(stats, top, sort_index):
+    """Les `top` fonctions les plus coûteuses selon le temps propre (2) ou cumulé (3)"""
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][sort_index], reverse=True)[:top]
+    return [{
+        "function": function_name(key),
+        "calls": calls,
+        "self_time": round(self_time, 6),
+        "cumulative_time": round(cumulative_time, 6)
+    } for key, (_, calls, self_time, cumulative_time, _) in entries]
+
+
+def top_torch_ops(torch_profile, top):
+    """Les `top` opérateurs PyTorch au temps CPU propre le plus élevé (secondes)"""
+    events = sorted(torch_profile.key_averages(), key=lambda event: event.self_cpu_time_total, reverse=True)[:top]
+    ops = []
+    for event in events:
+        op = {
+            "op": event.key,
+            "calls": event.count,
+            "self_cpu_time": round(event.self_cpu_time_total / 1e6, 6),
+            "cpu_time": round(event.cpu_time_total / 1e6, 6)
+        }
+        device_time = getattr(event, "self_device_time_total", getattr(event, "self_cuda_time_total", 0))
+        if device_time:
+            op["self_device_time"] = round(device_time / 1e6, 6)
+        ops.append(op)
+    return ops
+
+
+class RequestProfiler:
+    """cProfile et torch.profiler pendant le traitement d'une seule requête.
+
+    Une seule requête est profilée à la fois dans le processus : si une autre
+    session est en cours au moment de start(), la requête est traitée sans
+    profil et report() l'indique (`"status": "busy"`). La session a un seul
+    cProfile, actif dans un seul thread à la fois : comme gestionnaire de
+    contexte, le thread courant entre l'entrée et la sortie (Flask, index.py) ;
+    avec wrap(), le thread qui exécute la fonction enveloppée (pool OCR de la
+    variante ASGI). La trace torch.profiler couvre tout le processus entre
+    start() et stop().
+    """
+
+    def __init__(self, profile_id, output_dir=PROFILE_DIR, top=PROFILE_TOP, with_torch=PROFILE_TORCH):
+        self.profile_id = profile_id
+        self.output_dir = output_dir
+        self.top = top
+        self.with_torch = with_torch
+        self.profile = cProfile.Profile()
+        # Tenu par le thread où le cProfile est actif
+        self.lock = threading.Lock()
+        self.status = "pending"
+        self.torch_profile = None
+        self.torch_status = "disabled"
+        self.start_time = None
+        self.wall_time = 0.0
+
+    def start(self):
+        """Ouvre la session si aucune autre n'est en cours, démarre la trace torch.profiler et le chronomètre"""
+        self.start_time = time.perf_counter()
+        if not _session_lock.acquire(blocking=False):
+            self.status = "busy"  # Autre requête profilée en cours
+            return
+        self.status = "recorded"
+        if not self.with_torch:
+            return
+        try:
+            import torch
+            from torch.profiler import profile, ProfilerActivity
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            self.torch_profile = profile(activities=activities)
+            self.torch_profile.start()
+            self.torch_status = "recorded"
+        except Exception as e:
+            self.torch_profile = None
+            self.torch_status = f"unavailable: {e}"
+
+    def stop(self):
+        """Arrête la trace torch.profiler et le chronomètre, puis ferme la session"""
+        self.wall_time = time.perf_counter() - self.start_time
+        if self.status == "busy":
+            return
+        try:
+            if self.torch_profile is not None:
+                self.torch_profile.stop()
+        finally:
+            _session_lock.release()
+
+    def enable(self):
+        """Profile le thread courant jusqu'à disable() ; retourne l'état à restaurer.
+
+        Sans session ouverte, ou si le cProfile est déjà actif dans un autre
+        thread, le thread courant n'est pas profilé (état None).
+        """
+        if self.status != "recorded" or not self.lock.acquire(blocking=False):
+            return None
+        try:
+            self.profile.enable()
+        except ValueError as e:
+            # Autre outil de profilage actif (débogueur, couverture)
+            self.status = f"unavailable: {e}"
+            self.lock.release()
+            return None
+        previous = active_profiler()
+        _local.profiler = self
+        return (previous,)
+
+    def disable(self, state):
+        if state is None:
+            return
+        self.profile.disable()
+        _local.profiler = state[0]
+        self.lock.release()
+
+    def wrap(self, func):
+        """Version de `func` profilée dans le thread qui l'exécute (si le cProfile n'est actif dans aucun autre)"""
+        def profiled(*args, **kwargs):
+            if active_profiler() is self:
+                return func(*args, **kwargs)  # Thread déjà profilé (traitement séquentiel)
+            state = self.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.disable(state)
+        return profiled
+
+    def __enter__(self):
+        self.start()
+        self._state = self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.disable(self._state)
+        self.stop()
+        return False
+
+    def report(self):
+        """Écrit les profils dans `output_dir` et retourne le résumé renvoyé au client.
+
+        Une erreur d'écriture n'interrompt pas la requête : elle est indiquée
+        dans le résumé, qui garde les fonctions les plus coûteuses.
+        """
+        summary = {"id": self.profile_id, "status": self.status, "wall_time": round(self.wall_time, 6), "files": {}}
+        if self.status != "recorded":
+            return summary
+        base = os.path.join(self.output_dir, self.profile_id)
+        stats = pstats.Stats(self.profile) if self.profile.getstats() else None
+        if stats is not None:
+            summary["by_self_time"] = top_functions(stats, self.top, 2)
+            summary["by_cumulative_time"] = top_functions(stats, self.top, 3)
+        summary["torch"] = self.torch_status
+        if self.torch_profile is not None:
+            summary["torch_ops"] = top_torch_ops(self.torch_profile, self.top)
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            if stats is not None:
+                stats.dump_stats(base + ".prof")
+                summary["files"]["cprofile"] = base + ".prof"
+            if self.torch_profile is not None:
+                self.torch_profile.export_chrome_trace(base + ".trace.json")
+                summary["files"]["torch_trace"] = base + ".trace.json"
+        except OSError as e:
+            summary["error"] = f"Écriture du profil impossible: {e}"
+        return summary
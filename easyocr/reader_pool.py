@@ -0,0 +1,109 @@
+import math
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Configuration par défaut (surchargeable via .env)
+CPU_POOL_SIZE = int(os.getenv('OCR_CPU_POOL_SIZE', '2'))
+GPU_POOL_SIZE = int(os.getenv('OCR_GPU_POOL_SIZE', '1'))
+QUEUE_MAX = int(os.getenv('OCR_QUEUE_MAX', '16'))
+QUEUE_TIMEOUT = float(os.getenv('OCR_QUEUE_TIMEOUT', '30'))
+
+
+class PoolBusyError(Exception):
+    """File d'attente pleine ou attente trop longue : le client doit réessayer plus tard"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def threads_per_reader(pool_size, workers=1, cpu_count=None):
+    """Threads PyTorch par reader pour que les readers simultanés se partagent les cœurs"""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, workers * pool_size))
+
+
+class ReaderPool:
+    """Pool de readers EasyOCR prêtés à une seule requête à la fois.
+
+    Chaque requête emprunte un reader avec acquire() ; lorsque tous sont
+    occupés, elle attend dans une file bornée. Au-delà de `max_queue`
+    requêtes en attente (ou après `timeout` secondes), PoolBusyError est levée
+    avec un délai Retry-After estimé d'après la durée moyenne d'utilisation.
+    """
+
+    def __init__(self, name, readers, max_queue=QUEUE_MAX, timeout=QUEUE_TIMEOUT):
+        self.name = name
+        self.size = len(readers)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.available = queue.LifoQueue()
+        for reader in readers:
+            self.available.put(reader)
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.busy = 0
+        self.served = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_hold = 0.0
+
+    def retry_after(self):
+        """Délai conseillé (secondes) avant de réessayer, d'après la file actuelle (verrou tenu)"""
+        average_hold = self.total_hold / self.served if self.served else 1.0
+        return max(1, math.ceil(average_hold * (self.waiting + 1) / self.size))
+
+    @contextmanager
+    def acquire(self):
+        """Prête un reader pour la durée du bloc with"""
+        with self.lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise PoolBusyError(f"File d'attente OCR pleine ({self.waiting} requêtes)", self.retry_after())
+            self.waiting += 1
+
+        wait_start = time.time()
+        try:
+            reader = self.available.get(timeout=self.timeout)
+        except queue.Empty:
+            with self.lock:
+                self.waiting -= 1
+                self.rejected += 1
+                retry_after = self.retry_after()
+            raise PoolBusyError(f"Aucun reader OCR libre après {self.timeout:.0f}s", retry_after)
+        wait_time = time.time() - wait_start
+
+        with self.lock:
+            self.waiting -= 1
+            self.busy += 1
+            self.total_wait += wait_time
+            self.max_wait = max(self.max_wait, wait_time)
+
+        hold_start = time.time()
+        try:
+            yield reader
+        finally:
+            with self.lock:
+                self.busy -= 1
+                self.served += 1
+                self.total_hold += time.time() - hold_start
+            self.available.put(reader)
+
+    def stats(self):
+        """État du pool pour /health"""
+        with self.lock:
+            return {
+                "size": self.size,
+                "busy": self.busy,
+                "queue_depth": self.waiting,
+                "max_queue": self.max_queue,
+                "served": self.served,
+                "rejected": self.rejected,
+                "average_wait": self.total_wait / self.served if self.served else 0.0,
+                "max_wait": self.max_wait,
+                "average_hold": self.total_hold / self.served if self.served else 0.0
+            }
@@ -1,314 +1,1584 @@
-import torch
-import easyocr
 import numpy as np
 import cv2
 import base64
-import json
 import argparse
 import time
 import os
-from flask import Flask, request, jsonify
+import io
+import bisect
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from contextlib import nullcontext
+from flask import Flask, Request, Response, request, jsonify
 from dotenv import load_dotenv
 from flask_cors import CORS
-from openai import OpenAI
+from image_hash import compute_dhash, FrameDeduplicator
+from ocr_cache import OCRResultCache, create_cache_from_env
+from correction_cache import create_correction_cache_from_env, new_request_stats, record_lookup
+from parallel_correction import call_with_retry, run_concurrently, CALL_TIMEOUT, MAX_CONCURRENCY
+from packed_correction import correct_groups_cached
+from text_grouping import group_similar_texts
+from reader_pool import ReaderPool, PoolBusyError, threads_per_reader, CPU_POOL_SIZE, GPU_POOL_SIZE
+from micro_batching import MicroBatcher, MICRO_BATCH_ENABLED
+from adaptive_preprocessing import preprocess_frame, PREPROCESS_MODE
+from detection_tracking import DetectionTracker, DETECTION_REUSE_ENABLED
+from video_frames import VideoFrameSampler, sample_video_bytes, FRAME_INTERVAL, SCENE_CHANGE_ENABLED
+from frame_selection import select_images, select_frame_paths, SELECTION_MODE
+from ocr_results import build_frame_result, to_columnar
+from correction_gate import CorrectionGate, new_gate_stats, record_decision, GATE_ENABLED
+from consensus_merge import merge_texts
+from ocr_jobs import JobQueue, stream_events, resume_cursor, JOB_CHUNK_SIZE
+from warmup import LazyLoader, start_warmup, WARMUP_MODE, READY_TIMEOUT
+from instrumentation import (metrics, get_logger, configure_logging, record_performance, record_correction_cache,
+                             record_error, PROMETHEUS_CONTENT_TYPE)
+from profiling import request_profiler, active_profiler
 
 # Charger les variables d'environnement
 load_dotenv()
+configure_logging()
+log = get_logger("service")
+
+class InMemoryRequest(Request):
+    """Requête Flask qui conserve les fichiers uploadés dans un BytesIO.
+
+    Le décodage peut ainsi lire directement le tampon reçu via getbuffer()
+    au lieu de passer par un fichier temporaire et une copie supplémentaire.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
 
 app = Flask(__name__)
+app.request_class = InMemoryRequest
 CORS(app)  # Permettre les requêtes cross-origin
 
-# Variables globales pour stocker les modèles préchargés
-gpu_reader = None
-cpu_reader = None
+# Modules lourds (plusieurs secondes) importés au chargement des modèles, pas au démarrage
+torch = None
+easyocr = None
+ocr_modules_lock = threading.Lock()
+modules_import_time = None
+
+# Mode de chargement effectif et temps de chargement de chaque reader, pour /ready
+warmup_mode = WARMUP_MODE
+reader_load_times = {}
+service_start_time = time.time()
+
+# Pools de modèles préchargés (un reader n'est utilisé que par une requête à la fois)
+gpu_pool = None
+cpu_pool = None
+READER_LANGS = ['fr', 'en']
+# Nombre de processus servant l'application (workers gunicorn)
+WORKERS = int(os.getenv('OCR_WORKERS', '1'))
 
-# Initialiser le client OpenAI
+# Regroupement des frames de /process arrivant simultanément, un par pool
+# (créés au premier usage pour que leurs threads appartiennent au worker)
+micro_batchers = {}
+micro_batchers_lock = threading.Lock()
+
+# Cache persistant des résultats OCR (dossier cache/)
+ocr_cache = create_cache_from_env()
+
+# Hashes perceptuels des dernières frames traitées par /process, par prétraitement
+# (mode, taille de redimensionnement) : les clés viennent du client, seuls les
+# RECENT_FRAMES_KEYS_MAX derniers prétraitements utilisés sont gardés
+recent_frames = OrderedDict()
+recent_frames_lock = threading.Lock()
+RECENT_FRAMES_MAX = 64
+RECENT_FRAMES_KEYS_MAX = 8
+DEDUP_THRESHOLD = 4
+
+# Le client OpenAI est créé à la première correction ou pendant le préchauffage
 api_key = os.getenv('OPENAI_API_KEY')
-if api_key:
-    client = OpenAI(api_key=api_key)
-else:
-    client = None
-    print("AVERTISSEMENT: Clé API OpenAI non définie, la correction de texte ne sera pas disponible")
+if not api_key:
+    log.warning("openai_key_missing", detail="la correction de texte ne sera pas disponible")
 
-def initialize_readers():
-    """Initialise les lecteurs EasyOCR (GPU et CPU) et les garde en mémoire"""
-    global gpu_reader, cpu_reader
+# Modèle utilisé pour la correction et cache des corrections déjà obtenues
+CORRECTION_MODEL = "gpt-3.5-turbo-16k"
+correction_cache = create_correction_cache_from_env()
+usage_lock = threading.Lock()
+# Filtre local : seuls les textes douteux sont envoyés à ChatGPT
+correction_gate = CorrectionGate()
+
+# Jobs OCR en arrière-plan (/jobs), traités par run_ocr_job
+ocr_jobs = JobQueue(lambda job: run_ocr_job(job))
+
+# Valeurs instantanées de /metrics, lues à chaque export
+metrics.gauge("easyocr_uptime_seconds", "Durée depuis le démarrage du service", lambda: time.time() - service_start_time)
+metrics.gauge("easyocr_reader_pool_busy", "Readers prêtés à une requête", lambda: {
+    pool.name: pool.stats()["busy"] for pool in (gpu_pool, cpu_pool) if pool is not None
+}, ("pool",))
+metrics.gauge("easyocr_reader_pool_queue_depth", "Requêtes en attente d'un reader", lambda: {
+    pool.name: pool.stats()["queue_depth"] for pool in (gpu_pool, cpu_pool) if pool is not None
+}, ("pool",))
+metrics.gauge("easyocr_jobs", "Jobs OCR en attente ou en cours", lambda: {
+    state: ocr_jobs.stats()[state] for state in ("queued", "running")
+}, ("state",))
+
+def configure_torch_threads():
+    """Répartit les cœurs CPU entre les readers qui peuvent tourner simultanément"""
+    threads = threads_per_reader(CPU_POOL_SIZE, WORKERS)
+    torch.set_num_threads(threads)
+    log.info("torch_threads", per_reader=threads)
+
+def load_ocr_modules():
+    """Importe torch et easyocr au premier chargement de modèle"""
+    global torch, easyocr, modules_import_time
+    with ocr_modules_lock:
+        if torch is not None:
+            return
+        start_time = time.time()
+        import easyocr
+        import torch
+        modules_import_time = time.time() - start_time
+        log.info("modules_imported", seconds=modules_import_time, cuda=torch.cuda.is_available(),
+                 gpu=torch.cuda.get_device_name(0) if torch.cuda.is_available() else None)
+        configure_torch_threads()
+
+def build_readers(name, count, **options):
+    """Construit `count` readers EasyOCR en mesurant le temps de chargement de chacun"""
+    readers = []
+    reader_load_times[name] = []
+    for _ in range(count):
+        start_time = time.time()
+        readers.append(easyocr.Reader(READER_LANGS, download_enabled=False, detector=True, recognizer=True, **options))
+        reader_load_times[name].append(time.time() - start_time)
+    return readers
+
+def load_gpu_pool():
+    """Initialise le pool GPU, ou retourne None si le GPU est absent ou désactivé"""
+    global gpu_pool
+    load_ocr_modules()
     
     # Récupérer la configuration GPU depuis .env
     use_gpu = os.getenv('EASYOCR_GPU_ENABLED', 'True').lower() == 'true'
+    if not (use_gpu and torch.cuda.is_available()):
+        log.info("gpu_unavailable", enabled=use_gpu)
+        return None
     
-    print(f"CUDA disponible: {torch.cuda.is_available()}")
-    if torch.cuda.is_available():
-        print(f"GPU actif: {torch.cuda.get_device_name(0)}")
+    log.info("pool_loading", pool="gpu", readers=GPU_POOL_SIZE)
+    start_time = time.time()
+    gpu_pool = ReaderPool("gpu", build_readers("gpu", GPU_POOL_SIZE,
+                                               gpu=True,
+                                               quantize=False,
+                                               cudnn_benchmark=True))
+    log.info("pool_ready", pool="gpu", seconds=time.time() - start_time)
+    return gpu_pool
+
+def load_cpu_pool():
+    """Initialise le pool CPU, toujours disponible comme fallback"""
+    global cpu_pool
+    load_ocr_modules()
     
-    print("Initialisation des modèles EasyOCR (cela peut prendre quelques secondes)...")
+    log.info("pool_loading", pool="cpu", readers=CPU_POOL_SIZE)
+    start_time = time.time()
+    cpu_pool = ReaderPool("cpu", build_readers("cpu", CPU_POOL_SIZE,
+                                               gpu=False,
+                                               quantize=True))  # Quantification pour CPU
+    log.info("pool_ready", pool="cpu", seconds=time.time() - start_time)
+    return cpu_pool
+
+def create_openai_client():
+    """Crée le client OpenAI (l'import du module prend plus d'une demi-seconde)"""
+    if not api_key:
+        return None
+    from openai import OpenAI
+    # Les nouveaux essais sont gérés par call_with_retry (backoff sur 429/5xx)
+    return OpenAI(api_key=api_key, timeout=CALL_TIMEOUT, max_retries=0)
+
+# Chargements différés, dans l'ordre du préchauffage (voir OCR_WARMUP_MODE)
+loaders = {
+    "gpu": LazyLoader("gpu", load_gpu_pool),
+    "cpu": LazyLoader("cpu", load_cpu_pool),
+    "openai": LazyLoader("openai", create_openai_client)
+}
+
+def get_client():
+    """Client OpenAI, ou None si la clé API n'est pas définie"""
+    return loaders["openai"].get(READY_TIMEOUT)
+
+def get_reader_pool(use_gpu):
+    """Pool de readers à utiliser, en attendant la fin de son chargement si nécessaire.
+
+    Retourne le pool GPU si demandé et disponible, sinon le pool CPU, ainsi
+    que le temps passé à attendre le chargement des modèles.
+    """
+    start_time = time.time()
+    pool = loaders["gpu"].get(READY_TIMEOUT) if use_gpu else None
+    if pool is None:
+        pool = loaders["cpu"].get(READY_TIMEOUT)
+    return pool, time.time() - start_time
+
+def release_gpu_memory():
+    """Libère la mémoire GPU inutilisée (sans effet tant que torch n'est pas chargé)"""
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def initialize_readers():
+    """Initialise les pools de lecteurs EasyOCR (GPU et CPU) et les garde en mémoire"""
+    log.info("readers_loading")
+    for loader in loaders.values():
+        loader.get()
+    log.info("readers_ready")
+    return True
+
+def create_app():
+    """Point d'entrée gunicorn : charge les modèles avant le fork des workers.
+
+    Avec preload_app, les poids sont chargés une seule fois dans le processus
+    maître et partagés en copie sur écriture par les workers. Le chargement
+    est donc toujours immédiat ici, quel que soit OCR_WARMUP_MODE.
+    """
+    global warmup_mode
+    warmup_mode = "eager"
+    initialize_readers()
+    return app
+
+def reset_after_fork():
+    """Réinitialise dans un worker gunicorn ce qui ne survit pas au fork"""
+    global ocr_cache, correction_cache, micro_batchers, ocr_jobs
+    # Les connexions SQLite ne doivent pas être partagées entre processus
+    ocr_cache = create_cache_from_env()
+    correction_cache = create_correction_cache_from_env()
+    # Les threads des répartiteurs et des jobs ne survivent pas au fork
+    micro_batchers = {}
+    ocr_jobs = JobQueue(lambda job: run_ocr_job(job))
+    if torch is not None:
+        configure_torch_threads()
+
+def get_micro_batcher(pool, batch_size, canvas_size):
+    """Répartiteur de micro-lots associé à un pool de readers"""
+    with micro_batchers_lock:
+        batcher = micro_batchers.get(pool.name)
+        if batcher is None:
+            def process(images):
+                with pool.acquire() as reader:
+                    lines_per_image, detection_time, recognition_time = ocr_frames_batched(
+                        reader, images, batch_size=batch_size, canvas_size=canvas_size
+                    )
+                return [(lines, detection_time + recognition_time) for lines in lines_per_image]
+            batcher = MicroBatcher(pool.name, process, workers=pool.size, max_pending=pool.max_queue)
+            micro_batchers[pool.name] = batcher
+        return batcher
+
+def busy_response(error):
+    """Réponse 503 avec Retry-After lorsque la file d'attente OCR est pleine"""
+    return jsonify({"error": str(error), "retry_after": error.retry_after}), 503, {"Retry-After": str(error.retry_after)}
+
+# Paramètres OCR communs à tous les endpoints
+OCR_PARAMS = {
+    'min_size': 10,         # Taille minimum des textes
+    'contrast_ths': 0.3,    # Seuil de contraste
+    'adjust_contrast': 0.5, # Ajustement de contraste
+    'text_threshold': 0.6,  # Seuil de reconnaissance de texte
+    'link_threshold': 0.3,  # Seuil de liaison
+    'width_ths': 0.5,       # Seuil de largeur
+    'low_text': 0.3,        # Seuil de texte faible
+}
+
+# Paramètres utilisés uniquement par le détecteur
+DETECT_PARAM_KEYS = ('min_size', 'text_threshold', 'link_threshold', 'width_ths', 'low_text')
+
+def preprocess_image(image_data, scale_percent=30, mode=PREPROCESS_MODE):
+    """Prétraiter l'image pour accélérer l'OCR.
+
+    En mode "adaptive", seules les bandes de texte probables sont conservées,
+    à une échelle choisie d'après la taille estimée du texte (`scale_percent`
+    sert alors d'échelle minimale) ; en mode "fixed", toute l'image est réduite
+    à `scale_percent`. Retourne l'image prétraitée et la description des bandes.
+    """
+    return preprocess_frame(image_data, scale_percent, mode)
+
+def get_recent_frames(scale_percent, mode=PREPROCESS_MODE):
+    """Retourne le dédoublonneur des frames récentes pour un prétraitement donné"""
+    key = (mode, scale_percent)
+    with recent_frames_lock:
+        deduplicator = recent_frames.get(key)
+        if deduplicator is None:
+            deduplicator = FrameDeduplicator(threshold=DEDUP_THRESHOLD, max_entries=RECENT_FRAMES_MAX)
+            recent_frames[key] = deduplicator
+            if len(recent_frames) > RECENT_FRAMES_KEYS_MAX:
+                recent_frames.popitem(last=False)
+        else:
+            recent_frames.move_to_end(key)
+        return deduplicator
+
+def get_cache_key(image, scale_percent, canvas_size, mode=PREPROCESS_MODE):
+    """Clé de cache d'une image pour un jeu de paramètres OCR donné"""
+    params = {
+        "scale_percent": scale_percent,
+        "preprocess": mode,
+        "canvas_size": canvas_size,
+        "langs": READER_LANGS,
+        **OCR_PARAMS
+    }
+    return OCRResultCache.make_key(image, params)
+
+def get_request_options():
+    """Retourne les options de la requête quel que soit le format du corps"""
+    if request.mimetype == 'multipart/form-data':
+        return request.form
+    if request.mimetype == 'application/octet-stream':
+        return request.args
+    return request.get_json(silent=True) or {}
+
+def parse_option(options, name, default):
+    """Lit une option en convertissant les valeurs texte (formulaire, query string)"""
+    value = options.get(name, default)
+    if isinstance(value, str) and not isinstance(default, str):
+        if isinstance(default, bool):
+            return value.lower() in ('1', 'true', 'yes')
+        return type(default)(value)
+    return value
+
+def parse_detail(options):
+    """Niveau de détail demandé : None (textes seuls), "lines" ou "columnar".
+
+    "lines" ajoute à chaque résultat ses lignes et paragraphes avec boîtes et
+    confiances ; "columnar" encode les lignes de tous les résultats en
+    tableaux parallèles (voir to_columnar). `detail=true` équivaut à "lines".
+    """
+    detail = options.get('detail')
+    if isinstance(detail, str):
+        detail = detail.lower()
+    if detail in (True, '1', 'true', 'yes', 'lines'):
+        return "lines"
+    if detail == 'columnar':
+        return "columnar"
+    return None
+
+def add_detail(result, frame_result):
+    """Ajoute au résultat la confiance de chaque texte, ses lignes et ses paragraphes"""
+    result["confidences"] = [paragraph["confidence"] for paragraph in frame_result["paragraphs"]]
+    result["lines"] = frame_result["lines"]
+    result["paragraphs"] = frame_result["paragraphs"]
+    return result
+
+def columnar_lines(results):
+    """Retire les lignes des résultats et les retourne en tableaux parallèles.
+
+    L'index de frame des colonnes est la position du résultat dans `results` ;
+    la boîte d'un paragraphe se déduit de celles de ses lignes.
+    """
+    frame_results = []
+    for result in results:
+        result.pop("paragraphs", None)
+        frame_results.append({"lines": result.pop("lines", [])})
+    return to_columnar(frame_results)
+
+def decode_image_buffer(buffer, transport, bytes_received, bytes_copied, start_time):
+    """Décode un tampon d'image sans le copier et mesure le coût du décodage"""
+    img_array = np.frombuffer(buffer, np.uint8)
+    image = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    stats = {
+        "transport": transport,
+        "bytes_received": bytes_received,
+        "bytes_copied": bytes_copied,
+        "decode_time": time.time() - start_time
+    }
+    return image, stats
+
+def load_request_images(field):
+    """Extrait et décode les images de la requête.
+
+    Accepte un corps application/octet-stream (une image brute), un formulaire
+    multipart/form-data (un ou plusieurs fichiers dans `field`) ou le format JSON
+    historique avec des images en Base64. Retourne une liste de couples
+    (image, statistiques) où les statistiques indiquent les octets reçus, les
+    octets copiés dans des tampons intermédiaires et le temps de décodage.
+    """
+    frames = []
     
-    # Initialiser le modèle GPU si possible
-    if use_gpu and torch.cuda.is_available():
-        print("Initialisation du modèle GPU...")
+    if request.mimetype == 'application/octet-stream':
+        # Le corps est lu une seule fois puis décodé directement
         start_time = time.time()
-        gpu_reader = easyocr.Reader(['fr', 'en'], 
-                                   gpu=True,
-                                   quantize=False,
-                                   download_enabled=False,
-                                   detector=True,
-                                   recognizer=True,
-                                   cudnn_benchmark=True)
-        print(f"Modèle GPU initialisé en {time.time() - start_time:.2f}s")
-    else:
-        print("GPU non disponible ou désactivé")
+        body = request.get_data(cache=False)
+        if body:
+            frames.append(decode_image_buffer(body, "octet-stream", len(body), 0, start_time))
+        return frames
     
-    # Toujours initialiser le modèle CPU comme fallback
-    print("Initialisation du modèle CPU...")
+    if request.mimetype == 'multipart/form-data':
+        for storage in request.files.getlist(field):
+            start_time = time.time()
+            # Vue mémoire sur le BytesIO de la requête, sans copie
+            buffer = storage.stream.getbuffer()
+            frames.append(decode_image_buffer(buffer, "multipart", buffer.nbytes, 0, start_time))
+        return frames
+    
+    # Format JSON historique avec images en Base64
+    data = request.get_json(silent=True) or {}
+    images_b64 = data.get(field) or []
+    if isinstance(images_b64, str):
+        images_b64 = [images_b64]
+    return [decode_base64_image(image_b64) for image_b64 in images_b64]
+
+def decode_base64_image(image_b64):
+    """Décode une image Base64 du format JSON historique (préfixe data:image accepté)"""
     start_time = time.time()
-    cpu_reader = easyocr.Reader(['fr', 'en'], 
-                               gpu=False,
-                               quantize=True,  # Quantification pour CPU
-                               download_enabled=False,
-                               detector=True,
-                               recognizer=True)
-    print(f"Modèle CPU initialisé en {time.time() - start_time:.2f}s")
-    
-    print("Modèles EasyOCR initialisés et prêts")
-    return True
+    bytes_received = len(image_b64)
+    bytes_copied = len(image_b64)  # Chaîne issue du parsing JSON
+    if image_b64.startswith('data:image'):
+        image_b64 = image_b64.split(',')[1]
+        bytes_copied += len(image_b64)
+    img_bytes = base64.b64decode(image_b64)
+    bytes_copied += len(img_bytes)
+    return decode_image_buffer(img_bytes, "base64", bytes_received, bytes_copied, start_time)
+
+def ocr_frames_batched(reader, images, batch_size=1, canvas_size=1024):
+    """Effectue l'OCR de plusieurs images prétraitées en une seule passe.
 
-def preprocess_image(image_data, scale_percent=30):
-    """Prétraiter l'image pour accélérer l'OCR"""
-    # Redimensionner l'image
-    width = int(image_data.shape[1] * scale_percent / 100)
-    height = int(image_data.shape[0] * scale_percent / 100)
-    resized = cv2.resize(image_data, (width, height))
+    La détection (CRAFT) est exécutée en lot sur toutes les images de même taille,
+    puis les zones détectées de toutes les images sont envoyées ensemble au
+    reconnaisseur en empilant les images verticalement. Retourne les lignes
+    reconnues par image ([boîte, texte, confiance], voir build_frame_result)
+    et les temps de détection et de reconnaissance.
+    """
+    detect_params = {key: OCR_PARAMS[key] for key in DETECT_PARAM_KEYS}
     
-    # Convertir en niveaux de gris
-    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    # Détection en lot par groupe d'images de même dimension
+    detect_start = time.time()
+    horizontal_lists = [None] * len(images)
+    free_lists = [None] * len(images)
+    shapes = {}
+    for index, image in enumerate(images):
+        shapes.setdefault(image.shape[:2], []).append(index)
+    for indices in shapes.values():
+        batch = np.stack([cv2.cvtColor(images[i], cv2.COLOR_GRAY2BGR) for i in indices])
+        horizontal_agg, free_agg = reader.detect(
+            batch,
+            reformat=False,
+            canvas_size=canvas_size,
+            **detect_params
+        )
+        for i, horizontal_list, free_list in zip(indices, horizontal_agg, free_agg):
+            horizontal_lists[i] = horizontal_list
+            free_lists[i] = free_list
+    detection_time = time.time() - detect_start
     
-    # Améliorer le contraste pour une meilleure détection de texte
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-    enhanced = clahe.apply(gray)
+    # Reconnaître toutes les zones en un seul appel
+    recog_start = time.time()
+    lines_per_image = recognize_stacked(reader, images, horizontal_lists, free_lists, batch_size)
+    recognition_time = time.time() - recog_start
     
-    return enhanced
+    return lines_per_image, detection_time, recognition_time
 
-def correct_text_with_chatgpt(texts):
-    """Utilise ChatGPT pour corriger un groupe de textes similaires."""
-    if not client:
-        return "\n".join(texts) if isinstance(texts, list) else texts
+def recognize_stacked(reader, images, horizontal_lists, free_lists, batch_size=1):
+    """Reconnaît les zones de plusieurs images en les empilant verticalement.
+
+    Retourne, pour chaque image, les lignes reconnues ([boîte, texte, confiance])
+    avec des coordonnées relatives à cette image.
+    """
+    max_width = max(image.shape[1] for image in images)
+    offsets = []
+    stacked_horizontal = []
+    stacked_free = []
+    offset = 0
+    for image, horizontal_list, free_list in zip(images, horizontal_lists, free_lists):
+        height, width = image.shape[:2]
+        offsets.append(offset)
+        for x_min, x_max, y_min, y_max in horizontal_list:
+            # Limiter les zones à leur image pour ne pas déborder sur la voisine
+            stacked_horizontal.append([
+                max(0, x_min), min(width, x_max),
+                max(0, y_min) + offset, min(height, y_max) + offset
+            ])
+        for box in free_list:
+            stacked_free.append([
+                [min(max(0, x), width), min(max(0, y), height) + offset] for x, y in box
+            ])
+        offset += height
     
-    start_time = time.time()
+    lines_per_image = [[] for _ in images]
+    if not stacked_horizontal and not stacked_free:
+        return lines_per_image
+    
+    stacked = np.zeros((offset, max_width), dtype=np.uint8)
+    for image, start in zip(images, offsets):
+        stacked[start:start + image.shape[0], :image.shape[1]] = image
     
-    # Prompt plus concis pour réduire les tokens
-    messages = [
-        {"role": "system", "content": "Corrige les erreurs OCR et retourne uniquement la meilleure version du texte."},
-        {"role": "user", "content": "\n---\n".join(texts if isinstance(texts, list) else [texts])}
-    ]
+    lines = reader.recognize(
+        stacked,
+        stacked_horizontal,
+        stacked_free,
+        batch_size=batch_size,
+        detail=1,
+        paragraph=False,
+        contrast_ths=OCR_PARAMS['contrast_ths'],
+        adjust_contrast=OCR_PARAMS['adjust_contrast'],
+        reformat=False
+    )
+    
+    # Répartir les lignes reconnues entre les images d'origine
+    for box, text, confidence in lines:
+        top = min(point[1] for point in box)
+        index = bisect.bisect_right(offsets, top) - 1
+        start = offsets[index]
+        local_box = [[point[0], point[1] - start] for point in box]
+        lines_per_image[index].append([local_box, text, confidence])
+    return lines_per_image
 
-    # Utiliser gpt-3.5-turbo-16k pour des réponses rapides
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo-16k",
-        messages=messages,
-        temperature=0.1,  # Très bas pour plus de cohérence
-        max_tokens=200,   # Réduire pour plus de rapidité
-        top_p=0.95        # Réduire la randomisation
+def ocr_frames_tracked(reader, images, batch_size=1, canvas_size=1024):
+    """OCR incrémental des frames successives d'une vidéo.
+
+    La détection n'est lancée que sur les keyframes ; sur les autres frames,
+    les boîtes de la keyframe sont réutilisées et seules celles dont les pixels
+    ont changé sont reconnues à nouveau (voir DetectionTracker). Les zones à
+    relire de toutes les frames sont reconnues en un seul appel empilé.
+    Retourne les lignes de chaque image (reconnues ou réutilisées), les temps
+    de détection et de reconnaissance et les statistiques de réutilisation.
+    """
+    detect_params = {key: OCR_PARAMS[key] for key in DETECT_PARAM_KEYS}
+    
+    def detect(image):
+        horizontal_agg, free_agg = reader.detect(
+            cv2.cvtColor(image, cv2.COLOR_GRAY2BGR),
+            reformat=False,
+            canvas_size=canvas_size,
+            **detect_params
+        )
+        return horizontal_agg[0], free_agg[0]
+    
+    tracker = DetectionTracker(detect)
+    detect_start = time.time()
+    plans = [tracker.plan(index, image) for index, image in enumerate(images)]
+    detection_time = time.time() - detect_start
+    
+    recog_start = time.time()
+    boxes = [plan.boxes_to_recognize() for plan in plans]
+    lines_per_image = recognize_stacked(
+        reader, images, [horizontal for horizontal, _ in boxes], [free for _, free in boxes], batch_size
     )
-    gpt_time = time.time() - start_time
-    print(f"GPT correction time: {gpt_time:.2f} seconds")
+    recognition_time = time.time() - recog_start
+    
+    frame_lines = [tracker.collect(plan, lines, recognition_time / len(plans))
+                   for plan, lines in zip(plans, lines_per_image)]
+    
+    return frame_lines, detection_time, recognition_time, tracker.stats()
+
+def correct_text_with_chatgpt(texts, cache_stats=None, usage=None):
+    """Utilise ChatGPT pour corriger un groupe de textes similaires.
+
+    Les corrections déjà obtenues sont réutilisées depuis le cache et les
+    requêtes identiques concurrentes partagent un seul appel à l'API.
+    `cache_stats` (voir new_request_stats) reçoit les compteurs de la requête
+    et `usage` les tokens consommés.
+    """
+    if not get_client():
+        return "\n".join(texts) if isinstance(texts, list) else texts
+    
+    texts = texts if isinstance(texts, list) else [texts]
+    key = correction_cache.make_key(texts, CORRECTION_MODEL)
+    corrected, source, saved_seconds = correction_cache.get_or_compute(
+        key, lambda: request_chatgpt_correction(texts, usage)
+    )
+    record_lookup(cache_stats, source, saved_seconds)
+    return corrected
+
+def correct_frame_texts(texts, confidences=None, gate=GATE_ENABLED, gate_stats=None):
+    """Corrige les paragraphes d'une frame, sauf si le filtre local juge la lecture fiable.
 
+    Retourne le texte corrigé (ou retenu tel quel) et la décision du filtre
+    (None si le filtre est désactivé) ; `gate_stats` (voir new_gate_stats)
+    reçoit les compteurs de la requête.
+    """
+    decision = gate_frame_texts(texts, confidences, gate, gate_stats)
+    if decision is not None and not decision["use_llm"]:
+        return decision["text"], gate_summary(decision)
+    return correct_text_with_chatgpt(texts), gate_summary(decision)
+
+def gate_frame_texts(texts, confidences=None, gate=GATE_ENABLED, gate_stats=None):
+    """Décision du filtre local pour les paragraphes d'une frame (None si désactivé)"""
+    if not gate:
+        return None
+    decision = correction_gate.decide(texts, confidences, variants=False)
+    record_decision(gate_stats, decision)
+    return decision
+
+def gate_summary(decision):
+    """Décision du filtre exposée dans les réponses (sans le texte retenu)"""
+    if decision is None:
+        return None
+    return {key: value for key, value in decision.items() if key != "text"}
+
+def frame_confidences(frame_result):
+    """Confiance de chaque paragraphe d'une frame (None pour une entrée de cache sans détail)"""
+    paragraphs = frame_result.get("paragraphs")
+    return [paragraph["confidence"] for paragraph in paragraphs] if paragraphs is not None else None
+
+def new_usage_stats():
+    """Compteurs de tokens consommés par une requête"""
+    return {"prompt_tokens": 0, "completion_tokens": 0}
+
+def record_usage(usage, response_usage):
+    """Ajoute l'usage retourné par l'API aux compteurs d'une requête"""
+    if usage is None or response_usage is None:
+        return
+    with usage_lock:
+        usage["prompt_tokens"] += response_usage.prompt_tokens
+        usage["completion_tokens"] += response_usage.completion_tokens
+
+def correct_groups_with_chatgpt_packed(groups, cache_stats=None):
+    """Corrige plusieurs groupes en regroupant les groupes non mis en cache dans un seul appel.
+
+    Retourne un couple (correction, erreur) par groupe, dans l'ordre des
+    groupes (voir correct_groups_cached), et les statistiques de l'appel
+    groupé (lots, replis groupe par groupe, tokens, durée).
+    """
+    return correct_groups_cached(
+        groups, correction_cache, CORRECTION_MODEL, request_packed_correction,
+        # Repli groupe par groupe : cache et compteurs gérés par correct_text_with_chatgpt
+        lambda group: correct_text_with_chatgpt(group, cache_stats),
+        on_lookup=lambda source, saved_seconds: record_lookup(cache_stats, source, saved_seconds)
+    )
+
+def request_packed_correction(messages, max_tokens):
+    """Appelle l'API ChatGPT avec le prompt groupé de plusieurs groupes"""
+    response = call_with_retry(lambda: get_client().chat.completions.create(
+        model=CORRECTION_MODEL,
+        messages=messages,
+        temperature=0.1,
+        max_tokens=max_tokens,
+        top_p=0.95
+    ))
+    return response.choices[0].message.content, response.usage
+
+def correction_request(texts):
+    """Paramètres de l'appel ChatGPT corrigeant un groupe de textes similaires"""
+    return {
+        # Utiliser gpt-3.5-turbo-16k pour des réponses rapides
+        "model": CORRECTION_MODEL,
+        # Prompt plus concis pour réduire les tokens
+        "messages": [
+            {"role": "system", "content": "Corrige les erreurs OCR et retourne uniquement la meilleure version du texte."},
+            {"role": "user", "content": "\n---\n".join(texts)}
+        ],
+        "temperature": 0.1,  # Très bas pour plus de cohérence
+        "max_tokens": 200,   # Réduire pour plus de rapidité
+        "top_p": 0.95        # Réduire la randomisation
+    }
+
+def record_correction_call(gpt_time, usage, response_usage):
+    """Durée et tokens d'un appel de correction effectivement réalisé"""
+    log.debug("correction_call", seconds=gpt_time)
+    correction_gate.record_call(gpt_time)
+    record_usage(usage, response_usage)
+
+def request_chatgpt_correction(texts, usage=None):
+    """Appelle l'API ChatGPT pour corriger un groupe de textes similaires."""
+    start_time = time.time()
+    response = call_with_retry(lambda: get_client().chat.completions.create(**correction_request(texts)))
+    record_correction_call(time.time() - start_time, usage, response.usage)
     return response.choices[0].message.content
 
-def group_similar_texts(texts, threshold=0.7):
-    """Groupe les textes similaires ensemble."""
-    import difflib
+def health_status():
+    """État du service : modèles chargés, caches, filtre de correction et files d'attente"""
+    return {
+        "status": "healthy",
+        "gpu_available": gpu_pool is not None,
+        "cpu_available": cpu_pool is not None,
+        "cuda_available": torch.cuda.is_available() if torch is not None else None,
+        "openai_available": bool(api_key),
+        "ocr_cache": ocr_cache.stats() if ocr_cache is not None else None,
+        "correction_cache": correction_cache.stats(),
+        "correction_gate": correction_gate.stats(),
+        "jobs": ocr_jobs.stats(),
+        "reader_pools": {pool.name: pool.stats() for pool in (gpu_pool, cpu_pool) if pool is not None},
+        "micro_batching": {
+            "enabled": MICRO_BATCH_ENABLED,
+            **{name: batcher.stats() for name, batcher in list(micro_batchers.items())}
+        }
+    }
+
+def readiness_status():
+    """État de chargement de chaque modèle ; retourne l'état et si le service est prêt"""
+    # En mode lazy, un modèle pas encore demandé n'empêche pas de servir
+    ready_states = ("ready", "unavailable", "pending") if warmup_mode == "lazy" else ("ready", "unavailable")
+    status = {}
+    for name, loader in loaders.items():
+        # Un chargement échoué est retenté sans attendre de requête OCR
+        loader.retry_in_background()
+        status[name] = loader.status()
+        if name in reader_load_times:
+            status[name]["reader_load_times"] = reader_load_times[name]
+    ready = all(loader["state"] in ready_states for loader in status.values())
+    return {
+        "ready": ready,
+        "mode": warmup_mode,
+        "uptime": time.time() - service_start_time,
+        "modules_import_time": modules_import_time,
+        "loaders": status
+    }, ready
 
-    if not texts:
-        return []
-        
-    groups = []
-    processed = [False] * len(texts)
-    
-    for i in range(len(texts)):
-        if processed[i]:
-            continue
-            
-        current_group = [texts[i]]
-        processed[i] = True
-        
-        for j in range(i + 1, len(texts)):
-            # Vérifier la similarité avec difflib
-            similarity = difflib.SequenceMatcher(None, texts[i], texts[j]).ratio()
-            if not processed[j] and similarity >= threshold:
-                current_group.append(texts[j])
-                processed[j] = True
-                
-        groups.append(current_group)
-        
-    return groups
+@app.after_request
+def count_errors(response):
+    """Compte les réponses en erreur (4xx, 5xx) par route dans /metrics"""
+    if response.status_code >= 400:
+        record_error(request.url_rule.rule if request.url_rule else "unknown", str(response.status_code))
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Métriques agrégées du processus au format texte de Prometheus"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Endpoint de vérification de l'état du service"""
-    return jsonify({
-        "status": "healthy",
-        "gpu_available": gpu_reader is not None,
-        "cpu_available": cpu_reader is not None,
-        "cuda_available": torch.cuda.is_available(),
-        "openai_available": client is not None
-    })
+    return jsonify(health_status())
 
-@app.route('/process', methods=['POST'])
-def process_image():
-    """Endpoint pour traiter une image avec le modèle préchargé"""
-    start_time = time.time()
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """État de chargement de chaque modèle : 200 une fois prêts, 503 pendant le préchauffage"""
+    status, ready = readiness_status()
+    return jsonify(status), 200 if ready else 503
+
+def ocr_single(image, options):
+    """OCR d'une frame pour /process, sans la correction.
+
+    Cherche le résultat dans le cache persistant puis parmi les frames récentes
+    quasi identiques, sinon prétraite la frame et la lit avec un reader libre
+    (ou dans un micro-lot). Retourne le résultat structuré de la frame (voir
+    build_frame_result) et les métriques de performance de l'OCR.
+    """
+    # Paramètres d'OCR
+    scale_percent = parse_option(options, 'scale_percent', 30)
+    preprocess_mode = parse_option(options, 'preprocess', PREPROCESS_MODE)
+    dedup = parse_option(options, 'dedup', True)
+    use_cache = parse_option(options, 'use_cache', True) and ocr_cache is not None
+    detail = parse_detail(options)
     
-    # Vérifier que les modèles sont chargés
-    if gpu_reader is None and cpu_reader is None:
-        return jsonify({"error": "Les modèles EasyOCR ne sont pas initialisés"}), 500
+    # Sélectionner le pool de readers approprié (attendre son chargement au besoin)
+    pool, model_wait_time = get_reader_pool(parse_option(options, 'use_gpu', True))
+    use_gpu = pool.name == "gpu"
     
-    try:
-        # Récupérer les paramètres de la requête
-        data = request.json
-        if not data or 'image' not in data:
-            return jsonify({"error": "Aucune image fournie"}), 400
-        
-        # Paramètres d'OCR
-        use_gpu = data.get('use_gpu', True) and gpu_reader is not None
-        scale_percent = data.get('scale_percent', 30)
-        correct_text = data.get('correct_text', False)
-        
-        # Décodage de l'image Base64
-        image_b64 = data['image']
-        if image_b64.startswith('data:image'):
-            image_b64 = image_b64.split(',')[1]
-        
-        # Convertir Base64 en image
-        img_bytes = base64.b64decode(image_b64)
-        img_array = np.frombuffer(img_bytes, np.uint8)
-        image = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        
-        if image is None:
-            return jsonify({"error": "Image invalide"}), 400
-        
+    # Paramètres OCR optimisés
+    batch_size = 8 if use_gpu else 1
+    canvas_size = 2048 if use_gpu else 1024
+    
+    # Chercher le résultat dans le cache persistant
+    hash_start = time.time()
+    cache_key = get_cache_key(image, scale_percent, canvas_size, preprocess_mode) if use_cache else None
+    cached = ocr_cache.get(cache_key) if use_cache else None
+    if cached is not None and detail and "lines" not in cached:
+        cached = None  # Entrée antérieure sans boîtes ni confiances
+    
+    # Sinon chercher une frame récente quasi identique pour éviter l'OCR
+    duplicate = None
+    if cached is None and dedup:
+        frame_hash = compute_dhash(image)
+        duplicate = get_recent_frames(scale_percent, preprocess_mode).find(frame_hash)
+    hashing_time = time.time() - hash_start
+    
+    preproc_time = 0
+    preprocess_info = None
+    ocr_time = 0
+    ocr_time_saved = 0
+    queue_wait_time = 0
+    batch_frames = 0
+    if cached is not None:
+        frame_result, ocr_time_saved = cached, cached["ocr_time"]
+    elif duplicate is not None:
+        frame_result, ocr_time_saved = duplicate
+    else:
         # Prétraitement de l'image
         preproc_start = time.time()
-        preprocessed = preprocess_image(image, scale_percent)
+        preprocessed, preprocess_info = preprocess_image(image, scale_percent, preprocess_mode)
         preproc_time = time.time() - preproc_start
         
-        # Sélectionner le reader approprié
-        reader = gpu_reader if use_gpu else cpu_reader
+        if MICRO_BATCH_ENABLED and active_profiler() is None:
+            # Regrouper avec les frames des requêtes concurrentes (sauf requête profilée :
+            # l'OCR doit tourner dans le thread profilé)
+            (lines, ocr_time), batch_frames, queue_wait_time = get_micro_batcher(
+                pool, batch_size, canvas_size
+            ).submit(preprocessed)
+        else:
+            # Effectuer l'OCR avec un reader libre du pool
+            wait_start = time.time()
+            with pool.acquire() as reader:
+                queue_wait_time = time.time() - wait_start
+                ocr_start = time.time()
+                lines = reader.readtext(
+                    preprocessed,
+                    detail=1,           # Boîtes et confiances de chaque ligne
+                    paragraph=False,    # Paragraphes regroupés par build_frame_result
+                    batch_size=batch_size,
+                    canvas_size=canvas_size,
+                    **OCR_PARAMS
+                )
+                ocr_time = time.time() - ocr_start
+        
+        # Paragraphes, boîtes dans la frame d'origine et confiances
+        frame_result = build_frame_result(lines, preprocess_info)
+        if dedup:
+            get_recent_frames(scale_percent, preprocess_mode).add(frame_hash, (frame_result, ocr_time))
+        if use_cache:
+            ocr_cache.put(cache_key, {**frame_result, "ocr_time": ocr_time})
+    
+    # Libérer la mémoire GPU si utilisée
+    if use_gpu:
+        release_gpu_memory()
+    
+    return frame_result, {
+        "hashing_time": hashing_time,
+        "preprocessing_time": preproc_time,
+        "preprocessing": preprocess_info,
+        "model_wait_time": model_wait_time,
+        "queue_wait_time": queue_wait_time,
+        "batch_frames": batch_frames,
+        "ocr_time": ocr_time,
+        "cache_hit": cached is not None,
+        "frames_skipped": 1 if duplicate is not None else 0,
+        "ocr_time_saved": ocr_time_saved,
+        "gpu_used": use_gpu
+    }
+
+def wants_correction(frame_result, options, client_available=lambda: get_client() is not None):
+    """Indique si les textes d'une frame doivent passer par la correction.
+
+    `client_available` n'est appelé que si la correction est demandée, pour
+    ne pas attendre le chargement du client OpenAI sans raison.
+    """
+    return bool(parse_option(options, 'correct_text', False) and frame_result["texts"] and client_available())
+
+def single_response(frame_result, decode_stats, performance, correction, options, start_time):
+    """Réponse JSON de /process ; `correction` vaut (texte corrigé, décision du filtre, durée)"""
+    corrected_text, gate_decision, correction_time = correction
+    texts = frame_result["texts"]
+    gpu_used = performance.pop("gpu_used")
+    detail = parse_detail(options)
+    response = {
+        "success": True,
+        "texts": texts,
+        "text": "\n".join(texts) if texts else "",
+        "corrected_text": corrected_text,
+        "gate": gate_decision,
+        "performance": {
+            **decode_stats,
+            **performance,
+            "correction_time": correction_time,
+            "correction_time_saved": gate_decision["saved_seconds"] if gate_decision else 0,
+            "total_time": time.time() - start_time,
+            "gpu_used": gpu_used
+        }
+    }
+    if detail:
+        add_detail(response, frame_result)
+    if detail == "columnar":
+        response["lines"] = columnar_lines([response])
+    record_performance("/process", response["performance"])
+    return response
+
+@app.route('/process', methods=['POST'])
+def process_image():
+    """Endpoint pour traiter une image avec le modèle préchargé.
+
+    Avec l'en-tête `X-Profile: 1` (ou `?profile=true`), la requête est profilée
+    (cProfile et torch.profiler, voir profiling.py) : les profils sont écrits
+    dans OCR_PROFILE_DIR et la réponse contient les fonctions les plus coûteuses.
+    """
+    start_time = time.time()
+    profiler = request_profiler(request.headers, request.args)
+    
+    try:
+        with profiler or nullcontext():
+            # Récupérer l'image (binaire ou Base64) et les paramètres de la requête
+            frames = load_request_images('image')
+            if not frames:
+                return jsonify({"error": "Aucune image fournie"}), 400
+            options = get_request_options()
+            
+            image, decode_stats = frames[0]
+            if image is None:
+                return jsonify({"error": "Image invalide"}), 400
+            
+            frame_result, performance = ocr_single(image, options)
+            
+            # Appliquer la correction de texte si demandé
+            correction = (None, None, 0)
+            if wants_correction(frame_result, options):
+                correction_start = time.time()
+                corrected_text, gate_decision = correct_frame_texts(
+                    frame_result["texts"], frame_confidences(frame_result), parse_option(options, 'gate', GATE_ENABLED)
+                )
+                correction = (corrected_text, gate_decision, time.time() - correction_start)
+            
+            response = single_response(frame_result, decode_stats, performance, correction, options, start_time)
+        if profiler is not None:
+            response["profile"] = profiler.report()
+        return jsonify(response)
         
-        # Paramètres OCR optimisés
-        batch_size = 8 if use_gpu else 1
-        canvas_size = 2048 if use_gpu else 1024
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        # En cas d'erreur, libérer la mémoire GPU
+        release_gpu_memory()
+        return jsonify({"error": str(e)}), 500
+
+def ocr_batch(images, options):
+    """OCR de toutes les frames d'une vidéo en une seule passe, puis correction si demandée.
+
+    Retourne les résultats par frame (avec lignes, boîtes et confiances si
+    `detail` est demandé) et les métriques de performance.
+    """
+    frame_results, performance = ocr_batch_frames(images, options)
+    corrections, correction_performance = correct_batch(frame_results, options)
+    return batch_results(frame_results, corrections, options), {**performance, **correction_performance}
+
+def ocr_batch_frames(images, options):
+    """OCR de toutes les frames d'une vidéo en une seule passe, sans la correction.
+
+    Les frames quasi identiques sont dédoublonnées, les autres cherchées dans le
+    cache persistant puis prétraitées et lues ensemble (ou de façon incrémentale
+    avec l'option `reuse_detection`). Retourne le résultat structuré de chaque
+    frame et les métriques de performance de l'OCR.
+    """
+    # Paramètres d'OCR
+    scale_percent = parse_option(options, 'scale_percent', 30)
+    preprocess_mode = parse_option(options, 'preprocess', PREPROCESS_MODE)
+    dedup = parse_option(options, 'dedup', True)
+    use_cache = parse_option(options, 'use_cache', True) and ocr_cache is not None
+    reuse_detection = parse_option(options, 'reuse_detection', DETECTION_REUSE_ENABLED)
+    detail = parse_detail(options)
+    
+    # Sélectionner le pool de readers approprié (attendre son chargement au besoin)
+    pool, model_wait_time = get_reader_pool(parse_option(options, 'use_gpu', True))
+    use_gpu = pool.name == "gpu"
+    
+    # Paramètres OCR optimisés (toutes les zones passent dans le même lot)
+    batch_size = 16 if use_gpu else 1
+    canvas_size = 2048 if use_gpu else 1024
+    
+    # Dédoublonner les frames quasi identiques du lot : seule la première est traitée
+    hash_start = time.time()
+    deduplicator = FrameDeduplicator(threshold=DEDUP_THRESHOLD)
+    source_indices = []
+    unique_indices = []
+    for index, image in enumerate(images):
+        frame_hash = compute_dhash(image) if dedup else None
+        duplicate = deduplicator.find(frame_hash) if dedup else None
+        if duplicate is not None:
+            source_indices.append(duplicate)
+        else:
+            source_indices.append(len(unique_indices))
+            unique_indices.append(index)
+            if dedup:
+                deduplicator.add(frame_hash, source_indices[-1])
+    frames_skipped = len(images) - len(unique_indices)
+    
+    # Chercher les frames uniques dans le cache persistant
+    results_per_unique = [None] * len(unique_indices)
+    cache_keys = [None] * len(unique_indices)
+    cache_hits = 0
+    cached_ocr_time = 0
+    if use_cache:
+        for position, index in enumerate(unique_indices):
+            cache_keys[position] = get_cache_key(images[index], scale_percent, canvas_size, preprocess_mode)
+            cached = ocr_cache.get(cache_keys[position])
+            # Une entrée antérieure sans boîtes ni confiances ne suffit pas avec `detail`
+            if cached is not None and (not detail or "lines" in cached):
+                results_per_unique[position] = cached
+                cached_ocr_time += cached["ocr_time"]
+                cache_hits += 1
+    hashing_time = time.time() - hash_start
+    pending = [position for position, result in enumerate(results_per_unique) if result is None]
+    
+    # Prétraitement des images restant à traiter
+    preproc_start = time.time()
+    preprocess_results = [preprocess_image(images[unique_indices[position]], scale_percent, preprocess_mode)
+                          for position in pending]
+    preprocessed = [image for image, _ in preprocess_results]
+    preproc_time = time.time() - preproc_start
+    
+    detection_time = 0
+    recognition_time = 0
+    queue_wait_time = 0
+    tracking = None
+    if pending:
+        wait_start = time.time()
+        with pool.acquire() as reader:
+            queue_wait_time = time.time() - wait_start
+            if reuse_detection:
+                # Détection sur les keyframes, seules les zones modifiées sont relues
+                lines_per_pending, detection_time, recognition_time, tracking = ocr_frames_tracked(
+                    reader, preprocessed, batch_size=batch_size, canvas_size=canvas_size
+                )
+            else:
+                lines_per_pending, detection_time, recognition_time = ocr_frames_batched(
+                    reader, preprocessed, batch_size=batch_size, canvas_size=canvas_size
+                )
+        frame_ocr_time = (detection_time + recognition_time) / len(pending)
+        for position, lines, (_, info) in zip(pending, lines_per_pending, preprocess_results):
+            results_per_unique[position] = build_frame_result(lines, info)
+            if use_cache:
+                ocr_cache.put(cache_keys[position], {**results_per_unique[position], "ocr_time": frame_ocr_time})
+    frame_results = [results_per_unique[source] for source in source_indices]
+    ocr_time = detection_time + recognition_time
+    average_ocr_time = ocr_time / len(pending) if pending else 0
+    
+    # Libérer la mémoire GPU si utilisée
+    if use_gpu:
+        release_gpu_memory()
+    
+    return frame_results, {
+        "hashing_time": hashing_time,
+        "frames_skipped": frames_skipped,
+        "cache_hits": cache_hits,
+        "ocr_time_saved": average_ocr_time * frames_skipped + cached_ocr_time,
+        "preprocessing_time": preproc_time,
+        "preprocess_mode": preprocess_mode,
+        "preprocessed_pixels": sum(info["pixels"] for _, info in preprocess_results),
+        "model_wait_time": model_wait_time,
+        "queue_wait_time": queue_wait_time,
+        "detection_time": detection_time,
+        "recognition_time": recognition_time,
+        "ocr_time": ocr_time,
+        "reuse_detection": reuse_detection,
+        "detection_tracking": tracking,
+        "gpu_used": use_gpu
+    }
+
+def correct_batch(frame_results, options):
+    """Corrige une à une les frames d'un lot si la correction est demandée.
+
+    Retourne un couple (texte corrigé, décision du filtre) par frame et les
+    métriques de la correction.
+    """
+    correct_text = parse_option(options, 'correct_text', False)
+    gate = parse_option(options, 'gate', GATE_ENABLED)
+    correction_start = time.time()
+    gate_stats = new_gate_stats()
+    corrections = []
+    for frame_result in frame_results:
+        if wants_correction(frame_result, options):
+            corrections.append(correct_frame_texts(
+                frame_result["texts"], frame_confidences(frame_result), gate, gate_stats
+            ))
+        else:
+            corrections.append((None, None))
+    return corrections, {
+        "correction_time": time.time() - correction_start if correct_text else 0,
+        "correction_gate": gate_stats if correct_text and gate else None
+    }
+
+def batch_results(frame_results, corrections, options):
+    """Résultats par frame de /process-batch et /process-video"""
+    detail = parse_detail(options)
+    results = []
+    for frame_result, (corrected_text, gate_decision) in zip(frame_results, corrections):
+        texts = frame_result["texts"]
+        result = {
+            "texts": texts,
+            "text": "\n".join(texts) if texts else "",
+            "corrected_text": corrected_text
+        }
+        if gate_decision is not None:
+            result["gate"] = gate_decision
+        results.append(add_detail(result, frame_result) if detail else result)
+    return results
+
+def select_batch_frames(images, options):
+    """Avec `max_frames`, choisit les frames d'un lot à lire ; retourne leurs index et les statistiques"""
+    max_frames = parse_option(options, 'max_frames', 0)
+    if max_frames > 0:
+        return select_images(images, max_frames, parse_option(options, 'selection', SELECTION_MODE))
+    return list(range(len(images))), None
+
+def batch_response(results, options, performance, source='/process-batch'):
+    """Réponse JSON de /process-batch et /process-video ; `source` étiquette les métriques"""
+    response = {"success": True, "results": results}
+    if parse_detail(options) == "columnar":
+        response["lines"] = columnar_lines(results)
+    response["performance"] = performance
+    record_performance(source, performance, performance.get("frames", len(results)))
+    return response
+
+@app.route('/process-batch', methods=['POST'])
+def process_batch():
+    """Endpoint pour traiter toutes les frames d'une vidéo en une seule passe OCR"""
+    start_time = time.time()
+    
+    try:
+        # Décodage de toutes les images (multipart ou JSON Base64)
+        decode_start = time.time()
+        frames = load_request_images('images')
+        if not frames:
+            return jsonify({"error": "Aucune image fournie"}), 400
+        decode_time = time.time() - decode_start
         
-        # Effectuer l'OCR
-        ocr_start = time.time()
-        result = reader.readtext(
-            preprocessed,
-            detail=0,           # Récupérer uniquement le texte
-            paragraph=True,     # Regrouper les textes en paragraphes
-            batch_size=batch_size,
-            min_size=10,        # Taille minimum des textes
-            contrast_ths=0.3,   # Seuil de contraste
-            adjust_contrast=0.5, # Ajustement de contraste 
-            text_threshold=0.6, # Seuil de reconnaissance de texte
-            link_threshold=0.3,  # Seuil de liaison
-            width_ths=0.5,      # Seuil de largeur
-            low_text=0.3,       # Seuil de texte faible
-            canvas_size=canvas_size
-        )
-        ocr_time = time.time() - ocr_start
+        images = []
+        for index, (image, _) in enumerate(frames):
+            if image is None:
+                return jsonify({"error": f"Image invalide à l'index {index}"}), 400
+            images.append(image)
+        options = get_request_options()
         
-        # Convertir le résultat en texte
-        texts = result if isinstance(result, list) else [result]
+        # Avec max_frames, seules les frames choisies sont lues (résultats indexés)
+        selected, selection = select_batch_frames(images, options)
+        results, performance = ocr_batch([images[index] for index in selected], options)
+        if selection is not None:
+            for index, result in zip(selected, results):
+                result["index"] = index
         
-        # Appliquer la correction de texte si demandé
-        corrected_text = None
-        correction_time = 0
+        return jsonify(batch_response(results, options, {
+            "frames": len(images),
+            "decode_time": decode_time,
+            "decode": [stats for _, stats in frames],
+            "selection": selection,
+            **performance,
+            "total_time": time.time() - start_time
+        }))
         
-        if correct_text and client and texts:
-            correction_start = time.time()
-            corrected_text = correct_text_with_chatgpt(texts)
-            correction_time = time.time() - correction_start
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        # En cas d'erreur, libérer la mémoire GPU
+        release_gpu_memory()
+        return jsonify({"error": str(e)}), 500
+
+def video_options(options):
+    """Nombre maximal de frames, mode de sélection et paramètres d'échantillonnage de /process-video"""
+    max_frames = parse_option(options, 'max_frames', 40)
+    selection_mode = parse_option(options, 'selection', SELECTION_MODE)
+    sampling = {
+        "interval": parse_option(options, 'frame_interval', FRAME_INTERVAL),
+        # En sélection par contenu, toutes les frames échantillonnées sont candidates
+        "max_frames": 0 if selection_mode == "content" else max_frames,
+        "scene_change": parse_option(options, 'scene_change', SCENE_CHANGE_ENABLED)
+    }
+    return max_frames, selection_mode, sampling
+
+def sample_video(options, data=None, suffix='.mp4'):
+    """Échantillonne en mémoire les frames de la vidéo reçue (`data`) ou de `video_path`.
+
+    Retourne les frames (nom, image), les statistiques de décodage et la
+    durée de l'échantillonnage ; lève ValueError si aucune frame n'est lisible.
+    """
+    _, _, sampling = video_options(options)
+    decode_start = time.time()
+    if data is not None:
+        frames, video_stats = sample_video_bytes(data, suffix=suffix, **sampling)
+    else:
+        video_path = options.get('video_path')
+        if not video_path or not os.path.isfile(video_path):
+            raise ValueError("Aucune vidéo fournie")
+        sampler = VideoFrameSampler(video_path, **sampling)
+        frames = list(sampler)
+        video_stats = sampler.stats()
+    decode_time = time.time() - decode_start
+    if not frames:
+        raise ValueError("Aucune frame lisible dans la vidéo")
+    return frames, video_stats, decode_time
+
+def select_video_frames(frames, options):
+    """Choisit selon leur contenu au plus `max_frames` frames échantillonnées"""
+    max_frames, selection_mode, _ = video_options(options)
+    selected, selection = select_images([image for _, image in frames], max_frames, selection_mode)
+    return [frames[index] for index in selected], selection
+
+@app.route('/process-video', methods=['POST'])
+def process_video():
+    """Endpoint pour traiter une vidéo sans extraction préalable des frames en PNG.
+
+    Accepte la vidéo brute (application/octet-stream ou champ `video` d'un
+    formulaire multipart) ou un chemin local (`video_path` en JSON). Les frames
+    sont échantillonnées en mémoire (`frame_interval`, `scene_change`), au plus
+    `max_frames` choisies selon leur contenu (`selection`), puis traitées comme
+    par /process-batch.
+    """
+    start_time = time.time()
+    
+    try:
+        options = get_request_options()
         
-        # Libérer la mémoire GPU si utilisée
-        if use_gpu and torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        # Échantillonnage des frames directement depuis la vidéo
+        if request.mimetype == 'application/octet-stream':
+            frames, video_stats, decode_time = sample_video(options, request.get_data(cache=False))
+        elif request.mimetype == 'multipart/form-data' and 'video' in request.files:
+            storage = request.files['video']
+            suffix = os.path.splitext(storage.filename or '')[1] or '.mp4'
+            frames, video_stats, decode_time = sample_video(options, storage.stream.getbuffer(), suffix)
+        else:
+            frames, video_stats, decode_time = sample_video(options)
         
-        # Construire la réponse
-        response = {
-            "success": True,
-            "texts": texts,
-            "text": "\n".join(texts) if texts else "",
-            "corrected_text": corrected_text,
-            "performance": {
-                "preprocessing_time": preproc_time,
-                "ocr_time": ocr_time,
-                "correction_time": correction_time,
-                "total_time": time.time() - start_time,
-                "gpu_used": use_gpu
-            }
-        }
+        frames, selection = select_video_frames(frames, options)
+        results, performance = ocr_batch([image for _, image in frames], options)
+        for (name, _), result in zip(frames, results):
+            result["frame"] = name
         
-        return jsonify(response)
+        return jsonify(batch_response(results, options, {
+            "frames": len(frames),
+            "decode_time": decode_time,
+            "video": video_stats,
+            "selection": selection,
+            **performance,
+            "total_time": time.time() - start_time
+        }, source='/process-video'))
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except PoolBusyError as e:
+        return busy_response(e)
     except Exception as e:
         # En cas d'erreur, libérer la mémoire GPU
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        release_gpu_memory()
         return jsonify({"error": str(e)}), 500
 
+def merge_response(data):
+    """Fusion locale des textes de /merge-texts, groupe par groupe avec `group_similar`"""
+    texts = data['texts']
+    start_time = time.time()
+    confidences = dict(zip(texts, data.get('confidences') or []))
+    if data.get('group_similar', False):
+        groups = group_similar_texts(texts, data.get('similarity_threshold', 0.7))
+    else:
+        groups = [texts]
+    
+    merges = []
+    for group in groups:
+        merged, stats = merge_texts(group, [confidences.get(text) for text in group])
+        merges.append({"original_texts": group, "merged_text": merged, **stats})
+    
+    response = {"success": True, "performance": {"groups": len(groups), "total_time": time.time() - start_time}}
+    if data.get('group_similar', False):
+        response["grouped_merges"] = merges
+    else:
+        response.update(merges[0])
+    return response
+
+@app.route('/merge-texts', methods=['POST'])
+def merge_texts_endpoint():
+    """Endpoint pour fusionner localement plusieurs lectures OCR d'un même texte.
+
+    Alternative hors ligne à /correct-texts : vote caractère par caractère
+    pondéré par les confiances (`confidences`, parallèle à `texts`). Avec
+    `group_similar`, les textes sont d'abord regroupés et chaque groupe est
+    fusionné séparément.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if not data.get('texts'):
+            return jsonify({"error": "Aucun texte fourni"}), 400
+        return jsonify(merge_response(data))
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def correction_plan(data, use_llm):
+    """Prépare une requête /correct-texts avant tout appel à ChatGPT.
+
+    Regroupe les textes similaires si demandé (sinon la liste entière forme un
+    seul groupe de lectures d'un même texte), applique le filtre local et
+    retient les groupes à envoyer à ChatGPT (aucun si `use_llm` est faux).
+    """
+    texts = data['texts']
+    grouped = data.get('group_similar', False)
+    gate = data.get('gate', GATE_ENABLED)
+    plan = {
+        "texts": texts,
+        "grouped": grouped,
+        "mode": data.get('mode', 'per_group'),
+        # Au plus CORRECTION_MAX_CONCURRENCY appels simultanés, quelle que soit la demande du client
+        "max_concurrency": max(1, min(parse_option(data, 'max_concurrency', MAX_CONCURRENCY), MAX_CONCURRENCY)),
+        "gate": gate,
+        "gate_stats": new_gate_stats(),
+        "cache_stats": new_request_stats(),
+        # Confiances OCR facultatives, dans l'ordre des textes
+        "confidences": dict(zip(texts, data.get('confidences') or []))
+    }
+    grouping_start = time.time()
+    groups = group_similar_texts(texts, data.get('similarity_threshold', 0.7)) if grouped else [texts]
+    plan["grouping_time"] = time.time() - grouping_start
+    
+    # Filtre local : seuls les groupes douteux sont envoyés à ChatGPT
+    decisions = [None] * len(groups)
+    if gate:
+        for index, group in enumerate(groups):
+            decisions[index] = correction_gate.decide(group, group_confidences(plan, group))
+            if grouped:
+                record_decision(plan["gate_stats"], decisions[index])
+    plan["groups"] = groups
+    plan["decisions"] = decisions
+    plan["pending"] = [index for index, decision in enumerate(decisions)
+                       if use_llm and (decision is None or decision["use_llm"])]
+    return plan
+
+def group_confidences(plan, group):
+    """Confiances connues des textes d'un groupe (None pour les autres)"""
+    return [plan["confidences"].get(text) for text in group]
+
+def local_merge(plan, group):
+    """Fusion locale d'un groupe, pondérée par les confiances connues"""
+    return merge_texts(group, group_confidences(plan, group))[0]
+
+def correction_response(plan, pending_outcomes, performance=None):
+    """Réponse JSON de /correct-texts.
+
+    `pending_outcomes` donne un couple (correction, erreur) par groupe envoyé
+    à ChatGPT. Les groupes retenus par le filtre gardent la meilleure version
+    locale ; sans client, ou si l'appel a échoué, le groupe est fusionné
+    localement (voir /merge-texts).
+    """
+    outcomes = [(decision["text"], None) if decision is not None and not decision["use_llm"] else None
+                for decision in plan["decisions"]]
+    for index, outcome in zip(plan["pending"], pending_outcomes):
+        outcomes[index] = outcome
+    
+    corrections = []
+    for group, outcome, decision in zip(plan["groups"], outcomes, plan["decisions"]):
+        corrected, error = outcome if outcome is not None else (None, None)
+        correction = {
+            "original_texts": group,
+            "corrected_text": corrected,
+            "gate": gate_summary(decision)
+        }
+        if outcome is None or error is not None:
+            # Pas de client ou échec de l'appel : fusion locale des versions du groupe
+            correction["corrected_text"] = local_merge(plan, group)
+            correction["fallback"] = "local_merge"
+        if error is not None:
+            correction["error"] = str(error)
+        corrections.append(correction)
+    
+    record_performance("/correct-texts", {**(performance or {}), "grouping_time": plan["grouping_time"]}, frames=0)
+    record_correction_cache("/correct-texts", plan["cache_stats"])
+    if not plan["grouped"]:
+        # Liste entière de textes (plusieurs lectures d'un même texte)
+        return {"success": True, "cache": plan["cache_stats"], **corrections[0], "original_texts": plan["texts"]}
+    return {
+        "success": True,
+        "grouped_corrections": corrections,
+        "cache": plan["cache_stats"],
+        "gate": plan["gate_stats"] if plan["gate"] else None,
+        "performance": performance
+    }
+
 @app.route('/correct-texts', methods=['POST'])
 def correct_texts():
-    """Endpoint pour corriger des textes avec ChatGPT"""
-    if not client:
-        return jsonify({"error": "OpenAI API non configurée"}), 500
-    
+    """Endpoint pour corriger des textes avec ChatGPT.
+
+    Sans client OpenAI configuré, ou si un appel échoue (timeout, erreurs
+    répétées), les textes sont fusionnés localement (voir /merge-texts) et
+    la correction est marquée `"fallback": "local_merge"`.
+    """
     try:
         data = request.json
         if not data or 'texts' not in data:
             return jsonify({"error": "Aucun texte fourni"}), 400
-        
-        texts = data['texts']
-        if not texts:
+        if not data['texts']:
             return jsonify({"error": "Liste de textes vide"}), 400
         
-        # Regrouper les textes similaires si demandé
-        if data.get('group_similar', False):
-            threshold = data.get('similarity_threshold', 0.7)
-            grouped_texts = group_similar_texts(texts, threshold)
-            
-            # Corriger chaque groupe
-            corrected_groups = []
-            for group in grouped_texts:
-                corrected = correct_text_with_chatgpt(group)
-                corrected_groups.append({
-                    "original_texts": group,
-                    "corrected_text": corrected
-                })
-            
-            return jsonify({
-                "success": True,
-                "grouped_corrections": corrected_groups
-            })
+        plan = correction_plan(data, get_client() is not None)
+        cache_stats = plan["cache_stats"]
+        pending_groups = [plan["groups"][index] for index in plan["pending"]]
+        
+        if not plan["grouped"]:
+            performance = None
+            pending_outcomes = run_concurrently(pending_groups, lambda group: correct_text_with_chatgpt(group, cache_stats))
+        elif plan["mode"] == 'packed':
+            # Tous les groupes dans un minimum d'appels, repli groupe par groupe si besoin
+            pending_outcomes, performance = correct_groups_with_chatgpt_packed(pending_groups, cache_stats)
+            performance["groups"] = len(plan["groups"])
         else:
-            # Corriger la liste entière de textes
-            corrected = correct_text_with_chatgpt(texts)
-            return jsonify({
-                "success": True,
-                "original_texts": texts,
-                "corrected_text": corrected
-            })
+            # Corriger les groupes en parallèle, résultats dans l'ordre d'origine
+            usage = new_usage_stats()
+            correction_start = time.time()
+            pending_outcomes = run_concurrently(
+                pending_groups,
+                lambda group: correct_text_with_chatgpt(group, cache_stats, usage),
+                max_concurrency=plan["max_concurrency"]
+            )
+            performance = {
+                "mode": "per_group",
+                "groups": len(plan["groups"]),
+                "max_concurrency": plan["max_concurrency"],
+                **usage,
+                "correction_time": time.time() - correction_start
+            }
+        
+        return jsonify(correction_response(plan, pending_outcomes, performance))
     
+    except PoolBusyError as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Durées cumulées sur les lots d'un job, dans son résumé final
+JOB_TIME_KEYS = ('hashing_time', 'preprocessing_time', 'model_wait_time', 'queue_wait_time',
+                 'detection_time', 'recognition_time', 'ocr_time', 'ocr_time_saved', 'correction_time')
+
+def run_ocr_job(job):
+    """Traite un job de /jobs lot par lot en émettant un événement par frame.
+
+    Chaque lot de `chunk_size` frames passe par ocr_batch_frames puis, si
+    demandé, par la correction ; l'annulation est vérifiée avant chaque lot.
+    Si la file des readers est pleine, le lot est relancé après le délai
+    conseillé. Retourne le résumé envoyé avec l'événement final.
+    """
+    options = job.payload["options"]
+    frames = job.payload["frames"]
+    chunk_size = max(1, parse_option(options, 'chunk_size', JOB_CHUNK_SIZE))
+    totals = dict.fromkeys(JOB_TIME_KEYS, 0.0)
+    totals.update(frames_skipped=0, cache_hits=0, unreadable_frames=0)
+    
+    for start in range(0, len(frames), chunk_size):
+        job.check_cancelled()
+        chunk = frames[start:start + chunk_size]
+        # Frames d'un dossier lues au moment de leur traitement
+        images = [cv2.imread(source) if isinstance(source, str) else source for _, source in chunk]
+        readable = [position for position, image in enumerate(images) if image is not None]
+        for position in range(len(chunk)):
+            if images[position] is None:
+                totals["unreadable_frames"] += 1
+                record_error("/jobs", "unreadable_frame")
+                job.emit("frame", {"index": start + position, "frame": chunk[position][0], "error": "Image illisible"})
+        
+        while True:
+            try:
+                frame_results, performance = ocr_batch_frames([images[position] for position in readable], options)
+                break
+            except PoolBusyError as e:
+                job.check_cancelled()
+                time.sleep(min(e.retry_after, 5))
+        job.check_cancelled()
+        corrections, correction_performance = correct_batch(frame_results, options)
+        
+        for position, result in zip(readable, batch_results(frame_results, corrections, options)):
+            result["index"] = start + position
+            if chunk[position][0] is not None:
+                result["frame"] = chunk[position][0]
+            job.emit("frame", result)
+        performance.update(correction_performance)
+        record_performance("/jobs", performance, len(readable))
+        for key in totals:
+            totals[key] += performance.get(key) or 0
+    
+    return {
+        "frames": len(frames),
+        "processed": job.processed,
+        "selection": job.payload.get("selection"),
+        **totals,
+        "total_time": time.time() - job.started_at
+    }
+
+def job_frames_from_dir(options):
+    """Frames PNG d'un dossier local pour un job, au plus `max_frames` choisies selon leur contenu.
+
+    Retourne des couples (nom, chemin) et les statistiques de sélection ;
+    lève ValueError si le dossier n'existe pas.
+    """
+    frames_dir = Path(options['frames_dir'])
+    if not frames_dir.is_dir():
+        raise ValueError(f"Dossier de frames introuvable: {frames_dir}")
+    paths = sorted(frames_dir.glob('*.png'))
+    selection = None
+    max_frames = parse_option(options, 'max_frames', 0)
+    if max_frames > 0:
+        paths, selection = select_frame_paths(paths, max_frames, parse_option(options, 'selection', SELECTION_MODE))
+    return [(path.name, str(path)) for path in paths], selection
+
+def job_frames_from_images(frames):
+    """Frames décodées d'une requête pour un job ; lève ValueError si l'une est invalide"""
+    for index, (image, _) in enumerate(frames):
+        if image is None:
+            raise ValueError(f"Image invalide à l'index {index}")
+    return [(None, image) for image, _ in frames]
+
+def submit_job(options, frames, selection=None):
+    """Met un job en file et retourne la réponse de POST /jobs"""
+    if not frames:
+        raise ValueError("Aucune image fournie")
+    # Les images Base64 sont déjà décodées : inutile de les garder avec les options
+    options = {name: value for name, value in options.items() if name != 'images'}
+    job = ocr_jobs.submit({"options": options, "frames": frames, "selection": selection}, len(frames))
+    return {
+        "success": True,
+        "job_id": job.id,
+        "state": job.state,
+        "frames": len(frames),
+        "selection": selection,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    }
+
+def job_response(job, with_results=True):
+    """État d'un job et, si demandé, les résultats des frames déjà lues"""
+    response = {"success": True, **job.status(), "cancel_requested": job.cancel_requested}
+    if with_results:
+        response["results"] = [data for _, event, data in list(job.events) if event == "frame"]
+    return response
+
+def job_options():
+    """Options d'un job, copiées hors du contexte de la requête"""
+    options = get_request_options()
+    return options.to_dict() if hasattr(options, 'to_dict') else dict(options)
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Endpoint pour lancer l'OCR d'une vidéo en arrière-plan.
+
+    Accepte les frames comme /process-batch (fichiers multipart `images` ou
+    Base64 JSON) ou un dossier local de frames PNG (`frames_dir`, au plus
+    `max_frames` choisies selon leur contenu), avec les mêmes options OCR et
+    de correction. Répond 202 avec l'identifiant du job : les résultats sont
+    diffusés frame par frame sur GET /jobs/<id>/events (Server-Sent Events).
+    """
+    try:
+        options = job_options()
+        if options.get('frames_dir'):
+            frames, selection = job_frames_from_dir(options)
+        else:
+            frames, selection = job_frames_from_images(load_request_images('images')), None
+        return jsonify(submit_job(options, frames, selection)), 202
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except PoolBusyError as e:
+        return busy_response(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """État d'un job et résultats des frames déjà lues (`results=false` pour l'état seul)"""
+    job = ocr_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job inconnu"}), 404
+    return jsonify(job_response(job, parse_option(request.args, 'results', True)))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Annule un job : retiré de la file s'il attend, arrêté avant son prochain lot sinon"""
+    job = ocr_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job inconnu"}), 404
+    return jsonify(job_response(job, with_results=False))
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Flux Server-Sent Events d'un job : état, un événement `frame` par frame lue, puis
+    `done`, `cancelled` ou `error`. Reprend après `Last-Event-ID` en cas de reconnexion.
+    """
+    job = ocr_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job inconnu"}), 404
+    cursor = resume_cursor(request.headers.get('Last-Event-ID', request.args.get('last_event_id')))
+    return Response(stream_events(job, cursor), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Service EasyOCR avec modèle préchargé")
     parser.add_argument("--port", type=int, default=5000, help="Port d'écoute")
     parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute")
+    parser.add_argument("--warmup", choices=["background", "lazy", "eager"], default=WARMUP_MODE,
+                        help="Chargement des modèles : en arrière-plan, au premier usage ou avant de démarrer")
     args = parser.parse_args()
+    warmup_mode = args.warmup
     
-    # Initialiser les modèles au démarrage
-    initialize_readers()
+    # Initialiser les modèles avant de démarrer, ou laisser le serveur répondre pendant le chargement
+    if warmup_mode == "eager":
+        initialize_readers()
+    elif warmup_mode == "background":
+        start_warmup(list(loaders.values()))
     
     # Démarrer le serveur Flask
-    print(f"Démarrage du service EasyOCR sur {args.host}:{args.port}")
-    app.run(host=args.host, port=args.port, debug=False) 
\ No newline at end of file
+    log.info("service_start", host=args.host, port=args.port, warmup=warmup_mode)
+    app.run(host=args.host, port=args.port, debug=False, threaded=True) 
\ No newline at end of file
@@ -0,0 +1,234 @@
+import difflib
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# Jusqu'à ce nombre de textes distincts, chaque texte est comparé à tous les
+# autres (bornes exactes puis difflib) : même regroupement que la comparaison
+# de toutes les paires. Au-delà, les candidats viennent de l'index MinHash/LSH.
+EXACT_GROUPING_MAX = 2000
+
+# Paramètres MinHash/LSH : 64 bandes de 2 lignes retrouvent la plupart des
+# paires de textes OCR bruités dont les trigrammes se recouvrent peu (Jaccard ≈ 0.3),
+# mais pas toutes : des paires au-dessus du seuil difflib peuvent n'avoir aucune bande commune
+SHINGLE_SIZE = 3
+NUM_BANDS = 64
+ROWS_PER_BAND = 2
+
+# Les caractères sont regroupés par code modulo CHAR_BUCKETS pour les bornes rapides
+CHAR_BUCKETS = 128
+
+# Longueurs maximales du texte de référence (un mot de 64 bits) et des
+# candidats pour le calcul vectorisé de la LCS (au-delà, texte par texte)
+LCS_VECTOR_LENGTH = 64
+LCS_VECTOR_WIDTH = 256
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """N-grammes de caractères du texte, bornes incluses pour les textes courts"""
+    padded = f"\x02{text}\x03"
+    if len(padded) < size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def char_counts(text, buckets=CHAR_BUCKETS):
+    """Nombre d'occurrences de chaque caractère, regroupés par code modulo `buckets`"""
+    codes = np.fromiter((ord(char) % buckets for char in text), dtype=np.int64, count=len(text))
+    return np.bincount(codes, minlength=buckets)
+
+
+def ratio_upper_bounds(counts, lengths, item, candidates):
+    """Bornes supérieures de la similarité difflib entre un texte et des candidats.
+
+    Équivalent vectorisé de real_quick_ratio (longueurs) et quick_ratio
+    (caractères communs) ; regrouper les caractères ne peut qu'augmenter la borne.
+    """
+    total = lengths[candidates] + lengths[item]
+    common = np.minimum(counts[candidates], counts[item]).sum(axis=1)
+    return 2.0 * np.minimum(common, np.minimum(lengths[candidates], lengths[item])) / total
+
+
+def char_masks(text):
+    """Masques de bits des positions de chaque caractère du texte"""
+    masks = {}
+    for position, char in enumerate(text):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def lcs_length(masks, length, text):
+    """Longueur de la plus longue sous-séquence commune (algorithme bit-parallèle).
+
+    `masks` et `length` décrivent le premier texte (voir char_masks). La
+    similarité 2 * LCS / (longueurs) majore la similarité difflib, dont les
+    blocs communs forment une sous-séquence commune.
+    """
+    full = (1 << length) - 1
+    row = full
+    for char in text:
+        matches = row & masks.get(char, 0)
+        row = ((row + matches) | (row - matches)) & full
+    return length - bin(row).count("1")
+
+
+def lcs_lengths(masks, length, codes, alphabet):
+    """LCS d'un texte de 64 caractères au plus avec plusieurs candidats à la fois.
+
+    Version vectorisée de lcs_length sur un mot de 64 bits : `codes` contient
+    les caractères des candidats sous forme d'indices dans `alphabet`,
+    complétés par len(alphabet).
+    """
+    full = np.uint64((1 << length) - 1)
+    lookup = np.zeros(len(alphabet) + 1, dtype=np.uint64)
+    for char, mask in masks.items():
+        lookup[alphabet[char]] = mask
+    rows = np.full(len(codes), full, dtype=np.uint64)
+    for column in codes.T:
+        matches = rows & lookup[column]
+        rows = ((rows + matches) | (rows - matches)) & full
+    ones = np.unpackbits(rows.view(np.uint8)).reshape(len(codes), 64).sum(axis=1)
+    return length - ones
+
+
+class MinHashLSH:
+    """Index MinHash/LSH des textes pour trouver les candidats similaires.
+
+    Chaque texte est signé par le minimum de `num_bands * rows_per_band`
+    permutations de ses n-grammes ; deux textes sont candidats s'ils partagent
+    au moins une bande de signature.
+    """
+
+    def __init__(self, num_bands=NUM_BANDS, rows_per_band=ROWS_PER_BAND, seed=1):
+        self.num_bands = num_bands
+        self.rows_per_band = rows_per_band
+        # Permutations par hachage multiplicatif (a impair, modulo 2**64)
+        generator = np.random.default_rng(seed)
+        num_perm = num_bands * rows_per_band
+        self.a = generator.integers(0, 1 << 64, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = generator.integers(0, 1 << 64, size=num_perm, dtype=np.uint64)
+        self.buckets = defaultdict(list)
+
+    def signature(self, text):
+        """Signature MinHash d'un texte"""
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+        permuted = (hashes[:, None] * self.a + self.b) >> np.uint64(32)
+        return permuted.min(axis=0)
+
+    def band_keys(self, signature):
+        """Clés de bande (numéro de bande + lignes de la signature)"""
+        rows = signature.reshape(self.num_bands, self.rows_per_band)
+        return [(band,) + tuple(row) for band, row in enumerate(rows.tolist())]
+
+    def add(self, item, text):
+        """Indexe un élément et retourne ses clés de bande"""
+        keys = self.band_keys(self.signature(text))
+        for key in keys:
+            self.buckets[key].append(item)
+        return keys
+
+    def candidates(self, keys):
+        """Éléments partageant au moins une bande avec les clés données"""
+        found = set()
+        for key in keys:
+            found.update(self.buckets[key])
+        return found
+
+
+def group_similar_texts(texts, threshold=0.7, exact_max=EXACT_GROUPING_MAX):
+    """Groupe les textes similaires ensemble.
+
+    Chaque texte non encore groupé devient le premier d'un groupe et entraîne
+    les textes suivants dont la similarité difflib atteint `threshold`. Les
+    candidats sont écartés par des bornes supérieures exactes (caractères
+    communs, LCS) avant le calcul difflib ; les textes identiques ne sont
+    comparés qu'une fois. Jusqu'à `exact_max` textes distincts, tous les textes
+    sont candidats : le regroupement est identique à celui de la comparaison de
+    toutes les paires. Au-delà, les candidats sont limités aux textes
+    partageant une bande MinHash/LSH (et à leurs voisins) : une paire
+    similaire sans bande commune n'est alors pas regroupée.
+    """
+    if not texts:
+        return []
+
+    # Positions de chaque texte distinct, dans l'ordre d'apparition
+    positions = defaultdict(list)
+    for index, text in enumerate(texts):
+        positions[text].append(index)
+    distinct = list(positions)
+
+    lsh = None
+    if len(distinct) > exact_max:
+        lsh = MinHashLSH()
+        band_keys = [lsh.add(item, text) for item, text in enumerate(distinct)]
+    item_of_text = {text: item for item, text in enumerate(distinct)}
+    counts = np.array([char_counts(text) for text in distinct])
+    lengths = np.array([len(text) for text in distinct])
+    # Occurrences pas encore groupées de chaque texte distinct
+    pending = [len(positions[text]) for text in distinct]
+    # Caractères des textes sous forme d'indices pour le calcul vectorisé de la LCS
+    alphabet = {char: index for index, char in enumerate(sorted(set("".join(distinct))))}
+    width = min(int(lengths.max()), LCS_VECTOR_WIDTH)
+    codes = np.full((len(distinct), width), len(alphabet), dtype=np.int32)
+    for item, text in enumerate(distinct):
+        if len(text) <= width:
+            codes[item, :len(text)] = [alphabet[char] for char in text]
+
+    processed = [False] * len(texts)
+    groups = []
+    for i, text in enumerate(texts):
+        if processed[i]:
+            continue
+        item = item_of_text[text]
+        members = [i]
+        masks = char_masks(text)
+        if pending[item] > 1 and difflib.SequenceMatcher(None, text, text).ratio() >= threshold:
+            members.extend(j for j in positions[text] if j > i and not processed[j])
+
+        # Sans index, tous les textes restants sont candidats. Avec l'index :
+        # candidats du premier texte, puis voisins des membres trouvés (les
+        # frames d'une même légende forment un amas dense, un membre manqué par
+        # les bandes du premier texte partage souvent une bande avec un autre)
+        checked = {item}
+        frontier = [item]
+        while frontier:
+            if lsh is None:
+                found = range(len(distinct))
+            else:
+                found = lsh.candidates([key for member in frontier for key in band_keys[member]])
+            candidates = [candidate for candidate in found if candidate not in checked and pending[candidate]]
+            checked.update(candidates)
+            frontier = []
+            if not candidates:
+                break
+            candidates = np.array(candidates)
+            candidates = candidates[ratio_upper_bounds(counts, lengths, item, candidates) >= threshold]
+            vectorized = lengths[candidates] <= width if len(text) <= LCS_VECTOR_LENGTH else np.zeros(len(candidates), dtype=bool)
+            if vectorized.any():
+                subset = candidates[vectorized]
+                common = lcs_lengths(masks, len(text), codes[subset, :lengths[subset].max()], alphabet)
+                keep = np.ones(len(candidates), dtype=bool)
+                keep[vectorized] = 2.0 * common / (lengths[subset] + len(text)) >= threshold
+                candidates = candidates[keep]
+            for candidate in candidates.tolist():
+                candidate_text = distinct[candidate]
+                later = [j for j in positions[candidate_text] if j > i and not processed[j]]
+                if not later:
+                    continue
+                total = len(text) + len(candidate_text)
+                if ((len(text) > LCS_VECTOR_LENGTH or len(candidate_text) > width)
+                        and 2.0 * lcs_length(masks, len(text), candidate_text) / total < threshold):
+                    continue
+                if difflib.SequenceMatcher(None, text, candidate_text).ratio() >= threshold:
+                    members.extend(later)
+                    if lsh is not None:
+                        frontier.append(candidate)
+
+        members.sort()
+        for j in members:
+            processed[j] = True
+            pending[item_of_text[texts[j]]] -= 1
+        groups.append([texts[j] for j in members])
+
+    return groups
@@ -0,0 +1,161 @@
+import math
+import os
+import tempfile
+import time
+
+import cv2
+
+# Configuration par défaut (surchargeable via .env)
+# Intervalle entre deux frames échantillonnées (secondes), comme l'extraction ffmpeg à 1 image/s
+FRAME_INTERVAL = float(os.getenv('OCR_FRAME_INTERVAL', '1.0'))
+# Ne garder une frame échantillonnée que si elle diffère assez de la précédente gardée
+SCENE_CHANGE_ENABLED = os.getenv('OCR_SCENE_CHANGE', 'False').lower() == 'true'
+# Différence moyenne de niveau de gris d'une zone de la miniature qui marque un changement
+SCENE_THRESHOLD = float(os.getenv('OCR_SCENE_THRESHOLD', '12'))
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.mkv', '.webm', '.avi')
+# Miniature comparée pour la détection de changement de plan (largeur, proportions conservées),
+# découpée en zones de SCENE_CELL x SCENE_CELL pixels
+SCENE_THUMBNAIL_WIDTH = 128
+SCENE_CELL = 8
+
+
+def is_video_file(path):
+    """Indique si le chemin désigne un fichier vidéo (et non un dossier de frames)"""
+    return os.path.isfile(path) and os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def scene_thumbnail(image):
+    """Miniature en niveaux de gris comparée d'une frame à l'autre"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    height = max(SCENE_CELL, int(gray.shape[0] * SCENE_THUMBNAIL_WIDTH / gray.shape[1]))
+    return cv2.resize(gray, (SCENE_THUMBNAIL_WIDTH, height), interpolation=cv2.INTER_AREA)
+
+
+def scene_difference(a, b):
+    """Plus forte différence moyenne entre zones correspondantes de deux miniatures.
+
+    Une légende ne couvre qu'une petite partie de la frame : comparer zone par
+    zone plutôt que l'image entière rend son changement visible. Des miniatures
+    de tailles différentes (autre vidéo, autre format) sont toujours différentes.
+    """
+    if a.shape != b.shape:
+        return float('inf')
+    rows, columns = a.shape[0] // SCENE_CELL, a.shape[1] // SCENE_CELL
+    diff = cv2.absdiff(a, b)[:rows * SCENE_CELL, :columns * SCENE_CELL].astype('float32')
+    return float(diff.reshape(rows, SCENE_CELL, columns, SCENE_CELL).mean(axis=(1, 3)).max())
+
+
+class VideoFrameSampler:
+    """Échantillonne les frames d'une vidéo directement en mémoire avec cv2.VideoCapture.
+
+    Une frame est retenue toutes les `interval` secondes ; si la vidéo en
+    fournirait plus de `max_frames`, l'intervalle est élargi pour couvrir toute
+    la vidéo. Les frames intermédiaires sont seulement lues (grab), sans
+    conversion. Avec `scene_change`, une frame échantillonnée n'est gardée que
+    si une zone de sa miniature diffère de la même zone de la dernière frame
+    gardée de plus de `scene_threshold` niveaux de gris en moyenne : un
+    changement de légende, même localisé, suffit. `positions` restreint la
+    lecture aux frames échantillonnées de ces rangs (voir frame_selection).
+
+    L'itération produit des couples (nom, image BGR) ; le nom indique la
+    position de la frame dans la vidéo.
+    """
+
+    def __init__(self, path, interval=FRAME_INTERVAL, max_frames=0, scene_change=SCENE_CHANGE_ENABLED,
+                 scene_threshold=SCENE_THRESHOLD, positions=None):
+        self.path = path
+        self.positions = set(positions) if positions is not None else None
+        self.scene_change = scene_change
+        self.scene_threshold = scene_threshold
+
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            raise ValueError(f"Impossible d'ouvrir la vidéo {path}")
+        self.fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        capture.release()
+
+        self.step = max(1, int(round(self.fps * interval)))
+        if max_frames and max_frames > 0 and self.frame_count > 0:
+            self.step = max(self.step, math.ceil(self.frame_count / max_frames))
+        self.max_frames = max_frames
+        # Nombre de frames attendues (le nombre de frames annoncé par le conteneur peut être approximatif)
+        self.expected_frames = math.ceil(self.frame_count / self.step) if self.frame_count > 0 else 0
+        if max_frames and max_frames > 0:
+            self.expected_frames = min(self.expected_frames, max_frames)
+        if self.positions is not None:
+            self.expected_frames = len(self.positions)
+
+        self.frames_read = 0
+        self.frames_sampled = 0
+        self.frames_kept = 0
+        self.decode_time = 0.0
+
+    def __iter__(self):
+        capture = cv2.VideoCapture(self.path)
+        previous = None
+        index = 0
+        try:
+            last_position = max(self.positions) if self.positions else -1
+            while not self.max_frames or self.frames_kept < self.max_frames:
+                if self.positions is not None and index // self.step > last_position:
+                    break
+                start_time = time.time()
+                if not capture.grab():
+                    break
+                self.frames_read += 1
+                frame = None
+                if index % self.step == 0 and (self.positions is None or index // self.step in self.positions):
+                    success, frame = capture.retrieve()
+                    if not success:
+                        frame = None
+                self.decode_time += time.time() - start_time
+                index += 1
+                if frame is None:
+                    continue
+
+                self.frames_sampled += 1
+                if self.scene_change:
+                    thumbnail = scene_thumbnail(frame)
+                    if previous is not None and scene_difference(thumbnail, previous) < self.scene_threshold:
+                        continue
+                    previous = thumbnail
+
+                self.frames_kept += 1
+                timestamp = (index - 1) / self.fps
+                yield f"frame_{self.frames_kept:04d}_{timestamp:.2f}s", frame
+        finally:
+            capture.release()
+
+    def stats(self):
+        """Frames lues, échantillonnées et gardées, et temps de décodage"""
+        return {
+            "fps": self.fps,
+            "frame_count": self.frame_count,
+            "step": self.step,
+            "frames_read": self.frames_read,
+            "frames_sampled": self.frames_sampled,
+            "frames_kept": self.frames_kept,
+            "scene_skipped": self.frames_sampled - self.frames_kept,
+            "decode_time": self.decode_time
+        }
+
+
+def sample_video_bytes(data, suffix='.mp4', **options):
+    """Échantillonne les frames d'une vidéo reçue en mémoire.
+
+    cv2.VideoCapture ne lit que des fichiers : les octets sont écrits dans un
+    fichier temporaire, supprimé une fois les frames décodées. Retourne la
+    liste des frames (nom, image) et les statistiques d'échantillonnage.
+    """
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as video_file:
+        video_file.write(data)
+        path = video_file.name
+    try:
+        sampler = VideoFrameSampler(path, **options)
+        frames = list(sampler)
+        return frames, sampler.stats()
+    finally:
+        os.unlink(path)
+
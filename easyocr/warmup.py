@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+from instrumentation import get_logger, record_error
+from reader_pool import PoolBusyError
+
+# Mode de démarrage du service (surchargeable via .env) :
+#   background : le serveur HTTP répond tout de suite, les modèles se chargent en arrière-plan
+#   lazy       : chaque modèle est chargé à la première requête qui en a besoin
+#   eager      : les modèles sont chargés avant de démarrer le serveur HTTP
+WARMUP_MODE = os.getenv('OCR_WARMUP_MODE', 'background').lower()
+# Attente maximale d'une requête pendant le chargement d'un modèle avant de répondre 503
+READY_TIMEOUT = float(os.getenv('OCR_READY_TIMEOUT', '120'))
+# Délai Retry-After conseillé tant que le chargement n'est pas terminé
+WARMUP_RETRY_AFTER = 5
+# Délai avant un nouvel essai après un chargement échoué (doublé à chaque échec, plafonné)
+LOAD_RETRY_DELAY = float(os.getenv('OCR_LOAD_RETRY_DELAY', '5'))
+LOAD_RETRY_MAX_DELAY = float(os.getenv('OCR_LOAD_RETRY_MAX_DELAY', '300'))
+
+log = get_logger("warmup")
+
+
+class LazyLoader:
+    """Ressource coûteuse chargée une seule fois, en arrière-plan ou au premier usage.
+
+    `load()` construit la ressource (elle peut retourner None si elle n'est
+    pas disponible, par exemple un GPU absent). Les appels concurrents à
+    get() attendent la fin du chargement en cours. Après un échec (téléchargement
+    ou erreur GPU passagère), le chargement est retenté par le premier get()
+    (ou retry_in_background()) qui suit un délai doublé à chaque échec.
+    """
+
+    def __init__(self, name, load, retry_delay=LOAD_RETRY_DELAY, max_retry_delay=LOAD_RETRY_MAX_DELAY):
+        self.name = name
+        self.load = load
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.state = "pending"
+        self.value = None
+        self.error = None
+        self.started_at = None
+        self.load_time = None
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.failures = 0
+        self.retry_at = None
+
+    def retry_due(self):
+        """Vrai si le dernier chargement a échoué et que le délai avant un nouvel essai est écoulé"""
+        return self.state == "error" and self.retry_at is not None and time.time() >= self.retry_at
+
+    def _load_once(self):
+        with self.lock:
+            if self.state != "pending" and not self.retry_due():
+                return
+            # L'erreur précédente reste visible jusqu'à la fin du nouvel essai
+            self.state = "loading"
+            self.loaded.clear()
+            self.started_at = time.time()
+            self.load_time = None
+        try:
+            value = self.load()
+            with self.lock:
+                self.value = value
+                self.error = None
+                self.failures = 0
+                self.retry_at = None
+                self.state = "ready" if value is not None else "unavailable"
+        except Exception as e:
+            with self.lock:
+                self.error = e
+                self.failures += 1
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (self.failures - 1))
+                self.retry_at = time.time() + delay
+                self.state = "error"
+            record_error("warmup", self.name)
+            log.error("load_error", model=self.name, error=str(e), failures=self.failures, retry_in=delay)
+        finally:
+            self.load_time = time.time() - self.started_at
+            self.loaded.set()
+
+    def get(self, timeout=None):
+        """Retourne la ressource en la chargeant au besoin.
+
+        Lève PoolBusyError si le chargement n'est pas terminé après `timeout`
+        secondes, ou l'erreur du chargement s'il a échoué (et que le délai
+        avant un nouvel essai n'est pas écoulé).
+        """
+        if self.state == "pending" or self.retry_due():
+            self._load_once()
+        if not self.loaded.is_set():
+            if not self.loaded.wait(timeout):
+                raise PoolBusyError(f"Modèle {self.name} toujours en cours de chargement", WARMUP_RETRY_AFTER)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def retry_in_background(self):
+        """Relance en arrière-plan un chargement échoué dont le délai est écoulé (voir /ready)"""
+        if self.retry_due():
+            threading.Thread(target=self._load_once, name=f"reload-{self.name}", daemon=True).start()
+
+    def peek(self):
+        """Ressource si elle est déjà chargée, sans déclencher le chargement"""
+        return self.value if self.loaded.is_set() else None
+
+    def status(self):
+        """État du chargement pour /ready"""
+        with self.lock:
+            elapsed = None
+            if self.started_at is not None:
+                elapsed = self.load_time if self.load_time is not None else time.time() - self.started_at
+            return {
+                "state": self.state,
+                "load_time": elapsed,
+                "error": str(self.error) if self.error is not None else None,
+                "failures": self.failures,
+                "retry_in": max(0.0, self.retry_at - time.time()) if self.retry_at is not None else None
+            }
+
+
+def start_warmup(loaders):
+    """Charge les ressources une à une dans un thread d'arrière-plan.
+
+    Le serveur HTTP peut démarrer immédiatement : une requête qui arrive
+    pendant le chargement attend la ressource dont elle a besoin.
+    """
+    def run():
+        start_time = time.time()
+        for loader in loaders:
+            loader._load_once()
+        log.info("warmup_done", seconds=time.time() - start_time)
+
+    thread = threading.Thread(target=run, name="warmup", daemon=True)
+    thread.start()
+    return thread
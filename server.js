@@ -10,7 +10,7 @@ import ffprobeStatic from "ffprobe-static";
 import { dirname } from "path";
 import multer from "multer";
 import { spawn } from "child_process";
-import fetch from "node-fetch";
+import fetch, { FormData, Blob } from "node-fetch";
 import dotenv from "dotenv";
 import { Readable } from "stream";
 import os from "os";
@@ -134,23 +134,22 @@ async function processImageWithEasyOCRService(imagePath, options = {}) {
     throw new Error("Le service EasyOCR n'est pas démarré");
   }
 
-  // Lire l'image et la convertir en Base64
+  // Lire l'image brute (envoyée en binaire, sans encodage Base64)
   const imageBuffer = fs.readFileSync(imagePath);
-  const imageBase64 = imageBuffer.toString("base64");
+  const params = new URLSearchParams({
+    use_gpu: String(options.useGpu !== false), // Par défaut, utiliser le GPU si disponible
+    scale_percent: String(options.scale || 30),
+    correct_text: String(options.correctText || false), // Activer la correction de texte si demandé
+  });
 
   try {
     // Envoyer l'image au service
-    const response = await fetch(`${EASYOCR_SERVICE_URL}/process`, {
+    const response = await fetch(`${EASYOCR_SERVICE_URL}/process?${params}`, {
       method: "POST",
       headers: {
-        "Content-Type": "application/json",
+        "Content-Type": "application/octet-stream",
       },
-      body: JSON.stringify({
-        image: imageBase64,
-        use_gpu: options.useGpu !== false, // Par défaut, utiliser le GPU si disponible
-        scale_percent: options.scale || 30,
-        correct_text: options.correctText || false, // Activer la correction de texte si demandé
-      }),
+      body: imageBuffer,
       timeout: 30000, // 30 secondes de timeout
     });
 
@@ -176,6 +175,54 @@ async function processImageWithEasyOCRService(imagePath, options = {}) {
   }
 }
 
+// Fonction pour traiter toutes les frames en une seule requête au service EasyOCR
+async function processFramesBatchWithEasyOCRService(framePaths, options = {}) {
+  const batchTimer = Timer.start(`OCR batch de ${framePaths.length} images`);
+
+  if (!ocrServiceStarted) {
+    Timer.end(batchTimer);
+    throw new Error("Le service EasyOCR n'est pas démarré");
+  }
+
+  // Envoyer toutes les images brutes dans un formulaire multipart
+  const form = new FormData();
+  framePaths.forEach((framePath) => {
+    form.append(
+      "images",
+      new Blob([fs.readFileSync(framePath)]),
+      path.basename(framePath)
+    );
+  });
+  form.append("use_gpu", String(options.useGpu !== false));
+  form.append("scale_percent", String(options.scale || 30));
+  form.append("correct_text", String(options.correctText || false));
+
+  try {
+    const response = await fetch(`${EASYOCR_SERVICE_URL}/process-batch`, {
+      method: "POST",
+      body: form,
+      timeout: 30000 + framePaths.length * 5000, // Timeout proportionnel au nombre d'images
+    });
+
+    if (!response.ok) {
+      const errorText = await response.text();
+      Timer.end(batchTimer);
+      throw new Error(
+        `Erreur du service OCR: ${response.status} - ${errorText}`
+      );
+    }
+
+    const result = await response.json();
+    result.duration = Timer.end(batchTimer);
+
+    return result;
+  } catch (error) {
+    Timer.end(batchTimer);
+    console.error(`Erreur lors de l'appel batch au service OCR: ${error.message}`);
+    throw error;
+  }
+}
+
 // Fonction pour traiter plusieurs images avec le service EasyOCR
 async function processFramesWithEasyOCRService(framesDir, language = "fra") {
   const totalTimer = Timer.start("Traitement OCR complet");
@@ -222,7 +269,44 @@ async function processFramesWithEasyOCRService(framesDir, language = "fra") {
   const texts = [];
   const processTimer = Timer.start("Traitement OCR des images");
 
-  for (let i = 0; i < framePaths.length; i++) {
+  // Essayer d'abord de traiter toutes les frames en une seule passe
+  let batchProcessed = false;
+  try {
+    const batchResult = await processFramesBatchWithEasyOCRService(
+      framePaths,
+      options
+    );
+    const imageDuration = batchResult.duration / framePaths.length;
+
+    batchResult.results.forEach((result, i) => {
+      if (result.text && result.text.trim()) {
+        texts.push(result.text);
+        results.push({
+          text: result.text,
+          text_type: "raw",
+          image: path.basename(framePaths[i]),
+          confidence: 0.7,
+          is_significant: result.text.trim().length > 3,
+          processing_time: imageDuration,
+        });
+      }
+    });
+
+    console.log(
+      `${framePaths.length} images traitées en ${batchResult.performance.total_time.toFixed(
+        2
+      )}s (détection=${batchResult.performance.detection_time.toFixed(
+        2
+      )}s, reconnaissance=${batchResult.performance.recognition_time.toFixed(
+        2
+      )}s, GPU=${batchResult.performance.gpu_used})`
+    );
+    batchProcessed = true;
+  } catch (error) {
+    console.log("Traitement batch indisponible, traitement image par image...");
+  }
+
+  for (let i = 0; !batchProcessed && i < framePaths.length; i++) {
     try {
       const imageTimer = Timer.start(`OCR image ${i + 1}/${framePaths.length}`);
       console.log(
@@ -1052,8 +1136,151 @@ app.listen(PORT, async () => {
   }
 });
 
-// Fonction pour utiliser EasyOCR via un script Python externe
+// Worker OCR persistant (index.py --serve) : le modèle n'est chargé qu'une fois
+// pour toutes les vidéos au lieu d'un nouveau processus Python par vidéo
+const EASYOCR_WORKER_ENABLED =
+  (process.env.EASYOCR_WORKER_ENABLED || "true").toLowerCase() === "true";
+let ocrWorker = null;
+
+// Démarre le worker et échange avec lui un objet JSON par ligne (stdin/stdout)
+function startEasyOCRWorker(gpuFlag) {
+  const pythonScript = path.join(__dirname, "easyocr", "index.py");
+  const workerProcess = spawn(
+    "conda",
+    [
+      "run",
+      "--no-capture-output",
+      "-n",
+      "ezmeme",
+      "python",
+      "-u",
+      pythonScript,
+      "--serve",
+      "--gpu",
+      gpuFlag,
+    ],
+    { env: { ...process.env, KMP_DUPLICATE_LIB_OK: "TRUE" } }
+  );
+
+  const worker = {
+    process: workerProcess,
+    gpuFlag,
+    pending: new Map(),
+    nextId: 1,
+    buffer: "",
+  };
+  worker.ready = new Promise((resolve, reject) => {
+    worker.onReady = resolve;
+    worker.onStop = reject;
+  });
+
+  workerProcess.stdout.on("data", (data) => {
+    worker.buffer += data.toString();
+    let newline;
+    while ((newline = worker.buffer.indexOf("\n")) >= 0) {
+      const line = worker.buffer.slice(0, newline).trim();
+      worker.buffer = worker.buffer.slice(newline + 1);
+      // Ignorer ce qui n'est pas une réponse JSON (messages de conda)
+      if (!line.startsWith("{")) continue;
+
+      const message = JSON.parse(line);
+      if (message.event === "ready") {
+        console.log(
+          `Worker EasyOCR prêt (modèle chargé en ${message.model_load_time.toFixed(2)}s)`
+        );
+        worker.onReady(message);
+        continue;
+      }
+      const job = worker.pending.get(message.id);
+      if (job) {
+        worker.pending.delete(message.id);
+        if (message.success) {
+          job.resolve(message);
+        } else {
+          job.reject(new Error(message.error));
+        }
+      }
+    }
+  });
+
+  // Les messages de progression du worker arrivent sur stderr
+  workerProcess.stderr.on("data", (data) => {
+    console.log(`Worker EasyOCR: ${data}`);
+  });
+
+  workerProcess.on("close", (code) => {
+    const error = new Error(`Worker EasyOCR arrêté (code ${code})`);
+    console.error(error.message);
+    worker.onStop(error);
+    for (const job of worker.pending.values()) {
+      job.reject(error);
+    }
+    worker.pending.clear();
+    if (ocrWorker === worker) {
+      ocrWorker = null;
+    }
+  });
+
+  return worker;
+}
+
+// Envoie un dossier de frames au worker persistant et attend ses résultats
+async function runEasyOCRWorkerJob(job, gpuFlag) {
+  if (!ocrWorker || ocrWorker.gpuFlag !== gpuFlag) {
+    if (ocrWorker) {
+      ocrWorker.process.stdin.end();
+    }
+    ocrWorker = startEasyOCRWorker(gpuFlag);
+  }
+  const worker = ocrWorker;
+  await worker.ready;
+
+  const id = worker.nextId++;
+  const response = await new Promise((resolve, reject) => {
+    worker.pending.set(id, { resolve, reject });
+    worker.process.stdin.write(JSON.stringify({ id, ...job }) + "\n");
+  });
+
+  const { job_time: jobTime, model_load_time: modelLoadTime } =
+    response.performance;
+  console.log(
+    `Job OCR traité par le worker en ${jobTime.toFixed(
+      2
+    )}s (chargement du modèle: ${modelLoadTime.toFixed(2)}s)`
+  );
+  return response;
+}
+
+// Fonction pour utiliser EasyOCR : worker persistant, ou script Python externe en secours
 async function processImagesWithEasyOCR(language = "fra") {
+  const gpuFlag = String(process.env.EASYOCR_GPU_ENABLED);
+
+  if (EASYOCR_WORKER_ENABLED) {
+    try {
+      await runEasyOCRWorkerJob(
+        {
+          frames_dir: path.join(__dirname, "frames"),
+          max_images: 30,
+          scale: 30,
+          fast: true,
+          gpu: gpuFlag.toLowerCase() === "true",
+        },
+        gpuFlag
+      );
+      return;
+    } catch (error) {
+      console.error(
+        "Erreur du worker EasyOCR, exécution du script Python à la place:",
+        error
+      );
+    }
+  }
+
+  return runEasyOCRScript(language);
+}
+
+// Fonction pour utiliser EasyOCR via un script Python externe (un processus par vidéo)
+async function runEasyOCRScript(language = "fra") {
   return new Promise((resolve, reject) => {
     // Utiliser le script Python qui existe déjà dans le dossier easyocr
     const pythonScript = path.join(__dirname, "easyocr", "index.py");